@@ -6,7 +6,7 @@ from logging import getLogger
 from sys import stdout
 from typing import Final
 
-from movslib.reader import read
+from movslib.movs import open_txt
 
 FNS: Final = (
     '/home/zed/eclipse-workspace/movs-data/BPOL_accumulator_vitomamma.txt',
@@ -18,11 +18,10 @@ logger = getLogger(__name__)
 
 
 def eoystats(fn: str) -> None:
-    _, rows = read(fn)
-
     years = defaultdict[int, Decimal](lambda: Decimal(0))
-    for row in rows:
-        years[row.date.year] += row.money
+    with open_txt(fn) as (_, rows):
+        for row in rows:
+            years[row.date.year] += row.money
 
     for year in sorted(years):
         money = years[year]
@@ -19,12 +19,14 @@ from typing import Self
 from urllib.parse import urlencode
 from urllib.request import urlopen
 
+from movslib import cents
 from movslib.model import ZERO
 from movslib.model import Row
 from movslib.movs import read_txt
 
 if TYPE_CHECKING:
     from collections.abc import Iterator
+    from collections.abc import Sequence
 
 logger = getLogger(__name__)
 
@@ -139,26 +141,9 @@ def acc_by_year(rows: list[Row]) -> 'Iterator[tuple[int, Decimal]]':
         yield (year_orig, acc)
 
 
-def acc_by_month(rows: list[Row]) -> 'Iterator[tuple[Decimal, int, int]]':
-    year_orig = None
-    month_orig = 1
-    acc = ZERO
-    for row in sorted(rows, key=lambda row: row.date):
-        year = row.date.year
-        month = row.date.month
-
-        if year_orig is None:
-            year_orig = year
-            month_orig = month
-        elif year_orig != year or month_orig != month:
-            yield (acc, year_orig, month_orig)
-            year_orig = year
-            month_orig = month
-
-        acc += row.money
-
-    if year_orig is not None:
-        yield (acc, year_orig, month_orig)
+def acc_by_month(rows: 'Sequence[Row]') -> 'Iterator[tuple[Decimal, int, int]]':
+    for day, acc in cents.last_by(rows, 'M'):
+        yield (acc, day.year, day.month)
 
 
 def main() -> None:
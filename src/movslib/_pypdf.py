@@ -0,0 +1,166 @@
+from re import compile as re_compile
+from typing import TYPE_CHECKING
+from typing import Final
+from typing import Literal
+from typing import NamedTuple
+
+from pypdf import PdfWriter
+from pypdf.generic import ArrayObject
+from pypdf.generic import ByteStringObject
+from pypdf.generic import ContentStream
+from pypdf.generic import FloatObject
+from pypdf.generic import TextStringObject
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from pypdf import PageObject
+
+type Engine = Literal['tabula', 'pypdf']
+
+_IDENTITY: Final = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+_POSITIONING: Final = frozenset((b'Tm', b'Td', b'TD', b'T*', b"'", b'"'))
+_SHOWING: Final = frozenset((b'Tj', b'TJ', b"'", b'"'))
+_BOM: Final = '\ufeff'
+
+AMOUNT: Final = re_compile(r'[+-]?\d{1,3}(?:\.\d{3})*,\d{2}')
+
+type Matrix = tuple[float, float, float, float, float, float]
+
+
+class Chunk(NamedTuple):
+    """A run of text, positioned (in points) from the top left corner."""
+
+    top: float
+    left: float
+    text: str
+
+
+def _mul(a: Matrix, b: Matrix) -> Matrix:
+    return (
+        a[0] * b[0] + a[1] * b[2],
+        a[0] * b[1] + a[1] * b[3],
+        a[2] * b[0] + a[3] * b[2],
+        a[2] * b[1] + a[3] * b[3],
+        a[4] * b[0] + a[5] * b[2] + b[4],
+        a[4] * b[1] + a[5] * b[3] + b[5],
+    )
+
+
+def _raw(operand: object) -> object:
+    if isinstance(operand, TextStringObject):
+        # keep the font encoded bytes: the decoded str would be written back
+        return ByteStringObject(operand.get_original_bytes())
+    if isinstance(operand, ArrayObject):
+        return ArrayObject(_raw(item) for item in operand)
+    return operand
+
+
+def _move(
+    operator: bytes, operands: list[object], line: Matrix, leading: float
+) -> tuple[Matrix, float]:
+    """Apply a line positioning operator: the new line matrix and leading."""
+    if operator == b'Tm':
+        return tuple(map(float, operands)), leading  # type: ignore[return-value,arg-type]
+    if operator in (b'Td', b'TD'):
+        tx, ty = map(float, operands)  # type: ignore[arg-type]
+    else:  # T*, ' and "
+        tx, ty = 0.0, -leading
+    if operator == b'TD':
+        leading = -ty
+    return _mul((1.0, 0.0, 0.0, 1.0, tx, ty), line), leading
+
+
+def _split_lines(
+    operations: 'Iterable[tuple[list[object], bytes]]',
+) -> list[tuple[list[object], bytes]]:
+    """Close the text object on every line move.
+
+    pypdf reports text to the visitor only when a text object ends, so all the
+    lines of a (multi line) table cell would be glued together; restarting
+    the text object at the absolute line position gives one visit per line.
+    """
+    ret: list[tuple[list[object], bytes]] = []
+    font: list[object] | None = None
+    leading = 0.0
+    line: Matrix = _IDENTITY
+    for operands, operator in operations:
+        if operator == b'BT':
+            line = _IDENTITY
+        elif operator == b'Tf':
+            font = operands
+        elif operator == b'TL':
+            leading = float(operands[0])  # type: ignore[arg-type]
+
+        if operator not in _POSITIONING:
+            ret.append(
+                (
+                    [_raw(operand) for operand in operands]
+                    if operator in _SHOWING
+                    else operands,
+                    operator,
+                )
+            )
+            continue
+
+        line, leading = _move(operator, operands, line, leading)
+        ret.append(([], b'ET'))
+        ret.append(([], b'BT'))
+        if font is not None:
+            ret.append((font, b'Tf'))
+        ret.append(([FloatObject(value) for value in line], b'Tm'))
+        if operator == b"'":
+            ret.append(([_raw(operands[0])], b'Tj'))
+        elif operator == b'"':
+            aw, ac, text = operands
+            ret.append(([aw], b'Tw'))
+            ret.append(([ac], b'Tc'))
+            ret.append(([_raw(text)], b'Tj'))
+    return ret
+
+
+def _chunks(writer: PdfWriter, page: 'PageObject') -> list[Chunk]:
+    content = ContentStream(page.get_contents(), writer)
+    content.operations = _split_lines(content.operations)
+    page.replace_contents(content)
+
+    height = float(page.mediabox.height)
+    ret: list[Chunk] = []
+
+    def visitor(
+        text: str,
+        cm: list[float],
+        tm: list[float],
+        _font_dict: object,
+        _font_size: float,
+    ) -> None:
+        text = text.replace(_BOM, '')
+        if not text.strip():
+            return
+        x = tm[4] * cm[0] + tm[5] * cm[2] + cm[4]
+        y = tm[4] * cm[1] + tm[5] * cm[3] + cm[5]
+        ret.append(Chunk(round(height - y, 2), round(x, 2), text))
+
+    page.extract_text(visitor_text=visitor)
+    ret.sort()
+    return ret
+
+
+def read_chunks(fn: str) -> list[list[Chunk]]:
+    """Extract the text chunks of each page, top to bottom, left to right."""
+    writer = PdfWriter(clone_from=fn)
+    try:
+        return [_chunks(writer, page) for page in writer.pages]
+    finally:
+        writer.close()
+
+
+def lines(chunks: 'Iterable[Chunk]') -> list[list[Chunk]]:
+    """Group (sorted) chunks sharing the same baseline."""
+    ret: list[list[Chunk]] = []
+    for chunk in chunks:
+        if ret and ret[-1][0].top == chunk.top:
+            ret[-1].append(chunk)
+        else:
+            ret.append([chunk])
+    return ret
@@ -0,0 +1,97 @@
+from contextlib import contextmanager
+from threading import Lock
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Final
+from typing import cast
+
+from pypdf import PdfReader
+from tabula.io import read_pdf
+from tabula.io import read_pdf_with_template
+
+from jpype import isJVMStarted
+from movslib._java import java
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from collections.abc import Iterable
+    from collections.abc import Iterator
+
+    from pandas import DataFrame
+
+JAVA_OPTIONS: Final = ('--enable-native-access=ALL-UNNAMED',)
+
+# tabula-py starts its (jpype) JVM at the first call, without locking
+_jvm_lock = Lock()
+
+
+def _call(
+    read: 'Callable[..., Any]', *args: object, **kwargs: object
+) -> 'list[DataFrame]':
+    with _jvm_lock, java():
+        # only the first call starts the JVM: the others would just warn
+        java_options = None if isJVMStarted() else list(JAVA_OPTIONS)
+        return cast(
+            'list[DataFrame]',
+            read(*args, java_options=java_options, silent=True, **kwargs),
+        )
+
+
+def _pandas_options(*, header: bool) -> dict[str, Any]:
+    return {} if header else {'header': None}
+
+
+class TabulaPdf:
+    """A PDF read through tabula-py, in the one JVM of the process.
+
+    tabula-py (in jpype mode) starts the JVM at its first call and keeps it
+    alive: the reads of every TabulaPdf share it.
+    """
+
+    def __init__(self, fn: str) -> None:
+        self.fn = fn
+
+    @property
+    def number_of_pages(self) -> int:
+        return len(PdfReader(self.fn).pages)
+
+    def read_pdf(
+        self,
+        *,
+        pages: 'str | int | Iterable[int]' = 1,
+        area: 'Iterable[Iterable[float]] | None' = None,
+        lattice: bool = False,
+        header: bool = True,
+    ) -> 'list[DataFrame]':
+        """Like `tabula.io.read_pdf`, with `header=False` for no header."""
+        return _call(
+            read_pdf,
+            self.fn,
+            pages=pages,
+            area=area,
+            lattice=lattice,
+            pandas_options=_pandas_options(header=header),
+        )
+
+    def read_pdf_with_template(
+        self, template_path: str, *, header: bool = True
+    ) -> 'list[DataFrame]':
+        """Like `tabula.io.read_pdf_with_template`."""
+        return _call(
+            read_pdf_with_template,
+            self.fn,
+            template_path,
+            pandas_options=_pandas_options(header=header),
+        )
+
+    def close(self) -> None:
+        pass
+
+
+@contextmanager
+def open_pdf(fn: str) -> 'Iterator[TabulaPdf]':
+    pdf = TabulaPdf(fn)
+    try:
+        yield pdf
+    finally:
+        pdf.close()
@@ -1,118 +1,235 @@
+from collections import defaultdict
+from dataclasses import fields
+from functools import lru_cache
+from json import JSONDecodeError
+from json import load as json_load
+from operator import attrgetter
+from pathlib import Path
+from tomllib import TOMLDecodeError
+from tomllib import load as toml_load
 from typing import TYPE_CHECKING
+from typing import Final
+from typing import NamedTuple
 
 from movslib.autotag.model import TagRow
 from movslib.autotag.model import TagRows
 from movslib.autotag.model import Tags
+from movslib.model import Row
 
 if TYPE_CHECKING:
-    from movslib.model import Row
+    from collections.abc import Iterable
+    from functools import _CacheInfo
+
+    from movslib.model import ColumnarRows
     from movslib.model import Rows
 
 
-def autotag(rows: 'Rows') -> TagRows:
-    return TagRows(rows.name, map(_autotag_row, rows))
+class Rule(NamedTuple):
+    """Tag the rows whose description contains all the `patterns`.
+
+    With `prefix` the (only) pattern must start the description; with
+    `accrediti` only the incoming movements are tagged.
+    """
+
+    patterns: tuple[str, ...]
+    tags: frozenset[Tags]
+    prefix: bool = False
+    accrediti: bool = False
+
+
+class RulesError(ValueError):
+    def __init__(self, path: 'str | Path', reason: str) -> None:
+        super().__init__(f'{path}: {reason}')
 
 
-def _autotag_row(row: 'Row') -> TagRow:
-    """Add zero, one, or more tags to a row, based on patterns."""
-    accrediti = row.accrediti
-    descrizione_operazioni = row.descrizione_operazioni
+_RULE_KEYS: Final = frozenset(
+    ('patterns', 'any', 'tags', 'prefix', 'accrediti')
+)
 
-    ret = TagRow(
-        row.data_contabile,
-        row.data_valuta,
-        row.addebiti,
-        accrediti,
-        descrizione_operazioni,
+
+def _strings(path: Path, rule: dict[str, object], key: str) -> list[str]:
+    value = rule.get(key, [])
+    if not isinstance(value, list) or not all(
+        isinstance(item, str) for item in value
+    ):
+        raise RulesError(path, f'{key} must be a list of strings: {rule}')
+    return value
+
+
+def _parse_rule(path: Path, rule: object) -> list[Rule]:
+    if not isinstance(rule, dict) or not _RULE_KEYS.issuperset(rule):
+        raise RulesError(path, f'invalid rule: {rule}')
+    if ('patterns' in rule) == ('any' in rule):
+        raise RulesError(path, f'either patterns or any: {rule}')
+    prefix = rule.get('prefix', False)
+    accrediti = rule.get('accrediti', False)
+    if not isinstance(prefix, bool) or not isinstance(accrediti, bool):
+        raise RulesError(path, f'prefix and accrediti must be bool: {rule}')
+    try:
+        tags = frozenset(map(Tags, _strings(path, rule, 'tags')))
+    except ValueError as e:
+        raise RulesError(path, f'{e}: {rule}') from e
+
+    patternss = (
+        [tuple(_strings(path, rule, 'patterns'))]
+        if 'patterns' in rule
+        else [(pattern,) for pattern in _strings(path, rule, 'any')]
     )
+    if prefix and any(len(patterns) != 1 for patterns in patternss):
+        raise RulesError(path, f'prefix needs a single pattern: {rule}')
+    return [Rule(patterns, tags, prefix, accrediti) for patterns in patternss]
+
+
+def load_rules(path: 'str | Path') -> tuple[Rule, ...]:
+    """Read the [[rule]] tables of a .toml (or the same, as .json) file."""
+    path = Path(path)
+    try:
+        with path.open('rb') as f:
+            document = json_load(f) if path.suffix == '.json' else toml_load(f)
+    except (TOMLDecodeError, JSONDecodeError, UnicodeDecodeError) as e:
+        raise RulesError(path, str(e)) from e
+    rules = document.get('rule', []) if isinstance(document, dict) else None
+    if not isinstance(rules, list):
+        raise RulesError(path, 'rule must be an array of tables')
+    return tuple(r for rule in rules for r in _parse_rule(path, rule))
+
+
+RULES_PATH: Final = Path(__file__).with_name('rules.toml')
+RULES: Final = load_rules(RULES_PATH)
+
+
+def _update(
+    tags: set[Tags], rules: 'Iterable[Rule]', *, accrediti: bool
+) -> None:
+    for rule in rules:
+        if accrediti or not rule.accrediti:
+            tags.update(rule.tags)
+
+
+MEMO_SIZE: Final = 8192
+
+
+class Matcher:
+    """The rules, compiled once for all the rows.
+
+    Every distinct pattern is searched once per description, and only the
+    rules of the patterns found are then evaluated. The tags of the last
+    `memo_size` distinct descriptions are remembered, as the same ones
+    (bills, transfers, shops) recur month after month.
+    """
 
-    if accrediti is not None:
-        ret.tags.add(Tags.ENTRATE)
-
-    for pattern, tags in [('BONIFICO SEPA', [Tags.BONIFICO])]:
-        if pattern in descrizione_operazioni and accrediti is not None:
-            ret.tags.update(tags)
-
-    for pattern, tags in [
-        (p, [Tags.COMMISSIONI])
-        for p in ['COMMISSIONI', 'CANONE', 'IMPOSTA DI BOLLO']
-    ]:
-        if descrizione_operazioni.startswith(pattern):
-            ret.tags.update(tags)
-
-    for pattern, tags in {
-        'AUTOSTRADA': [Tags.AUTOSTRADA],
-        'ENEL ENERGIA': [Tags.BOLLETTE, Tags.LUCE],
-        'Wind Tre S.p.A.': [Tags.BOLLETTE, Tags.TELEFONO],
-        'WIND TRE S P A': [Tags.BOLLETTE, Tags.TELEFONO],
-        'SORGENIA S P A': [Tags.BOLLETTE, Tags.GAS],
-        'FASTWEB': [Tags.BOLLETTE, Tags.TELEFONO],
-        **{
-            p: [Tags.SPESA]
-            for p in (
-                'ESSELUNGA',
-                'EUROSPIN',
-                'IPERCOOP',
-                'SUPERMERCATO',
-                'IL GIGANTE',
-                'ALDI',
+    def __init__(
+        self, rules: 'Iterable[Rule]', memo_size: int = MEMO_SIZE
+    ) -> None:
+        self.rules: Final = tuple(rules)
+        self._always: list[Rule] = []
+        self._by_prefix: dict[str, list[Rule]] = defaultdict(list)
+        self._by_pattern: dict[str, list[Rule]] = defaultdict(list)
+        for rule in self.rules:
+            if not rule.patterns:
+                self._always.append(rule)
+            elif rule.prefix:
+                self._by_prefix[rule.patterns[0]].append(rule)
+            else:
+                # indexed on the first pattern, checking the others later
+                self._by_pattern[rule.patterns[0]].append(rule)
+        self._prefixes: Final = tuple(self._by_prefix)
+        self._patterns: Final = tuple(
+            dict.fromkeys(
+                pattern
+                for rules in self._by_pattern.values()
+                for rule in rules
+                for pattern in rule.patterns
             )
-        },
-        'RICARICA POSTEPAY': [Tags.RICARICA_POSTEPAY],
-        **{
-            p: [Tags.CONDOMINIO]
-            for p in (
-                'STUDIO RAG. ANDREA IANNUZZI',
-                'Gestione ordinaria',
-                '-CMAV-',
-                'ORDINARIA',
-                'anticipata',
-                'RIFACIMENTO IMPIANTO VIDEOCITOF',
-                'ANTICIPATA',
-                'TINTEGGIATURA SCALE',
-                'BENEF BANCA DI CREDITO COOPERATIVO PER CAUSALE',
-                'per Ordinaria',
-                'PER Ordinaria',
-                'PER gestione ordinaria',
-                'ordinaria',
-                'BENEF Banca di credito cooperativo PER',
+        )
+        self._memo: Final = lru_cache(maxsize=memo_size)(self._tags)
+
+    def tags(self, descrizione: str, *, accrediti: bool) -> set[Tags]:
+        """Return the tags of a description (of an incoming movement)."""
+        return set(self._memo(descrizione, accrediti=accrediti))
+
+    def cache_info(self) -> '_CacheInfo':
+        """Return the hits and misses of the memo of `tags`."""
+        return self._memo.cache_info()
+
+    def _tags(self, descrizione: str, *, accrediti: bool) -> frozenset[Tags]:
+        ret: set[Tags] = set()
+        _update(ret, self._always, accrediti=accrediti)
+
+        if descrizione.startswith(self._prefixes):
+            for prefix, rules in self._by_prefix.items():
+                if descrizione.startswith(prefix):
+                    _update(ret, rules, accrediti=accrediti)
+
+        found = {
+            pattern for pattern in self._patterns if pattern in descrizione
+        }
+        for pattern in found:
+            _update(
+                ret,
+                (
+                    rule
+                    for rule in self._by_pattern.get(pattern, ())
+                    if found.issuperset(rule.patterns)
+                ),
+                accrediti=accrediti,
             )
-        },
-        '1 H CLEAN DI ROZZA GIU': [Tags.LAVANDERIA],
-        '000053361801': [Tags.RISPARMIO, Tags.LIBRETTO],
-        'COFFEE CAPP': [Tags.MACCHINETTA_CAFFE],
-        **{
-            p: [Tags.TRASPORTI]
-            for p in ['ATM MILAN', 'TRENORD', 'TRENITALIA', 'AZIENDATRAS']
-        },
-        **{p: [Tags.DELIVERY] for p in ['DELIVEROO']},
-    }.items():
-        if pattern in descrizione_operazioni:
-            ret.tags.update(tags)
-
-    # and
-    for patterns, tags in [
-        *[
-            (ps, [Tags.PRANZO_VIMERCATE])
-            for ps in [
-                ["MCDONALD'S VIMERCATE", 'VIMERCATE'],
-                ['PELLEGRINI SPA C/O ALC', 'VIMERCATE'],
-                ["UAGLIO'-V.TORRIBIANCH", 'VIMERCATE'],
-                ['CIOCCOLATI ITALIANI', 'VIMERCATE'],
-                ['CLAVERA VIMERCATE', 'VIMERCATE'],
-                ['PAN B SRL', 'VIMERCATE'],
-                ['GRUPPO NEGOZI SRL', 'VIMERCATE'],
-                ['HAMBU VIMERCATE', 'VIMERCATE'],
-                ["PAGAMENTO POS MAMMA' ROSA", 'VIMERCATE'],
-                ['PAGAMENTO POS OLD WILD WEST', 'VIMERCATE'],
-            ]
-        ],
-        *[
-            (ps, [Tags.BENZINA])
-            for ps in [['PAGAMENTO POS 45592 CASTELNUOVO DEL']]
-        ],
-    ]:
-        if all(pattern in descrizione_operazioni for pattern in patterns):
-            ret.tags.update(tags)
-
-    return ret
+        return frozenset(ret)
+
+    def changed(self, other: 'Matcher') -> 'Matcher':
+        """Return the matcher of the rules in just one of self and other.
+
+        The tags of a row change, switching from self to other, only if
+        some of these rules apply to it.
+        """
+        mine, theirs = set(self.rules), set(other.rules)
+        return Matcher(mine.symmetric_difference(theirs))
+
+    def tag_row(self, row: 'Row') -> TagRow:
+        """Add zero, one, or more tags to a row, based on patterns."""
+        return TagRow(
+            row.data_contabile,
+            row.data_valuta,
+            row.addebiti,
+            row.accrediti,
+            row.descrizione_operazioni,
+            self.tags(
+                row.descrizione_operazioni, accrediti=row.accrediti is not None
+            ),
+        )
+
+
+MATCHER: Final = Matcher(RULES)
+
+
+@lru_cache(maxsize=8)
+def _get_matcher(path: str, _size: int, _mtime_ns: int) -> Matcher:
+    return Matcher(load_rules(path))
+
+
+def get_matcher(path: 'str | Path' = RULES_PATH) -> Matcher:
+    """Return the matcher of a rules file, compiled again only if changed."""
+    stat = Path(path).stat()
+    return _get_matcher(str(path), stat.st_size, stat.st_mtime_ns)
+
+
+_ROW_KEY: Final = attrgetter(*(field.name for field in fields(Row)))
+
+
+def autotag(
+    rows: 'Rows | ColumnarRows',
+    matcher: Matcher = MATCHER,
+    previous: 'Iterable[TagRow]' = (),
+) -> TagRows:
+    """Tag the rows, through `matcher`.
+
+    The rows already in `previous` (tagged by the same `matcher`) are
+    taken from there, as they are: only the new ones are tagged.
+    """
+    known = {_ROW_KEY(row): row for row in previous}
+    if not known:
+        return TagRows(rows.name, map(matcher.tag_row, rows))
+    get = known.get
+    return TagRows(
+        rows.name, (get(_ROW_KEY(row)) or matcher.tag_row(row) for row in rows)
+    )
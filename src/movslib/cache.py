@@ -0,0 +1,149 @@
+from contextlib import suppress
+from functools import partial
+from hashlib import sha256
+from logging import getLogger
+from os import environ
+from os import utime
+from pathlib import Path
+from pickle import HIGHEST_PROTOCOL
+from pickle import dumps
+from pickle import loads
+from tempfile import NamedTemporaryFile
+from typing import TYPE_CHECKING
+from typing import Final
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from movslib.model import KV
+    from movslib.model import Row
+
+logger = getLogger(__name__)
+
+# bump whenever KV / Row change shape, to discard stale pickles
+VERSION: Final = 1
+
+CACHE_DIR: Final = (
+    Path(environ.get('XDG_CACHE_HOME', Path.home() / '.cache')) / 'movs-viewer'
+)
+MAX_SIZE: Final = 64 * 1024 * 1024
+SUFFIX: Final = '.pickle'
+
+NO_CACHE_ARG: Final = '--no-cache'
+CLEAR_CACHE_ARG: Final = '--clear-cache'
+
+
+def _reader_id(reader: 'Callable[..., object]') -> str:
+    if isinstance(reader, partial):
+        # the keyword arguments (e.g. the PDF engine) may change the output
+        keywords = ','.join(
+            f'{k}={v!r}' for k, v in sorted(reader.keywords.items())
+        )
+        return f'{_reader_id(reader.func)}({keywords})'
+    return f'{reader.__module__}.{reader.__qualname__}'
+
+
+class Cache:
+    """On-disk cache of parsed (KV, rows), keyed on path, size and mtime."""
+
+    def __init__(
+        self, directory: Path = CACHE_DIR, max_size: int = MAX_SIZE
+    ) -> None:
+        self.directory = directory
+        self.max_size = max_size
+        self.enabled = 'MOVS_NO_CACHE' not in environ
+
+    def key(self, fn: str, reader: 'Callable[[str], object]') -> str:
+        path = Path(fn).resolve()
+        stat = path.stat()
+        reader_id = _reader_id(reader)
+        raw = f'{VERSION}|{path}|{stat.st_size}|{stat.st_mtime_ns}|{reader_id}'
+        return sha256(raw.encode('UTF-8')).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f'{key}{SUFFIX}'
+
+    def get(self, key: str) -> 'tuple[KV, list[Row]] | None':
+        path = self._path(key)
+        try:
+            payload = path.read_bytes()
+        except OSError:  # missing, evicted by a concurrent put, ...
+            return None
+        try:
+            kv, csv = loads(payload)  # noqa: S301
+        except Exception:  # noqa: BLE001 - corrupted, or of a stale layout
+            logger.warning('discarding corrupted cache entry %s', path)
+            with suppress(OSError):
+                path.unlink(missing_ok=True)
+            return None
+        with suppress(OSError):  # evicted by a concurrent put, ...
+            utime(path)  # mark as recently used
+        return kv, csv
+
+    def put(self, key: str, value: 'tuple[KV, list[Row]]') -> None:
+        tmp = None
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with NamedTemporaryFile(
+                dir=self.directory, suffix='.tmp', delete=False
+            ) as ntf:
+                tmp = Path(ntf.name)
+                ntf.write(dumps(value, protocol=HIGHEST_PROTOCOL))
+            tmp.replace(self._path(key))
+        except OSError:  # full disk, read only directory, ...: not cached
+            logger.warning('cannot write the cache entry %s', self._path(key))
+            if tmp is not None:
+                with suppress(OSError):
+                    tmp.unlink(missing_ok=True)
+            return
+        with suppress(OSError):  # just bigger, until the next put
+            self.evict()
+
+    def evict(self) -> None:
+        """Drop least recently used entries until under `max_size`.
+
+        Other threads and processes may evict at the same time: the entries
+        that disappear meanwhile are skipped.
+        """
+        entries = []
+        for path in self.directory.glob(f'*{SUFFIX}'):
+            with suppress(FileNotFoundError):
+                entries.append((path.stat(), path))
+        total = sum(stat.st_size for stat, _ in entries)
+        for stat, path in sorted(entries, key=lambda e: e[0].st_mtime_ns):
+            if total <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            total -= stat.st_size
+
+    def clear(self) -> None:
+        """Drop all the entries, and the .txt sidecars kept here too."""
+        for path in self.directory.glob('*'):
+            path.unlink(missing_ok=True)
+
+    def read(
+        self, fn: str, reader: 'Callable[[str], tuple[KV, list[Row]]]'
+    ) -> 'tuple[KV, list[Row]]':
+        if not self.enabled:
+            return reader(fn)
+
+        key = self.key(fn, reader)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        value = reader(fn)
+        self.put(key, value)
+        return value
+
+
+CACHE: Final = Cache()
+
+
+def cache_args(args: list[str]) -> list[str]:
+    """Apply (and strip) the cache related command line switches."""
+    if CLEAR_CACHE_ARG in args:
+        CACHE.clear()
+    if NO_CACHE_ARG in args:
+        CACHE.enabled = False
+    return [arg for arg in args if arg not in (NO_CACHE_ARG, CLEAR_CACHE_ARG)]
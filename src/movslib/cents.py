@@ -0,0 +1,136 @@
+from datetime import date
+from decimal import Decimal
+from typing import TYPE_CHECKING
+from typing import Final
+from typing import Literal
+
+from numpy import argsort
+from numpy import cumsum as np_cumsum
+from numpy import flatnonzero
+from numpy import frombuffer
+from numpy import int8
+from numpy import int32
+from numpy import int64
+from numpy import maximum
+from numpy import where
+from numpy import zeros
+
+from movslib.model import NO_AMOUNT
+from movslib.model import ColumnarRows
+
+if TYPE_CHECKING:
+    from array import array
+    from collections.abc import Sequence
+
+    from numpy import bool_
+    from numpy.typing import NDArray
+
+    from movslib.model import Row
+
+type Unit = Literal['Y', 'M']
+
+# date(1970, 1, 1).toordinal(): the numpy datetime64 epoch, as a day ordinal
+_EPOCH: Final = 719_163
+
+
+def to_decimal(units: int, exponent: int) -> Decimal:
+    return Decimal(units).scaleb(exponent)
+
+
+def _columnar(rows: 'Sequence[Row]') -> ColumnarRows:
+    """Return rows as is if columnar, else copied in a ColumnarRows."""
+    if isinstance(rows, ColumnarRows):
+        return rows
+    return ColumnarRows('', rows)
+
+
+def _scaled(
+    coefficients: 'array[int]', exponents: 'NDArray[int8]', exponent: int
+) -> 'tuple[NDArray[int64], NDArray[bool_]]':
+    """Return the amounts in units of 10 ** exponent, and where present."""
+    units = frombuffer(coefficients, dtype=int64)
+    present = units != NO_AMOUNT
+    scale = 10 ** (exponents.astype(int64) - exponent)
+    return where(present, units * scale, 0), present
+
+
+def money(rows: 'Sequence[Row]') -> 'tuple[NDArray[int64], int]':
+    """Return `Row.money` of each row, in units of 10 ** exponent.
+
+    The exponent is the finest of the amounts (and 0, the one of `ZERO`):
+    like a `Decimal` sum, the totals keep all the digits of the amounts.
+    """
+    rows = _columnar(rows)
+    addebiti_exponent = frombuffer(rows.addebiti_exponent, dtype=int8)
+    accrediti_exponent = frombuffer(rows.accrediti_exponent, dtype=int8)
+    exponent = int(
+        min(addebiti_exponent.min(initial=0), accrediti_exponent.min(initial=0))
+    )
+    addebiti, has_addebiti = _scaled(rows.addebiti, addebiti_exponent, exponent)
+    accrediti, _ = _scaled(rows.accrediti, accrediti_exponent, exponent)
+    return where(has_addebiti, -addebiti, accrediti), exponent
+
+
+def total(rows: 'Sequence[Row]') -> Decimal:
+    units, exponent = money(rows)
+    return to_decimal(int(units.sum()), exponent)
+
+
+def _starts(days: 'NDArray[int32]', unit: Unit) -> 'NDArray[int64]':
+    """Return the indexes of the (sorted) days opening a new year / month."""
+    periods = (
+        (days - _EPOCH).astype('datetime64[D]').astype(f'datetime64[{unit}]')
+    )
+    return flatnonzero(periods[1:] != periods[:-1]) + 1
+
+
+def cumsum(
+    rows: 'Sequence[Row]', reset: Unit | None = None
+) -> 'tuple[NDArray[int32], NDArray[int64], int]':
+    """Return day ordinals and running totals, stably sorted on `Row.date`.
+
+    The totals are in units of 10 ** exponent, the last returned value.
+
+    With `reset` the running total restarts at every new year ('Y') or
+    month ('M').
+    """
+    rows = _columnar(rows)
+    data_valuta = frombuffer(rows.data_valuta, dtype=int32)
+    order = argsort(data_valuta, kind='stable')
+    days = data_valuta[order]
+    units, exponent = money(rows)
+    units = units[order]
+    totals = np_cumsum(units)
+    if reset is not None and len(days):
+        starts = _starts(days, reset)
+        first = zeros(len(days), dtype=int64)
+        first[starts] = starts
+        first = maximum.accumulate(first)
+        totals -= totals[first] - units[first]
+    return days, totals, exponent
+
+
+def acc(
+    rows: 'Sequence[Row]', reset: Unit | None = None
+) -> list[tuple[date, Decimal]]:
+    """Return (date, running total) of the rows sorted on `Row.date`."""
+    days, totals, exponent = cumsum(rows, reset)
+    return [
+        (date.fromordinal(day), to_decimal(units, exponent))
+        for day, units in zip(days.tolist(), totals.tolist(), strict=True)
+    ]
+
+
+def last_by(rows: 'Sequence[Row]', unit: Unit) -> list[tuple[date, Decimal]]:
+    """Return (date, running total) of the last row of every year / month."""
+    days, totals, exponent = cumsum(rows)
+    if not len(days):
+        return []
+    ends = [*(_starts(days, unit) - 1).tolist(), len(days) - 1]
+    return [
+        (
+            date.fromordinal(int(days[end])),
+            to_decimal(int(totals[end]), exponent),
+        )
+        for end in ends
+    ]
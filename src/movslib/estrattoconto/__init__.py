@@ -4,16 +4,17 @@ from datetime import datetime
 from decimal import Decimal
 from math import isnan
 from pathlib import Path
+from re import compile as re_compile
 from typing import TYPE_CHECKING
 from typing import Final
 from typing import NotRequired
 from typing import TypedDict
 from typing import overload
 
-from pypdf import PdfReader
-from tabula.io import read_pdf_with_template
-
-from movslib._java import java
+from movslib._pypdf import AMOUNT
+from movslib._pypdf import lines
+from movslib._pypdf import read_chunks
+from movslib._tabula import open_pdf
 from movslib.model import KV
 from movslib.model import ZERO
 from movslib.model import Row
@@ -22,10 +23,38 @@ from movslib.model import Rows
 if TYPE_CHECKING:
     from pandas import DataFrame
 
+    from movslib._pypdf import Chunk
+    from movslib._pypdf import Engine
+
 TEMPLATE_1: Final = f'{Path(__file__).parent}/template_1.json'
 TEMPLATE_2: Final = f'{Path(__file__).parent}/template_2.json'
 TEMPLATE_3: Final = f'{Path(__file__).parent}/template_3.json'
 
+# page 1 areas (top, left, bottom, right) of the template_*.json files
+_AREA_MESE: Final = (36.0, 298.0, 63.0, 453.0)
+_AREA_CONTO: Final = (65.0, 417.0, 83.0, 552.0)
+_AREA_INTESTATO: Final = (83.0, 362.0, 99.0, 537.0)
+
+# Left edges (in points) of the movements columns, for the pypdf engine.
+# Each edge sits in the gutter before its column: data contabile starts at
+# ~35, data valuta at ~84, the description at ~325; the amounts are right
+# aligned, the addebiti starting from ~184 and the accrediti from ~279.
+_COL_VALUTA: Final = 60.0
+_COL_ADDEBITI: Final = 150.0
+_COL_ACCREDITI: Final = 240.0
+_COL_DESCRIZIONE: Final = 300.0
+# above the page footer (the "Pag. n" line at ~801), below the movements
+_FOOTER: Final = 780.0
+
+DATE: Final = re_compile(r'\d{2}/\d{2}/\d{2}')
+
+_NOT_MOVEMENTS: Final = (
+    'SALDO INIZIALE',
+    'SALDO FINALE',
+    'TOTALE USCITE',
+    'TOTALE ENTRATE',
+)
+
 
 @overload
 def conv_date(dt: str) -> date: ...
@@ -124,12 +153,7 @@ def read_csv(tables: 'list[DataFrame]') -> list[Row]:
             nonlocal ret
             nonlocal t_row
 
-            if t_row and t_row['descrizione_operazioni'] not in (
-                'SALDO INIZIALE',
-                'SALDO FINALE',
-                'TOTALE USCITE',
-                'TOTALE ENTRATE',
-            ):
+            if t_row and t_row['descrizione_operazioni'] not in _NOT_MOVEMENTS:
                 ret.append(Row(**t_row))
             t_row = {}
 
@@ -155,31 +179,131 @@ def read_csv(tables: 'list[DataFrame]') -> list[Row]:
     return list(reversed(ret))
 
 
+def _in_area(chunk: 'Chunk', area: tuple[float, float, float, float]) -> bool:
+    top, left, bottom, right = area
+    return top <= chunk.top <= bottom and left <= chunk.left <= right
+
+
+def _area_text(
+    page: 'list[Chunk]', area: tuple[float, float, float, float]
+) -> str:
+    return ' '.join(
+        chunk.text.strip() for chunk in page if _in_area(chunk, area)
+    )
+
+
+def _t_row(line: 'list[Chunk]') -> tuple[TRow, list[str]] | None:
+    """Split a line in its columns, None if not part of the table."""
+    t_row: TRow = {}
+    descr: list[str] = []
+    for chunk in line:
+        text = chunk.text.strip()
+        if chunk.left >= _COL_DESCRIZIONE:
+            descr.append(text)
+        elif chunk.left >= _COL_ADDEBITI:
+            amount, *rest = text.split(maxsplit=1)
+            if AMOUNT.fullmatch(amount) is None:
+                return None
+            if chunk.left < _COL_ACCREDITI:
+                t_row['addebiti'] = conv_decimal(amount)
+            else:
+                t_row['accrediti'] = conv_decimal(amount)
+            descr.extend(rest)
+        elif DATE.fullmatch(text) is None:
+            return None
+        elif chunk.left >= _COL_VALUTA:
+            t_row['data_valuta'] = conv_date(text)
+        else:
+            t_row['data_contabile'] = conv_date(text)
+    return t_row, descr
+
+
+def _t_rows(pages: 'list[list[Chunk]]') -> list[TRow]:
+    """All the table rows, the summary ones too, in document order."""
+    ret: list[TRow] = []
+    for page in pages:
+        in_table = False
+        for line in lines(page):
+            parsed = None if line[0].top > _FOOTER else _t_row(line)
+            if parsed is None:
+                continue
+            t_row, descr = parsed
+            if t_row:
+                in_table = True
+                t_row.setdefault('addebiti', None)
+                t_row.setdefault('accrediti', None)
+                t_row['descrizione_operazioni'] = ' '.join(descr)
+                ret.append(t_row)
+            elif in_table and descr:  # continuation
+                ret[-1]['descrizione_operazioni'] += f' {" ".join(descr)}'
+    return ret
+
+
+def read_kv_chunks(pages: 'list[list[Chunk]]') -> KV:
+    """Like `read_kv`, from the text chunks extracted by pypdf."""
+    first = pages[0]
+    da = a = saldo_al = conv_date(_area_text(first, _AREA_MESE))
+    conto_bancoposta = f'{int(_area_text(first, _AREA_CONTO)):012d}'
+    intestato_a = _area_text(first, _AREA_INTESTATO)
+
+    last = _t_rows(pages)[-1]
+    descr = last['descrizione_operazioni']
+    if descr != 'SALDO FINALE':
+        raise ValueError(descr)
+    saldo_contabile = saldo_disponibile = last['accrediti']
+
+    return KV(
+        da,
+        a,
+        'Tutte',
+        conto_bancoposta,
+        intestato_a,
+        saldo_al,
+        ZERO if saldo_contabile is None else saldo_contabile,
+        ZERO if saldo_disponibile is None else saldo_disponibile,
+    )
+
+
+def read_csv_chunks(pages: 'list[list[Chunk]]') -> list[Row]:
+    """Like `read_csv`, from the text chunks extracted by pypdf."""
+    return [
+        Row(**t_row)
+        for t_row in reversed(_t_rows(pages))
+        if t_row['descrizione_operazioni'] not in _NOT_MOVEMENTS
+    ]
+
+
 @overload
-def read_estrattoconto(fn: str) -> tuple[KV, list[Row]]: ...
+def read_estrattoconto(
+    fn: str, *, engine: 'Engine' = ...
+) -> tuple[KV, list[Row]]: ...
 
 
 @overload
-def read_estrattoconto(fn: str, name: str) -> tuple[KV, Rows]: ...
+def read_estrattoconto(
+    fn: str, name: str, *, engine: 'Engine' = ...
+) -> tuple[KV, Rows]: ...
 
 
 def read_estrattoconto(
-    fn: str, name: str | None = None
+    fn: str, name: str | None = None, *, engine: 'Engine' = 'tabula'
 ) -> tuple[KV, list[Row] | Rows]:
-    template = {
-        1: TEMPLATE_1,
-        2: TEMPLATE_2,
-        3: TEMPLATE_3,
-        10: TEMPLATE_2,  # dicembre
-        13: TEMPLATE_2,  # marzo 2021
-    }[len(PdfReader(fn).pages)]
-
-    with java():
-        tables = read_pdf_with_template(
-            fn, template, pandas_options={'header': None}
-        )
-    if not isinstance(tables, list):
-        raise TypeError(tables)
+    if engine == 'pypdf':
+        pages = read_chunks(fn)
+        kv = read_kv_chunks(pages)
+        csv = read_csv_chunks(pages)
+        return kv, (list(csv) if name is None else Rows(name, csv))
+
+    with open_pdf(fn) as pdf:
+        template = {
+            1: TEMPLATE_1,
+            2: TEMPLATE_2,
+            3: TEMPLATE_3,
+            10: TEMPLATE_2,  # dicembre
+            13: TEMPLATE_2,  # marzo 2021
+        }[pdf.number_of_pages]
+
+        tables = pdf.read_pdf_with_template(template, header=False)
     kv = read_kv(tables)
     csv = read_csv(tables)
     return kv, (list(csv) if name is None else Rows(name, csv))
@@ -1,13 +1,21 @@
+from array import array
+from collections.abc import Sequence
 from dataclasses import dataclass
+from datetime import date
 from decimal import Decimal
+from sys import intern
 from typing import TYPE_CHECKING
 from typing import Final
+from typing import overload
+from typing import override
 
 if TYPE_CHECKING:
     from collections.abc import Iterable
-    from datetime import date
+    from collections.abc import Iterator
 
 ZERO: Final = Decimal(0)
+# marks a missing (None) amount in a coefficients column
+NO_AMOUNT: Final = -(2**63)
 
 
 @dataclass(frozen=True)
@@ -47,3 +55,121 @@ class Rows(list[Row]):
     def __init__(self, name: str, iterable: 'Iterable[Row]' = ()) -> None:
         super().__init__(iterable)
         self.name = name
+
+
+def to_units(amount: Decimal | None) -> tuple[int, int]:
+    """Split amount in (coefficient, exponent): amount == c * 10 ** e."""
+    if amount is None:
+        return NO_AMOUNT, 0
+    if not amount.is_finite():
+        raise ValueError(amount)
+    exponent = int(amount.as_tuple().exponent)
+    return int(amount.scaleb(-exponent)), exponent
+
+
+def from_units(coefficient: int, exponent: int) -> Decimal | None:
+    if coefficient == NO_AMOUNT:
+        return None
+    return Decimal(coefficient).scaleb(exponent)
+
+
+class ColumnarRows(Sequence[Row]):
+    """Compact `Rows`: one array per column, `Row`s built on access.
+
+    Dates are kept as day ordinals, amounts as integer coefficients with
+    their decimal exponents (so `Decimal('5')` and `Decimal('5.00')` come
+    back as they were, sub-cent amounts too) and descriptions are interned.
+    """
+
+    def __init__(self, name: str, iterable: 'Iterable[Row]' = ()) -> None:
+        self.name = name
+        self.data_contabile = array('i')
+        self.data_valuta = array('i')
+        self.addebiti = array('q')
+        self.addebiti_exponent = array('b')
+        self.accrediti = array('q')
+        self.accrediti_exponent = array('b')
+        self.descrizione_operazioni: list[str] = []
+        self.extend(iterable)
+
+    def append(self, row: Row) -> None:
+        self.data_contabile.append(row.data_contabile.toordinal())
+        self.data_valuta.append(row.data_valuta.toordinal())
+        coefficient, exponent = to_units(row.addebiti)
+        self.addebiti.append(coefficient)
+        self.addebiti_exponent.append(exponent)
+        coefficient, exponent = to_units(row.accrediti)
+        self.accrediti.append(coefficient)
+        self.accrediti_exponent.append(exponent)
+        self.descrizione_operazioni.append(intern(row.descrizione_operazioni))
+
+    def extend(self, rows: 'Iterable[Row]') -> None:
+        for row in rows:
+            self.append(row)
+
+    @override
+    def __len__(self) -> int:
+        return len(self.data_valuta)
+
+    @overload
+    def __getitem__(self, index: int) -> Row: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> 'ColumnarRows': ...
+
+    @override
+    def __getitem__(self, index: int | slice) -> 'Row | ColumnarRows':
+        if isinstance(index, slice):
+            ret = ColumnarRows(self.name)
+            ret.data_contabile = self.data_contabile[index]
+            ret.data_valuta = self.data_valuta[index]
+            ret.addebiti = self.addebiti[index]
+            ret.addebiti_exponent = self.addebiti_exponent[index]
+            ret.accrediti = self.accrediti[index]
+            ret.accrediti_exponent = self.accrediti_exponent[index]
+            ret.descrizione_operazioni = self.descrizione_operazioni[index]
+            return ret
+        return Row(
+            date.fromordinal(self.data_contabile[index]),
+            date.fromordinal(self.data_valuta[index]),
+            from_units(self.addebiti[index], self.addebiti_exponent[index]),
+            from_units(self.accrediti[index], self.accrediti_exponent[index]),
+            self.descrizione_operazioni[index],
+        )
+
+    @override
+    def __iter__(self) -> 'Iterator[Row]':
+        for dc, dv, ad, ade, ac, ace, do in zip(
+            self.data_contabile,
+            self.data_valuta,
+            self.addebiti,
+            self.addebiti_exponent,
+            self.accrediti,
+            self.accrediti_exponent,
+            self.descrizione_operazioni,
+            strict=True,
+        ):
+            yield Row(
+                date.fromordinal(dc),
+                date.fromordinal(dv),
+                from_units(ad, ade),
+                from_units(ac, ace),
+                do,
+            )
+
+    @override
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Sequence):
+            return NotImplemented
+        return len(self) == len(other) and all(
+            a == b for a, b in zip(self, other, strict=True)
+        )
+
+    __hash__ = None  # type: ignore[assignment]
+
+    @override
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({self.name!r}, {list(self)!r})'
+
+    def rows(self) -> Rows:
+        return Rows(self.name, self)
@@ -1,12 +1,21 @@
+from contextlib import contextmanager
 from dataclasses import fields
 from datetime import UTC
 from datetime import date
 from datetime import datetime
+from datetime import timedelta
 from decimal import Decimal
 from itertools import islice
+from mmap import ACCESS_READ
+from mmap import mmap
+from os import fsync
 from pathlib import Path
+from shutil import copymode
+from tempfile import NamedTemporaryFile
 from typing import TYPE_CHECKING
+from typing import Final
 from typing import TextIO
+from typing import cast
 from typing import overload
 
 from movslib.iterhelper import zip_with_next
@@ -17,6 +26,7 @@ from movslib.model import Rows
 if TYPE_CHECKING:
     from collections.abc import Callable
     from collections.abc import Iterable
+    from collections.abc import Iterator
 
 
 csv_field_indexes = list(zip_with_next((1, 18, 32, 50, 69), None))
@@ -29,6 +39,22 @@ def conv_date(dt: str) -> date | None:
         return None
 
 
+def conv_date_fixed(dt: str) -> date | None:
+    """Like `conv_date`, but fast on the dd/mm/yyyy written by `write_csv`."""
+    day, month, year = dt[:2], dt[3:5], dt[6:]
+    if not (
+        len(dt) == 10  # noqa: PLR2004
+        and dt[2] == dt[5] == '/'
+        and dt.isascii()
+        and f'{day}{month}{year}'.isdigit()
+    ):
+        return conv_date(dt)
+    try:
+        return date(int(year), int(month), int(day))
+    except ValueError:
+        return None
+
+
 def conv_date_inv(d: date) -> str:
     return d.strftime('%d/%m/%Y')
 
@@ -103,25 +129,58 @@ class IsNoneError(ValueError):
         super().__init__(f'{what=}')
 
 
-def read_csv(csv_file: 'Iterable[str]') -> 'Iterable[Row]':
+def read_csv(
+    csv_file: 'Iterable[str]',
+    since: date | None = None,
+    until: date | None = None,
+) -> 'Iterator[Row]':
+    """Parse the rows lazily, keeping those with `since <= date <= until`."""
+    return _read_rows(islice(csv_file, 1, None), since, until)
+
+
+def _read_rows(
+    lines: 'Iterable[str]', since: date | None, until: date | None
+) -> 'Iterator[Row]':
     def conv_cvs_decimal(dec: str) -> Decimal | None:
         if not dec:
             return None
+        # faster than any int based parsing: Decimal(str) is in C
         return Decimal(dec.replace('.', '').replace(',', '.'))
 
-    for row in islice(csv_file, 1, None):
-        els = (row[a:b].rstrip() for a, b in csv_field_indexes)
+    # few distinct dates, repeated on many rows
+    dates: dict[str, date | None] = {}
+
+    def conv(dt: str) -> date | None:
+        try:
+            return dates[dt]
+        except KeyError:
+            ret = dates[dt] = conv_date_fixed(dt)
+            return ret
+
+    (
+        (data_contabile_a, data_contabile_b),
+        (data_valuta_a, data_valuta_b),
+        (addebiti_a, addebiti_b),
+        (accrediti_a, accrediti_b),
+        (descrizione_a, _),
+    ) = csv_field_indexes
+    for row in lines:
+        # check the range before parsing the whole row
+        data_valuta = conv(row[data_valuta_a:data_valuta_b].rstrip())
+        if data_valuta is None:
+            raise IsNoneError(data_valuta)
+        if (since is not None and data_valuta < since) or (
+            until is not None and data_valuta > until
+        ):
+            continue
 
-        data_contabile = conv_date(next(els))
-        data_valuta = conv_date(next(els))
-        addebiti = conv_cvs_decimal(next(els))
-        accrediti = conv_cvs_decimal(next(els))
-        descrizione_operazioni = next(els)
+        data_contabile = conv(row[data_contabile_a:data_contabile_b].rstrip())
+        addebiti = conv_cvs_decimal(row[addebiti_a:addebiti_b].rstrip())
+        accrediti = conv_cvs_decimal(row[accrediti_a:accrediti_b].rstrip())
+        descrizione_operazioni = row[descrizione_a:].rstrip()
 
         if data_contabile is None:
             raise IsNoneError(data_contabile)
-        if data_valuta is None:
-            raise IsNoneError(data_valuta)
 
         yield Row(
             data_contabile,
@@ -132,29 +191,56 @@ def read_csv(csv_file: 'Iterable[str]') -> 'Iterable[Row]':
         )
 
 
-def write_csv(f: TextIO, csv: 'Iterable[Row]') -> None:
-    def conv_csv_decimal_inv(d: Decimal) -> str:
-        return f'{d:,}'.replace(',', '_').replace('.', ',').replace('_', '.')
-
-    f.write(
-        ' Data Contabile'
-        '   Data Valuta'
-        '   Addebiti (euro)'
-        '   Accrediti (euro)'
-        '   Descrizione operazioni\n'
+def _csv_row_format() -> str:
+    """Return the format of a csv line: the columns padded to their width."""
+    return ' ' + ''.join(
+        '{}' if b is None else f'{{:{b - a}}}' for a, b in csv_field_indexes
     )
-    for row in csv:
-        f.write(' ')
-        for (a, b), field in zip(csv_field_indexes, fields(Row), strict=True):
-            value = getattr(row, field.name)
-            row_str = fmt_value(value, conv_csv_decimal_inv)
-            if b is not None:
-                diff = b - a
-                f.write(f'{row_str:{diff}}')
-            else:
-                f.write(row_str)
 
-        f.write('\n')
+
+_CSV_HEADER: Final = (
+    ' Data Contabile'
+    '   Data Valuta'
+    '   Addebiti (euro)'
+    '   Accrediti (euro)'
+    '   Descrizione operazioni\n'
+)
+_CSV_ROW: Final = _csv_row_format() + '\n'
+# italian notation: swap the thousands and the decimal separators
+_CSV_DECIMAL: Final = str.maketrans(',.', '.,')
+_BATCH_ROWS: Final = 4096
+
+
+def write_csv(f: TextIO, csv: 'Iterable[Row]') -> None:
+    """Write the rows, formatted in batches of lines."""
+    row_format = _CSV_ROW.format
+    dates: dict[date, str] = {}
+
+    def conv(d: date) -> str:
+        try:
+            return dates[d]
+        except KeyError:
+            ret = dates[d] = conv_date_inv(d)
+            return ret
+
+    def conv_decimal(d: Decimal | None) -> str:
+        return '' if d is None else f'{d:,}'.translate(_CSV_DECIMAL)
+
+    f.write(_CSV_HEADER)
+    rows = iter(csv)
+    while batch := list(islice(rows, _BATCH_ROWS)):
+        f.write(
+            ''.join(
+                row_format(
+                    conv(row.data_contabile),
+                    conv(row.data_valuta),
+                    conv_decimal(row.addebiti),
+                    conv_decimal(row.accrediti),
+                    row.descrizione_operazioni,
+                )
+                for row in batch
+            )
+        )
 
 
 @overload
@@ -174,7 +260,171 @@ def read_txt(fn: str, name: str | None = None) -> tuple[KV, list[Row] | Rows]:
         return kv, (list(csv) if name is None else Rows(name, csv))
 
 
+@contextmanager
+def open_txt(
+    fn: str, since: date | None = None, until: date | None = None
+) -> 'Iterator[tuple[KV, Iterator[Row]]]':
+    """Stream the rows of a .txt file, one line at a time.
+
+    The rows are parsed on demand (and only when in the [since, until]
+    range): the file is closed on exit, even if not fully consumed.
+    """
+    with Path(fn).open(encoding='UTF-8') as f:
+        kv = read_kv(islice(f, 8))
+        yield kv, read_csv(f, since, until)
+
+
+def _date_key(line: bytes) -> bytes:
+    """Return yyyymmdd of the data contabile of a csv line, to compare."""
+    a, b = csv_field_indexes[0]
+    dd, mm, yyyy = line[a:b].strip().split(b'/')
+    return yyyy + mm + dd
+
+
+def _bisect(
+    buffer: mmap, lo: int, hi: int, pred: 'Callable[[bytes], bool]'
+) -> int:
+    """Return the offset of the first line in [lo, hi) satisfying `pred`.
+
+    `lo` must be the start of a line and `pred` must be monotone (all the
+    lines failing it come first); `hi` if no line satisfies it.
+    """
+    while lo < hi:
+        mid = (lo + hi) // 2
+        start = buffer.rfind(b'\n', lo, mid) + 1 or lo
+        end = buffer.find(b'\n', start, hi)
+        if pred(_date_key(buffer[start : hi if end == -1 else end])):
+            hi = start
+        else:
+            lo = hi if end == -1 else end + 1
+    return lo
+
+
+# the most a data valuta is (expected to be) far from its data contabile
+VALUTA_MARGIN: Final = timedelta(days=31)
+_HEADER_LINES: Final = 9  # kv + csv header
+
+
+class TruncatedHeaderError(ValueError):
+    def __init__(self, fn: str) -> None:
+        super().__init__(f'{fn}: truncated header')
+
+
+def _shift(d: date | None, delta: timedelta) -> date | None:
+    """Return d + delta, or None (no bound) if out of the date range."""
+    try:
+        return None if d is None else d + delta
+    except OverflowError:
+        return None
+
+
+def read_txt_range(
+    fn: str, since: date | None = None, until: date | None = None
+) -> tuple[KV, list[Row]]:
+    """Read just the rows with `since <= date <= until`.
+
+    The file must be sorted by data contabile, descending (as the
+    accumulators are): the rows whose data contabile is in range, widened
+    by `VALUTA_MARGIN`, are found by binary search on the memory mapped
+    file, and only those are read and filtered by date (data valuta).
+
+    The margin is checked, not trusted: if a row of the window, or one of
+    the two just outside it, shows that it does not hold, the whole file is
+    read instead.
+    """
+    kv, lines, _, outside = _read_txt_lines(
+        fn, _shift(since, -VALUTA_MARGIN), _shift(until, VALUTA_MARGIN)
+    )
+    rows = list(_read_rows(lines, None, None))
+    if any(
+        abs(row.data_valuta - row.data_contabile) > VALUTA_MARGIN
+        for row in rows
+    ) or any(_read_rows(outside, since, until)):
+        with open_txt(fn, since, until) as (kv, csv):
+            return kv, list(csv)
+    return kv, [
+        row
+        for row in rows
+        if (since is None or since <= row.date)
+        and (until is None or row.date <= until)
+    ]
+
+
+def read_txt_head(fn: str, since: date | None) -> tuple[KV, list[Row], int]:
+    """Read the (newest) rows with `since <= data contabile`.
+
+    Return also the offset (in bytes) of the first of the remaining rows.
+    """
+    kv, lines, offset, _ = _read_txt_lines(fn, since, None)
+    return kv, list(_read_rows(lines, None, None)), offset
+
+
+def _read_txt_lines(
+    fn: str, since: date | None, until: date | None
+) -> tuple[KV, list[str], int, list[str]]:
+    """Return the csv lines with `since <= data contabile <= until`.
+
+    Return also the offset (in bytes) of the first line after them, and
+    the lines just before and just after them (if any).
+    """
+    with Path(fn).open('rb') as f, mmap(f.fileno(), 0, access=ACCESS_READ) as m:
+        header = 0
+        for _ in range(_HEADER_LINES):
+            header = m.find(b'\n', header)
+            if header == -1:
+                raise TruncatedHeaderError(fn)
+            header += 1
+        kv = read_kv(iter(m[:header].decode('UTF-8').splitlines()))
+
+        lo, hi = header, len(m)
+        if until is not None:
+            until_key = f'{until:%Y%m%d}'.encode()
+            lo = _bisect(m, lo, hi, lambda key: key <= until_key)
+        if since is not None:
+            since_key = f'{since:%Y%m%d}'.encode()
+            hi = _bisect(m, lo, hi, lambda key: key < since_key)
+
+        lines = m[lo:hi].decode('UTF-8').splitlines()
+        before = m[m.rfind(b'\n', header, lo - 1) + 1 or header : lo]
+        after_end = m.find(b'\n', hi)
+        after = m[hi : len(m) if after_end == -1 else after_end]
+        outside = [line.decode('UTF-8') for line in (before, after) if line]
+    return kv, lines, hi, outside
+
+
+@contextmanager
+def atomic_open(fn: str) -> 'Iterator[TextIO]':
+    """Open `fn` for writing, through a temporary file renamed on success.
+
+    Readers see either the old or the new content, never a partial write:
+    on errors `fn` is left untouched. The content is synced to disk before
+    the rename, so not even a crash can leave `fn` truncated.
+    """
+    path = Path(fn)
+    tmp: Path | None = None
+    try:
+        # a unique name: concurrent writers of fn do not clash
+        with NamedTemporaryFile(
+            'w',
+            encoding='UTF-8',
+            dir=path.parent,
+            prefix=f'{path.name}.',
+            suffix='.tmp',
+            delete=False,
+        ) as f:
+            tmp = Path(f.name)
+            yield cast('TextIO', f)  # a wrapper, delegating to it
+            f.flush()
+            fsync(f.fileno())
+        if path.exists():
+            copymode(path, tmp)
+        tmp.replace(path)
+    finally:
+        if tmp is not None:
+            tmp.unlink(missing_ok=True)
+
+
 def write_txt(fn: str, kv: KV, csv: 'Iterable[Row]') -> None:
-    with Path(fn).open('w', encoding='UTF-8') as f:
+    with atomic_open(fn) as f:
         write_kv(f, kv)
         write_csv(f, csv)
@@ -5,17 +5,25 @@ from decimal import Decimal
 from locale import LC_ALL
 from locale import setlocale
 from math import isnan
+from re import compile as re_compile
+from typing import TYPE_CHECKING
 from typing import Final
 from typing import overload
 
 from pandas.core.frame import DataFrame
-from tabula.io import read_pdf
 
-from movslib._java import java
+from movslib._pypdf import AMOUNT
+from movslib._pypdf import read_chunks
+from movslib._tabula import TabulaPdf
+from movslib._tabula import open_pdf
 from movslib.model import KV
 from movslib.model import Row
 from movslib.model import Rows
 
+if TYPE_CHECKING:
+    from movslib._pypdf import Chunk
+    from movslib._pypdf import Engine
+
 
 def conv_date(dt: str) -> date:
     return datetime.strptime(dt, '%d/%m/%Y').replace(tzinfo=UTC).date()
@@ -48,19 +56,50 @@ def conv_decimal(dec: str | float) -> Decimal | None:
 
 OLD_TABLES_LEN: Final = 3
 
-
-def read_kv(fn: str) -> KV:
-    with java():
-        tables = read_pdf(
-            fn,
-            pandas_options={'header': None},
-            pages=1,
-            area=[[0, 400, 100, 600], [140, 120, 170, 210], [170, 0, 200, 600]],
-            silent=True,
-            java_options=['--enable-native-access=ALL-UNNAMED'],
-        )
-    if not isinstance(tables, list):
-        raise TypeError(tables)
+# read_kv areas (top, left, bottom, right)
+_AREA_DATA: Final = (0.0, 400.0, 100.0, 600.0)
+_AREA_NUMERO_INTESTATO: Final = (140.0, 120.0, 170.0, 210.0)
+_AREA_SALDI: Final = (170.0, 0.0, 200.0, 600.0)
+
+# Left edges (in points) of the movements columns, for the pypdf engine.
+# Each edge sits in the gutter before its column: data contabile starts at
+# ~51, data valuta at ~104, the description at ~150; the amounts are right
+# aligned, the addebiti ending at ~500 and the accrediti at ~555.
+_COL_VALUTA: Final = 100.0
+_COL_DESCRIZIONE: Final = 140.0
+_COL_ADDEBITI: Final = 440.0
+_COL_ACCREDITI: Final = 500.0
+# The description lines of a movement are 7pt apart, and center on the line
+# of its dates: 15pt gathers them all without reaching the near movements.
+_ROW_SPAN: Final = 15.0
+
+DATE: Final = re_compile(r'\d{2}/\d{2}/\d{4}')
+# tabula drops the runs of blanks between words: 'DE TULLIO   VITO' is read
+# as 'DE TULLIOVITO', and the pypdf engine must read the same
+_BLANKS: Final = re_compile(' {2,}')
+
+
+def _area(
+    page: 'list[Chunk]', area: tuple[float, float, float, float]
+) -> 'list[Chunk]':
+    top, left, bottom, right = area
+    return [
+        chunk
+        for chunk in page
+        if top <= chunk.top <= bottom and left <= chunk.left <= right
+    ]
+
+
+def read_kv(fn_pdf: 'str | TabulaPdf') -> KV:
+    if isinstance(fn_pdf, str):
+        with open_pdf(fn_pdf) as pdf:
+            return read_kv(pdf)
+
+    tables = fn_pdf.read_pdf(
+        pages=1,
+        area=[[0, 400, 100, 600], [140, 120, 170, 210], [170, 0, 200, 600]],
+        header=False,
+    )
     if len(tables) == OLD_TABLES_LEN:
         data, numero_intestato, saldi = tables
     else:  # new format - missing saldi
@@ -94,11 +133,12 @@ def read_kv(fn: str) -> KV:
     )
 
 
-def read_csv(fn: str) -> list[Row]:
-    with java():
-        tables = read_pdf(fn, pages='all', lattice=True, silent=True)
-    if not isinstance(tables, list):
-        raise TypeError(tables)
+def read_csv(fn_pdf: 'str | TabulaPdf') -> list[Row]:
+    if isinstance(fn_pdf, str):
+        with open_pdf(fn_pdf) as pdf:
+            return read_csv(pdf)
+
+    tables = fn_pdf.read_pdf(pages='all', lattice=True)
     n: Final = 5
     tables = [table for table in tables if len(table.columns) == n]
     tables[0] = tables[0].drop(index=0)
@@ -118,18 +158,86 @@ def read_csv(fn: str) -> list[Row]:
     return ret
 
 
+def read_kv_chunks(pages: 'list[list[Chunk]]') -> KV:
+    """Like `read_kv`, from the text chunks extracted by pypdf."""
+    first = pages[0]
+    (data, *_) = _area(first, _AREA_DATA)
+    tipo, conto_bancoposta = _area(first, _AREA_NUMERO_INTESTATO)
+    saldi = AMOUNT.findall(
+        ''.join(chunk.text for chunk in _area(first, _AREA_SALDI))
+    )
+    saldo_contabile, saldo_disponibile = saldi or ('0', '0')
+    return KV(
+        None,
+        None,
+        '',
+        tipo.text,
+        _BLANKS.sub('', conto_bancoposta.text),
+        conv_kv_date(' '.join(data.text.split()[:3])),
+        conv_decimal(saldo_contabile),
+        conv_decimal(saldo_disponibile),
+    )
+
+
+def read_csv_chunks(pages: 'list[list[Chunk]]') -> list[Row]:
+    """Like `read_csv`, from the text chunks extracted by pypdf."""
+    ret: list[Row] = []
+    for page in pages:
+        anchors = [
+            chunk
+            for chunk in page
+            if chunk.left < _COL_VALUTA and DATE.fullmatch(chunk.text)
+        ]
+        for anchor in anchors:
+            cells = [
+                chunk
+                for chunk in page
+                if abs(chunk.top - anchor.top) < _ROW_SPAN
+                and chunk.left >= _COL_VALUTA
+            ]
+            dv = next(c.text for c in cells if c.left < _COL_DESCRIZIONE)
+            do = ' '.join(
+                c.text
+                for c in cells
+                if _COL_DESCRIZIONE <= c.left < _COL_ADDEBITI
+            )
+            amounts = [c for c in cells if c.left >= _COL_ADDEBITI]
+            ad = [c.text for c in amounts if c.left < _COL_ACCREDITI]
+            ac = [c.text for c in amounts if c.left >= _COL_ACCREDITI]
+            ret.append(
+                Row(
+                    conv_date(anchor.text),
+                    conv_date(dv),
+                    conv_decimal(ad[0]) if ad else None,
+                    conv_decimal(ac[0]) if ac else None,
+                    do,
+                )
+            )
+    return ret
+
+
 @overload
-def read_postepay(fn: str) -> tuple[KV, list[Row]]: ...
+def read_postepay(
+    fn: str, *, engine: 'Engine' = ...
+) -> tuple[KV, list[Row]]: ...
 
 
 @overload
-def read_postepay(fn: str, name: str) -> tuple[KV, Rows]: ...
+def read_postepay(
+    fn: str, name: str, *, engine: 'Engine' = ...
+) -> tuple[KV, Rows]: ...
 
 
 def read_postepay(
-    fn: str, name: str | None = None
+    fn: str, name: str | None = None, *, engine: 'Engine' = 'tabula'
 ) -> tuple[KV, list[Row] | Rows]:
-    kv = read_kv(fn)
-    csv = read_csv(fn)
+    if engine == 'pypdf':
+        pages = read_chunks(fn)
+        kv = read_kv_chunks(pages)
+        csv = read_csv_chunks(pages)
+    else:
+        with open_pdf(fn) as pdf:
+            kv = read_kv(pdf)
+            csv = read_csv(pdf)
 
     return kv, (list(csv) if name is None else Rows(name, csv))
@@ -1,3 +1,4 @@
+from functools import partial
 from pathlib import Path
 from typing import TYPE_CHECKING
 from typing import Final
@@ -5,17 +6,21 @@ from typing import Protocol
 from typing import overload
 
 from movslib.buoni import read_buoni
+from movslib.cache import CACHE
 from movslib.estrattoconto import read_estrattoconto
 from movslib.libretto import read_libretto
 from movslib.listamovimentixlsx import read_lista_movimenti_xlsx
+from movslib.model import ColumnarRows
+from movslib.model import Rows
 from movslib.movs import read_txt
 from movslib.postepay import read_postepay
 from movslib.scansioni import read_scansioni
+from movslib.sidecar import read_txt_sidecar
 
 if TYPE_CHECKING:
+    from movslib._pypdf import Engine
     from movslib.model import KV
     from movslib.model import Row
-    from movslib.model import Rows
 
 
 class Reader(Protocol):
@@ -35,13 +40,17 @@ RULES: Final[dict[str, Reader]] = {
     'ListaMovimenti.pdf': read_postepay,
     'RPOL_Movimenti_Libretto.xlsx': read_libretto,
     'RPOL_PatrimonioBuoni.xlsx': read_buoni,
-    '.txt': read_txt,
+    '.txt': read_txt_sidecar,
     '.pdf': read_estrattoconto,
     '.scan': read_scansioni,
     '.xlsx': read_lista_movimenti_xlsx,
 }
 
 
+# the readers that can choose how to extract the text of a PDF
+_ENGINE_READERS: Final = (read_postepay, read_estrattoconto)
+
+
 class UnsupportedSuffixError(Exception): ...
 
 
@@ -59,14 +68,37 @@ def _get_reader(fn: str) -> Reader:
     raise UnsupportedSuffixError(fn)
 
 
+def _read(fn: str, engine: 'Engine') -> 'tuple[KV, list[Row]]':
+    reader = _get_reader(fn)
+    if reader is read_txt_sidecar:
+        # the sidecar already is a cache, of the .txt
+        return read_txt_sidecar(fn) if CACHE.enabled else read_txt(fn)
+    if reader in _ENGINE_READERS:
+        return CACHE.read(fn, partial(reader, engine=engine))
+    return CACHE.read(fn, reader)
+
+
 @overload
-def read(fn: str) -> 'tuple[KV, list[Row]]': ...
+def read(fn: str, *, engine: 'Engine' = ...) -> 'tuple[KV, list[Row]]': ...
 
 
 @overload
-def read(fn: str, name: str) -> 'tuple[KV, Rows]': ...
+def read(
+    fn: str, name: str, *, engine: 'Engine' = ...
+) -> 'tuple[KV, Rows]': ...
 
 
-def read(fn: str, name: str | None = None) -> 'tuple[KV, list[Row] | Rows]':
-    reader = _get_reader(fn)
-    return reader(fn) if name is None else reader(fn, name)
+def read(
+    fn: str, name: str | None = None, *, engine: 'Engine' = 'tabula'
+) -> 'tuple[KV, list[Row] | Rows]':
+    """Read fn with the reader of its name; engine is used for the PDFs."""
+    kv, csv = _read(fn, engine)
+    return kv, (csv if name is None else Rows(name, csv))
+
+
+def read_columnar(
+    fn: str, name: str, *, engine: 'Engine' = 'tabula'
+) -> 'tuple[KV, ColumnarRows]':
+    """Like `read`, but with the compact, array backed, rows."""
+    kv, csv = _read(fn, engine)
+    return kv, ColumnarRows(name, csv)
@@ -0,0 +1,220 @@
+from array import array
+from datetime import date
+from decimal import Decimal
+from hashlib import sha256
+from io import StringIO
+from logging import getLogger
+from pathlib import Path
+from struct import Struct
+from sys import byteorder
+from tempfile import NamedTemporaryFile
+from typing import TYPE_CHECKING
+from typing import Final
+from typing import overload
+from zlib import crc32
+
+from movslib.cache import CACHE
+from movslib.model import Row
+from movslib.model import Rows
+from movslib.movs import read_kv
+from movslib.movs import read_txt
+from movslib.movs import write_kv
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from movslib.model import KV
+
+logger = getLogger(__name__)
+
+# bump whenever the layout changes, to discard stale sidecars
+VERSION: Final = 1
+SUFFIX: Final = '.bin'
+
+_MAGIC: Final = b'MOVSROWS'
+# magic, version, size and mtime of the .txt, crc32 of the payload, number of
+# records, byte lengths of the kv, amounts and descriptions tables
+_HEADER: Final = Struct('<8sHQqIIIII')
+# data contabile and data valuta (day ordinals), addebiti and accrediti
+# (amounts table indexes, -1 for None), descrizione (descriptions table index)
+_RECORD: Final = Struct('<iiiii')
+_FIELDS: Final = 5
+_SEP: Final = '\n'  # never in a .txt field
+
+
+def sidecar_fn(fn: str) -> str:
+    """Return the path of the sidecar of the .txt `fn`, in the cache."""
+    key = sha256(str(Path(fn).resolve()).encode('UTF-8')).hexdigest()
+    return str(CACHE.directory / f'{key}{SUFFIX}')
+
+
+def dumps(kv: 'KV', csv: 'Iterable[Row]', size: int, mtime_ns: int) -> bytes:
+    """Serialize a .txt file of `size` bytes, last modified at `mtime_ns`.
+
+    The amounts are kept as text, to preserve their exact representation.
+    """
+    amounts: dict[str, int] = {}
+    descrizioni: dict[str, int] = {}
+
+    def amount(d: Decimal | None) -> int:
+        return -1 if d is None else amounts.setdefault(str(d), len(amounts))
+
+    records = b''.join(
+        _RECORD.pack(
+            row.data_contabile.toordinal(),
+            row.data_valuta.toordinal(),
+            amount(row.addebiti),
+            amount(row.accrediti),
+            descrizioni.setdefault(
+                row.descrizione_operazioni, len(descrizioni)
+            ),
+        )
+        for row in csv
+    )
+    f = StringIO()
+    write_kv(f, kv)
+    kv_table = f.getvalue().encode('UTF-8')
+    amounts_table = _SEP.join(amounts).encode('UTF-8')
+    descrizioni_table = _SEP.join(descrizioni).encode('UTF-8')
+
+    payload = b''.join((records, kv_table, amounts_table, descrizioni_table))
+    header = _HEADER.pack(
+        _MAGIC,
+        VERSION,
+        size,
+        mtime_ns,
+        crc32(payload),
+        len(records) // _RECORD.size,
+        len(kv_table),
+        len(amounts_table),
+        len(descrizioni_table),
+    )
+    return header + payload
+
+
+def loads(
+    data: bytes, size: int, mtime_ns: int
+) -> 'tuple[KV, list[Row]] | None':
+    """Deserialize, if still matching the .txt `size` and `mtime_ns`."""
+    if len(data) < _HEADER.size:
+        return None
+    (
+        magic,
+        version,
+        source_size,
+        source_mtime_ns,
+        checksum,
+        records,
+        kv_len,
+        amounts_len,
+        descrizioni_len,
+    ) = _HEADER.unpack_from(data)
+    if (magic, version, source_size, source_mtime_ns) != (
+        _MAGIC,
+        VERSION,
+        size,
+        mtime_ns,
+    ):
+        return None
+
+    payload = memoryview(data)[_HEADER.size :]
+    records_end = records * _RECORD.size
+    kv_end = records_end + kv_len
+    amounts_end = kv_end + amounts_len
+    if (
+        len(payload) != amounts_end + descrizioni_len
+        or crc32(payload) != checksum
+    ):
+        logger.warning('discarding corrupted sidecar')
+        return None
+
+    kv = read_kv(iter(str(payload[records_end:kv_end], 'UTF-8').splitlines()))
+    amounts: list[Decimal | None] = (
+        [
+            Decimal(amount)
+            for amount in str(payload[kv_end:amounts_end], 'UTF-8').split(_SEP)
+        ]
+        if amounts_len
+        else []
+    )
+    amounts.append(None)  # at index -1
+    descrizioni = str(payload[amounts_end:], 'UTF-8').split(_SEP)
+
+    # the records, as consecutive ints: each column is a strided slice
+    columns = array('i')
+    columns.frombytes(payload[:records_end])
+    if byteorder == 'big':
+        columns.byteswap()
+    days = {
+        day: date.fromordinal(day)
+        for day in {*columns[0::_FIELDS], *columns[1::_FIELDS]}
+    }
+    return kv, list(
+        map(
+            Row,
+            map(days.__getitem__, columns[0::_FIELDS]),
+            map(days.__getitem__, columns[1::_FIELDS]),
+            map(amounts.__getitem__, columns[2::_FIELDS]),
+            map(amounts.__getitem__, columns[3::_FIELDS]),
+            map(descrizioni.__getitem__, columns[4::_FIELDS]),
+        )
+    )
+
+
+def _stat(fn: str) -> tuple[int, int]:
+    stat = Path(fn).stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _load(fn: str, stat: tuple[int, int]) -> 'tuple[KV, list[Row]] | None':
+    try:
+        data = Path(sidecar_fn(fn)).read_bytes()
+    except FileNotFoundError:
+        return None
+    return loads(data, *stat)
+
+
+def read_sidecar(fn: str) -> 'tuple[KV, list[Row]] | None':
+    """Load the sidecar of the .txt `fn`, if any and fresh."""
+    return _load(fn, _stat(fn))
+
+
+def write_sidecar(
+    fn: str, kv: 'KV', csv: 'Iterable[Row]', stat: tuple[int, int]
+) -> None:
+    """Write the sidecar of the .txt `fn`, with the `stat` it was read at."""
+    path = Path(sidecar_fn(fn))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with NamedTemporaryFile(
+        dir=path.parent, prefix=path.name, suffix='.tmp', delete=False
+    ) as ntf:
+        ntf.write(dumps(kv, csv, *stat))
+    Path(ntf.name).replace(path)
+
+
+@overload
+def read_txt_sidecar(fn: str) -> 'tuple[KV, list[Row]]': ...
+
+
+@overload
+def read_txt_sidecar(fn: str, name: str) -> 'tuple[KV, Rows]': ...
+
+
+def read_txt_sidecar(
+    fn: str, name: str | None = None
+) -> 'tuple[KV, list[Row] | Rows]':
+    """Like `read_txt`, but through the binary sidecar.
+
+    A missing or stale sidecar is (re)generated.
+    """
+    stat = _stat(fn)
+    loaded = _load(fn, stat)
+    if loaded is None:
+        kv, csv = read_txt(fn)
+        try:
+            write_sidecar(fn, kv, csv, stat)
+        except OSError:  # read only directory, ...: just slower next time
+            logger.warning('cannot write the sidecar of %s', fn)
+    else:
+        kv, csv = loaded
+    return kv, (csv if name is None else Rows(name, csv))
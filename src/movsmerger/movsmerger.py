@@ -1,31 +1,54 @@
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from difflib import SequenceMatcher
+from itertools import groupby
+from itertools import pairwise
 from logging import INFO
 from logging import basicConfig
 from logging import getLogger
+from operator import attrgetter
 from pathlib import Path
 from shlex import join
 from shutil import copy
+from shutil import copyfileobj
 from sys import argv
 from typing import TYPE_CHECKING
+from typing import Final
 from zoneinfo import ZoneInfo
 
+from movslib.cache import cache_args
+from movslib.cents import total
 from movslib.model import KV
 from movslib.model import ZERO
+from movslib.model import ColumnarRows
+from movslib.movs import atomic_open
+from movslib.movs import open_txt
+from movslib.movs import read_txt_head
+from movslib.movs import write_csv
+from movslib.movs import write_kv
 from movslib.movs import write_txt
 from movslib.reader import read
 from movsvalidator.movsvalidator import validate_fn
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable
     from collections.abc import Iterator
+    from collections.abc import Sequence
 
     from movslib.model import Row
 
 logger = getLogger(__name__)
 
+_DATA_CONTABILE: Final = attrgetter('data_contabile')
 
-def _merge_rows_helper(acc: 'list[Row]', new: 'list[Row]') -> 'Iterator[Row]':
+# merge_kw needs the whole history of these
+_FULL_HISTORY_TIPI: Final = frozenset(('buoni postali', 'libretto postale'))
+
+
+def _merge_rows_difflib(
+    acc: 'Sequence[Row]', new: 'Sequence[Row]'
+) -> 'Iterator[Row]':
     sequence_matcher = SequenceMatcher(None, acc, new, autojunk=False)
     for tag, i1, i2, j1, j2 in sequence_matcher.get_opcodes():
         if tag == 'insert':
@@ -48,7 +71,54 @@ def _merge_rows_helper(acc: 'list[Row]', new: 'list[Row]') -> 'Iterator[Row]':
             yield from acc[i:i2]
 
 
-def merge_kw(acc: 'KV', new: 'KV', csv: 'list[Row]') -> 'KV':
+def _is_descending(rows: 'Sequence[Row]') -> bool:
+    return all(a.data_contabile >= b.data_contabile for a, b in pairwise(rows))
+
+
+def _merge_rows_helper(acc: 'list[Row]', new: 'list[Row]') -> 'Iterator[Row]':
+    """Merge two histories, both sorted by data contabile (descending).
+
+    The rows are grouped by data contabile (the data valuta may be some days
+    before, so it is not sorted) and only the groups of the same day are
+    diffed against each other: linear, instead of the (worst case)
+    quadratic diff of the whole histories. Unsorted inputs fall back to the
+    latter.
+    """
+    if not (_is_descending(acc) and _is_descending(new)):
+        yield from _merge_rows_difflib(acc, new)
+        return
+
+    acc_buckets = groupby(acc, key=_DATA_CONTABILE)
+    new_buckets = groupby(new, key=_DATA_CONTABILE)
+    acc_bucket = next(acc_buckets, None)
+    new_bucket = next(new_buckets, None)
+    while acc_bucket is not None and new_bucket is not None:
+        (acc_date, acc_rows), (new_date, new_rows) = acc_bucket, new_bucket
+        if acc_date > new_date:
+            yield from acc_rows
+            acc_bucket = next(acc_buckets, None)
+        elif acc_date < new_date:
+            yield from new_rows
+            new_bucket = next(new_buckets, None)
+        else:
+            acc_list, new_list = list(acc_rows), list(new_rows)
+            if acc_list == new_list:
+                yield from acc_list
+            else:
+                yield from _merge_rows_difflib(acc_list, new_list)
+            acc_bucket = next(acc_buckets, None)
+            new_bucket = next(new_buckets, None)
+    if acc_bucket is not None:
+        yield from acc_bucket[1]
+        for _, rows in acc_buckets:
+            yield from rows
+    if new_bucket is not None:
+        yield from new_bucket[1]
+        for _, rows in new_buckets:
+            yield from rows
+
+
+def merge_kw(acc: 'KV', new: 'KV', csv: 'list[Row] | ColumnarRows') -> 'KV':
     if acc.tipo == 'buoni postali':
         today = datetime.now(tz=ZoneInfo('Europe/Rome')).date()
 
@@ -71,9 +141,7 @@ def merge_kw(acc: 'KV', new: 'KV', csv: 'list[Row]') -> 'KV':
             logger.info('descr: %s, today: %s', descr, today)
 
         # delme
-        for row in csv:
-            saldo_contabile += row.money
-            saldo_disponibile += row.money
+        saldo_contabile = saldo_disponibile = total(csv)
 
         # sintetico
         return KV(
@@ -87,6 +155,7 @@ def merge_kw(acc: 'KV', new: 'KV', csv: 'list[Row]') -> 'KV':
             saldo_disponibile=saldo_disponibile,
         )
     if acc.tipo == 'libretto postale':
+        saldo = total(csv)
         # sintetico
         return KV(
             da=new.da,
@@ -95,8 +164,8 @@ def merge_kw(acc: 'KV', new: 'KV', csv: 'list[Row]') -> 'KV':
             conto_bancoposta=new.conto_bancoposta,
             intestato_a=new.conto_bancoposta,
             saldo_al=new.saldo_al,
-            saldo_contabile=sum((row.money for row in csv), start=ZERO),
-            saldo_disponibile=sum((row.money for row in csv), start=ZERO),
+            saldo_contabile=saldo,
+            saldo_disponibile=saldo,
         )
     return new
 
@@ -105,22 +174,91 @@ def merge_rows(acc: 'list[Row]', new: 'list[Row]') -> 'list[Row]':
     return list(_merge_rows_helper(acc, new))
 
 
-def merge_files(acc_fn: str, *mov_fns: str) -> 'tuple[KV, list[Row]]':
-    kv, csv = read(acc_fn)
-    for mov_fn in mov_fns:
-        mov_kv, mov_csv = read(mov_fn)
+def _merge_all(
+    kv: 'KV', csv: 'list[Row]', movs: 'Iterable[tuple[KV, list[Row]]]'
+) -> 'tuple[KV, list[Row]]':
+    for mov_kv, mov_csv in movs:
         csv = merge_rows(csv, mov_csv)
         kv = merge_kw(kv, mov_kv, csv)
     return kv, csv
 
 
-def copy_to_txt(bin_fn: str) -> str:
-    txt_fn = str(Path(bin_fn).with_suffix('.txt'))
-    kv_orig, csv_orig = merge_files(bin_fn)
+def merge_files(acc_fn: str, *mov_fns: str) -> 'tuple[KV, list[Row]]':
+    kv, csv = read(acc_fn)
+    return _merge_all(kv, csv, map(read, mov_fns))
+
+
+def read_all(fns: 'Iterable[str]') -> 'dict[str, tuple[KV, list[Row]]]':
+    """Read each file exactly once, keeping the order."""
+    return {fn: read(fn) for fn in dict.fromkeys(fns)}
+
+
+def merge_txt(
+    acc_fn: str,
+    *mov_fns: str,
+    parsed: 'dict[str, tuple[KV, list[Row]]] | None' = None,
+) -> None:
+    """Merge `mov_fns` into the .txt accumulator `acc_fn`, in place.
+
+    Only the head of the accumulator overlapping the new movements is parsed,
+    merged and written again: the older rows are copied over verbatim.
+    `parsed` (see `read_all`) spares the reading of `mov_fns`.
+    """
+    if parsed is None:
+        parsed = read_all(mov_fns)
+    movs = [parsed[mov_fn] for mov_fn in mov_fns]
+    with open_txt(acc_fn) as (kv, _):  # just the kv, no row is parsed
+        tipo = kv.tipo
+    if tipo in _FULL_HISTORY_TIPI:
+        kv, csv = _merge_all(*read(acc_fn), movs)
+        write_txt(acc_fn, kv, csv)
+        return
+
+    since = min(
+        (row.data_contabile for _, mov_csv in movs for row in mov_csv),
+        default=None,
+    )
+    kv, csv, offset = read_txt_head(acc_fn, since)
+    kv, csv = _merge_all(kv, csv, movs)
+
+    with atomic_open(acc_fn) as f, Path(acc_fn).open('rb') as acc:
+        write_kv(f, kv)
+        write_csv(f, csv)
+        f.flush()
+        acc.seek(offset)
+        copyfileobj(acc, f.buffer)
+
+
+def _txt_fn(bin_fn: str) -> str:
+    return str(Path(bin_fn).with_suffix('.txt'))
+
+
+def copy_to_txt(
+    bin_fn: str, parsed: 'tuple[KV, list[Row]] | None' = None
+) -> str:
+    txt_fn = _txt_fn(bin_fn)
+    kv_orig, csv_orig = read(bin_fn) if parsed is None else parsed
     write_txt(txt_fn, kv_orig, csv_orig)
     return txt_fn
 
 
+def copy_all_to_txt(
+    parsed: 'dict[str, tuple[KV, list[Row]]]', max_workers: int | None = None
+) -> dict[str, str]:
+    """Write the .txt copy of each parsed (non .txt) file, in a thread pool.
+
+    Return the .txt file names, keyed (and ordered) by the original ones.
+    """
+    bin_fns = [fn for fn in parsed if not fn.endswith('.txt')]
+    with ThreadPoolExecutor(
+        max_workers, thread_name_prefix='movs-merger'
+    ) as executor:
+        txt_fns = executor.map(
+            copy_to_txt, bin_fns, (parsed[bin_fn] for bin_fn in bin_fns)
+        )
+        return dict(zip(bin_fns, txt_fns, strict=True))
+
+
 def _main_txt(accumulator: str, movimentis: list[str]) -> None:
     validate_fn(accumulator, prefix='\tbefore: ')
 
@@ -132,16 +270,17 @@ def _main_txt(accumulator: str, movimentis: list[str]) -> None:
 
     pqtdiff3_suggestion.append(backup_accumulator)
 
-    kv, csv = merge_files(accumulator, *movimentis)
-    write_txt(accumulator, kv, csv)
+    parsed = read_all(movimentis)
+    merge_txt(accumulator, *movimentis, parsed=parsed)
     logger.info('overridden %s', accumulator)
 
     pqtdiff3_suggestion.append(accumulator)
 
+    text_movimentis = copy_all_to_txt(parsed)
     for movimenti in movimentis:
         logger.info('and merged %s', movimenti)
-        if not movimenti.endswith('.txt'):
-            text_movimenti = copy_to_txt(movimenti)
+        if movimenti in text_movimentis:
+            text_movimenti = text_movimentis[movimenti]
             logger.info(' copied as %s', text_movimenti)
 
             pqtdiff3_suggestion.append(text_movimenti)
@@ -155,29 +294,40 @@ def _main_txt(accumulator: str, movimentis: list[str]) -> None:
 
 def _main_binary(binary_accumulator: str, movimentis: list[str]) -> None:
     logger.info('kept %s', binary_accumulator)
-    text_accumulator = copy_to_txt(binary_accumulator)
+    parsed = read_all([binary_accumulator, *movimentis])
+    text_accumulator = copy_to_txt(
+        binary_accumulator, parsed[binary_accumulator]
+    )
     logger.info('backupd at %s', text_accumulator)
 
-    accumulator = str(Path(binary_accumulator).with_suffix('.txt'))
-    kv, csv = merge_files(binary_accumulator, *movimentis)
-    write_txt(accumulator, kv, csv)
-    logger.info('merged at %s', accumulator)
+    kv, csv = _merge_all(
+        *parsed[binary_accumulator],
+        (parsed[movimenti] for movimenti in movimentis),
+    )
+    write_txt(text_accumulator, kv, csv)
+    logger.info('merged at %s', text_accumulator)
 
+    text_movimentis = copy_all_to_txt(
+        {movimenti: parsed[movimenti] for movimenti in movimentis}
+    )
     for movimenti in movimentis:
         logger.info('and merged %s', movimenti)
-        if not movimenti.endswith('.txt'):
-            text_movimenti = copy_to_txt(movimenti)
-            logger.info(' copied as %s', text_movimenti)
+        if movimenti in text_movimentis:
+            logger.info(' copied as %s', text_movimentis[movimenti])
 
 
 def main() -> None:
     basicConfig(level=INFO, format='%(message)s')
 
-    if not argv[1:] or '-h' in argv[1:] or '--help' in argv[1:]:
-        logger.error('uso: %s ACCUMULATOR [MOVIMENTI...]', argv[0])
+    args = cache_args(argv[1:])
+    if not args or '-h' in args or '--help' in args:
+        logger.error(
+            'uso: %s [--no-cache] [--clear-cache] ACCUMULATOR [MOVIMENTI...]',
+            argv[0],
+        )
         raise SystemExit
 
-    accumulator, *movimentis = argv[1:]
+    accumulator, *movimentis = args
 
     if accumulator.endswith('.txt'):
         _main_txt(accumulator, movimentis)
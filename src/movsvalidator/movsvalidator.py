@@ -8,17 +8,22 @@ from pathlib import Path
 from sys import argv
 from typing import TYPE_CHECKING
 
-from movslib.reader import read
+from movslib.cache import cache_args
+from movslib.cents import total
+from movslib.reader import read_columnar
 
 if TYPE_CHECKING:
     from movslib.model import KV
+    from movslib.model import ColumnarRows
     from movslib.model import Rows
 
 logger = getLogger(__name__)
 
 
-def validate_saldo(kv: 'KV', csv: 'Rows', messages: list[str]) -> bool:
-    s = sum(item.money for item in csv)
+def validate_saldo(
+    kv: 'KV', csv: 'Rows | ColumnarRows', messages: list[str]
+) -> bool:
+    s = total(csv)
     d = abs(kv.saldo_contabile - s)
 
     today = datetime.now(tz=UTC).date()
@@ -35,7 +40,7 @@ def validate_saldo(kv: 'KV', csv: 'Rows', messages: list[str]) -> bool:
     return kv.saldo_contabile == s
 
 
-def validate_dates(csv: 'Rows', messages: list[str]) -> bool:
+def validate_dates(csv: 'Rows | ColumnarRows', messages: list[str]) -> bool:
     data_contabile: date | None = None
     for row in csv:
         if data_contabile is not None and data_contabile < row.data_contabile:
@@ -44,13 +49,19 @@ def validate_dates(csv: 'Rows', messages: list[str]) -> bool:
     return True
 
 
-def validate(fn: str, messages: list[str]) -> bool:
-    kv, csv = read(fn, Path(fn).stem)
+def validate_rows(
+    kv: 'KV', csv: 'Rows | ColumnarRows', messages: list[str]
+) -> bool:
     return all(
         [validate_saldo(kv, csv, messages), validate_dates(csv, messages)]
     )
 
 
+def validate(fn: str, messages: list[str]) -> bool:
+    kv, csv = read_columnar(fn, Path(fn).stem)
+    return validate_rows(kv, csv, messages)
+
+
 def validate_fn(fn: str, *, prefix: str = '') -> bool:
     messages: list[str] = []
     ok = validate(fn, messages)
@@ -64,11 +75,14 @@ def validate_fn(fn: str, *, prefix: str = '') -> bool:
 def main() -> None:
     basicConfig(level=INFO, format='%(message)s')
 
-    if not argv[1:]:
-        logger.error('uso: %s ACCUMULATOR...', argv[0])
+    args = cache_args(argv[1:])
+    if not args:
+        logger.error(
+            'uso: %s [--no-cache] [--clear-cache] ACCUMULATOR...', argv[0]
+        )
         raise SystemExit
 
-    for fn in argv[1:]:
+    for fn in args:
         ok = validate_fn(fn)
         if not ok:
             raise SystemExit
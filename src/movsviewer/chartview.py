@@ -5,7 +5,6 @@ from datetime import date
 from datetime import datetime
 from datetime import time
 from decimal import Decimal
-from itertools import accumulate
 from itertools import chain
 from itertools import groupby
 from typing import TYPE_CHECKING
@@ -32,6 +31,7 @@ from PySide6.QtCharts import QLineSeries
 from PySide6.QtCharts import QValueAxis
 from PySide6.QtCore import Qt
 
+from movslib.cents import acc
 from movslib.model import ZERO
 from movslib.reader import read
 
@@ -63,23 +63,18 @@ def to_point(row: 'Row') -> Point:
 def build_series(
     data: 'Sequence[Row]', epoch: date = date(2008, 1, 1)
 ) -> QLineSeries:
-    data = sorted(data, key=lambda row: row.date)
-
     series = QLineSeries()
     series.setName('data')
 
+    totals = acc(data)
+    last = totals[-1][1] if totals else ZERO
     # add start and today
-    moves = chain(
+    summes = chain(
         (Point(epoch, ZERO),),
-        map(to_point, data),
-        (Point(datetime.now(tz=UTC).date(), ZERO),),
+        map(Point._make, totals),
+        (Point(datetime.now(tz=UTC).date(), last),),
     )
 
-    def sumy(a: Point, b: Point) -> Point:
-        return Point(b.data, a.mov + b.mov)
-
-    summes = accumulate(moves, func=sumy)
-
     floats = (
         (datetime.combine(data, time()).timestamp() * 1000, mov)
         for data, mov in summes
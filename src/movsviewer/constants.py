@@ -12,3 +12,4 @@ SETTINGSUI_UI_PATH: Final = _resource('settingsui.ui')
 SETTINGS_USERNAME: Final = 'username'
 SETTINGS_PASSWORD: Final = 'password'  # noqa:S105
 SETTINGS_DATA_PATHS: Final = 'dataPaths'
+SETTINGS_RULES_PATH: Final = 'rulesPath'
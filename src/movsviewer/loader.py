@@ -0,0 +1,99 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from PySide6.QtCore import QObject
+from PySide6.QtCore import Signal
+
+from movslib.reader import read
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+    from movslib.model import KV
+    from movslib.model import Rows
+
+
+class Loader(QObject):
+    """Read data paths in a worker pool, reporting back on the GUI thread.
+
+    Every `start` begins a new generation: results of a cancelled (or
+    superseded) generation are silently dropped.
+    """
+
+    loaded = Signal(str, object, object)  # data_path, KV, Rows
+    failed = Signal(str, object)  # data_path, BaseException
+    progress = Signal(int, int)  # done, total
+    finished = Signal()
+
+    # emitted from the worker threads, delivered queued on the GUI thread
+    _done = Signal(int, str, object)  # generation, data_path, Future
+
+    def __init__(
+        self, parent: QObject | None = None, max_workers: int | None = None
+    ) -> None:
+        super().__init__(parent)
+        self._executor = ThreadPoolExecutor(
+            max_workers, thread_name_prefix='movs-loader'
+        )
+        self._futures: list[Future[tuple[KV, Rows]]] = []
+        self._generation = 0
+        self._done_count = 0
+        self._done.connect(self._on_done)
+
+    @property
+    def running(self) -> bool:
+        return bool(self._futures)
+
+    def start(self, data_paths: list[str]) -> None:
+        self.cancel()
+        self._done_count = 0
+        self.progress.emit(0, len(data_paths))
+        if not data_paths:
+            self.finished.emit()
+            return
+
+        self._futures.extend(
+            self._executor.submit(read, data_path, Path(data_path).stem)
+            for data_path in data_paths
+        )
+        # only now: an already completed future calls back synchronously
+        for data_path, future in zip(data_paths, self._futures, strict=True):
+            future.add_done_callback(
+                partial(self._done.emit, self._generation, data_path)
+            )
+
+    def cancel(self) -> None:
+        """Forget the current generation; running reads complete unseen."""
+        self._generation += 1
+        for future in self._futures:
+            future.cancel()
+        self._futures.clear()
+
+    def shutdown(self) -> None:
+        self.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _on_done(
+        self, generation: int, data_path: str, future: 'Future[tuple[KV, Rows]]'
+    ) -> None:
+        if generation != self._generation or future.cancelled():
+            return
+
+        self._done_count += 1
+        self.progress.emit(self._done_count, len(self._futures))
+
+        exception = future.exception()
+        if exception is not None:
+            self.failed.emit(data_path, exception)
+        else:
+            kv, rows = future.result()
+            self.loaded.emit(data_path, kv, rows)
+
+        # a slot above may have cancelled (or restarted) the load
+        if generation == self._generation and self._done_count == len(
+            self._futures
+        ):
+            self._futures.clear()
+            self.finished.emit()
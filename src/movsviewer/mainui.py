@@ -1,3 +1,4 @@
+from contextlib import contextmanager
 from pathlib import Path
 from sys import argv
 from typing import TYPE_CHECKING
@@ -10,6 +11,7 @@ from guilib.chartwidget.viewmodel import (
 from guilib.multitabs.widget import MultiTabs
 from guilib.searchsheet.widget import SearchSheet
 from PySide6.QtCore import QCoreApplication
+from PySide6.QtCore import QFileSystemWatcher
 from PySide6.QtCore import QItemSelection
 from PySide6.QtCore import QItemSelectionModel
 from PySide6.QtCore import Qt
@@ -23,23 +25,36 @@ from PySide6.QtWidgets import QFileDialog
 from PySide6.QtWidgets import QGridLayout
 from PySide6.QtWidgets import QLineEdit
 from PySide6.QtWidgets import QMainWindow
+from PySide6.QtWidgets import QMessageBox
 from PySide6.QtWidgets import QPlainTextEdit
+from PySide6.QtWidgets import QProgressBar
 from PySide6.QtWidgets import QToolButton
 from PySide6.QtWidgets import QWidget
 
+from movslib.autotag.autotag import MATCHER
+from movslib.autotag.autotag import RulesError
+from movslib.autotag.autotag import get_matcher
+from movslib.cache import cache_args
+from movslib.model import Rows
 from movsviewer.constants import MAINUI_UI_PATH
 from movsviewer.constants import SETTINGSUI_UI_PATH
+from movsviewer.loader import Loader
+from movsviewer.merger import merge
 from movsviewer.plotutils import PlotAndSliderWidget
-from movsviewer.plotutils import load_infos
+from movsviewer.plotutils import rows_infos
 from movsviewer.settings import Settings
 from movsviewer.validator import Validator
 from movsviewer.viewmodel import SortFilterViewModel
 
 if TYPE_CHECKING:
     from collections.abc import Callable
+    from collections.abc import Iterator
 
     from PySide6.QtGui import QAction
 
+    from movslib.autotag.autotag import Matcher
+    from movslib.model import KV
+
 
 _DATA_PATHS_SEPARATOR = '; \n'
 
@@ -47,6 +62,7 @@ _DATA_PATHS_SEPARATOR = '; \n'
 class Mainui(QMainWindow):
     actionSettings: 'QAction'  # noqa: N815
     actionUpdate: 'QAction'  # noqa: N815
+    actionCancel: 'QAction'  # noqa: N815
     gridLayout: QGridLayout  # noqa: N815
     centralwidget: QWidget
 
@@ -55,8 +71,10 @@ class Settingsui(QDialog):
     usernameLineEdit: QLineEdit  # noqa: N815
     passwordLineEdit: QLineEdit  # noqa: N815
     dataPaths: QPlainTextEdit  # noqa: N815
+    rulesPath: QLineEdit  # noqa: N815
     buttonBox: QDialogButtonBox  # noqa: N815
     openFileChooser: QToolButton  # noqa: N815
+    openRulesChooser: QToolButton  # noqa: N815
 
 
 def _set_data_paths(data_paths: QPlainTextEdit, file_names: list[str]) -> None:
@@ -70,6 +88,7 @@ def _get_data_paths(data_paths: QPlainTextEdit) -> list[str]:
 def new_settingsui(settings: Settings) -> Settingsui:
     def save_settings() -> None:
         settings.data_paths = _get_data_paths(settingsui.dataPaths)
+        settings.rules_path = settingsui.rulesPath.text()
         settings.username = settingsui.usernameLineEdit.text()
         settings.password = settingsui.passwordLineEdit.text()
 
@@ -79,25 +98,48 @@ def new_settingsui(settings: Settings) -> Settingsui:
         )
         _set_data_paths(settingsui.dataPaths, file_names)
 
+    def open_rules_path() -> None:
+        file_name, _ = QFileDialog.getOpenFileName(
+            settingsui,
+            dir=str(Path(settings.rules_path).parent),
+            filter='Rules (*.toml *.json)',
+        )
+        if file_name:
+            settingsui.rulesPath.setText(file_name)
+
     settingsui = cast('Settingsui', QUiLoader().load(SETTINGSUI_UI_PATH))
     settingsui.usernameLineEdit.setText(settings.username)
     settingsui.passwordLineEdit.setText(settings.password)
     _set_data_paths(settingsui.dataPaths, settings.data_paths)
+    settingsui.rulesPath.setText(settings.rules_path)
 
     settingsui.accepted.connect(save_settings)
     settingsui.openFileChooser.clicked.connect(open_data_paths)
+    settingsui.openRulesChooser.clicked.connect(open_rules_path)
 
     return settingsui
 
 
 class NewMainui:
     sheets_charts: Final[
-        dict[str, tuple[SearchSheet, SortFilterViewModel2, int]]
+        dict[
+            str,
+            tuple[
+                SearchSheet, SortFilterViewModel, SortFilterViewModel2, QWidget
+            ],
+        ]
     ] = {}
 
     settings: Settings
     mainui: Mainui
     multi_tabs: MultiTabs
+    loader: Loader
+    progress_bar: QProgressBar
+    loaded: 'dict[str, tuple[KV, Rows]]'
+    prompts: int
+    merge_pending: bool
+    matcher: 'Matcher'
+    rules_watcher: QFileSystemWatcher
 
     def __call__(self, settings: Settings, settingsui: Settingsui) -> QWidget:
         self.settings = settings
@@ -106,7 +148,29 @@ class NewMainui:
         self.multi_tabs = MultiTabs(self.mainui.centralwidget)
         self.mainui.gridLayout.addWidget(self.multi_tabs, 0, 0, 1, 1)
 
+        self.progress_bar = QProgressBar(self.mainui.statusBar())
+        self.progress_bar.setFormat('%v/%m')
+        self.progress_bar.setVisible(False)
+        self.mainui.statusBar().addPermanentWidget(self.progress_bar)
+
+        self.loaded = {}
+        self.prompts = 0
+        self.merge_pending = False
+        self.loader = Loader(self.mainui)
+        self.loader.loaded.connect(self.file_loaded)
+        self.loader.failed.connect(self.file_failed)
+        self.loader.progress.connect(self.update_progress)
+        self.loader.finished.connect(self.all_loaded)
+        self.mainui.destroyed.connect(self.loader.shutdown)
+
+        self.matcher = MATCHER
+        self.rules_watcher = QFileSystemWatcher(self.mainui)
+        self.rules_watcher.fileChanged.connect(self.rules_changed)
+        self.watch_rules()
+        settingsui.accepted.connect(self.watch_rules)
+
         self.mainui.actionUpdate.triggered.connect(self.update_helper)
+        self.mainui.actionCancel.triggered.connect(self.cancel_update)
         self.mainui.actionSettings.triggered.connect(settingsui.show)
         settingsui.accepted.connect(self.update_helper)
 
@@ -114,10 +178,37 @@ class NewMainui:
 
         return self.mainui
 
+    def watch_rules(self) -> None:
+        """Follow the (maybe changed) rules file, applying it now."""
+        if files := self.rules_watcher.files():
+            self.rules_watcher.removePaths(files)
+        self.rules_changed(self.settings.rules_path)
+
+    def rules_changed(self, rules_path: str) -> None:
+        """Re-tag the loaded rows, without reading any data path."""
+        # editors often replace the file, dropping it from the watcher
+        if rules_path not in self.rules_watcher.files():
+            self.rules_watcher.addPath(rules_path)
+
+        try:
+            matcher = get_matcher(rules_path)
+        except (OSError, RulesError) as e:
+            self.mainui.statusBar().showMessage(f'tag rules not loaded: {e}')
+            return
+        if matcher is self.matcher:
+            return
+
+        self.matcher = matcher
+        retagged = sum(
+            model.retag(matcher)
+            for _, model, _, _ in self.sheets_charts.values()
+        )
+        self.mainui.statusBar().showMessage(f'{retagged} rows tagged again')
+
     def new_search_sheet(
-        self, data_path: str | list[str]
+        self, data_path: str | list[str], data: Rows
     ) -> tuple[SearchSheet, SortFilterViewModel]:
-        model = SortFilterViewModel(data_path)
+        model = SortFilterViewModel(data_path, data, self.matcher)
         sheet = SearchSheet(None)
         sheet.set_model(model)
         selection_model = sheet.selection_model()
@@ -126,33 +217,121 @@ class NewMainui:
         )
         return sheet, model
 
-    def update_helper(self) -> None:
-        if not Validator(self.mainui, self.settings).validate():
-            return
+    def _merged_key(self) -> str:
+        return f'&{"&".join(self.settings.data_paths)}'
 
+    def update_helper(self) -> None:
+        """Start a background refresh; tabs are filled as files arrive."""
         data_paths = self.settings.data_paths[:]
-        for data_path, (sheet, model2, idx) in self.sheets_charts.items():
-            if data_path in data_paths:
-                data_paths.remove(data_path)
-                sheet.reload()
-                model2.update(load_infos((data_path, 'money')))
+
+        keys = {*data_paths, self._merged_key()}
+        for key in list(self.sheets_charts):
+            if key not in keys:
+                self._remove_tab(key)
+
+        # what the tabs show, until replaced by the files read now
+        self.loaded = {
+            data_path: loaded
+            for data_path, loaded in self.loaded.items()
+            if data_path in data_paths
+        }
+        self.merge_pending = False
+        self.mainui.actionCancel.setEnabled(True)
+        self.loader.start(data_paths)
+
+    def cancel_update(self) -> None:
+        self.loader.cancel()
+        self.mainui.actionCancel.setEnabled(False)
+        self.progress_bar.setVisible(False)
+        self.mainui.statusBar().showMessage('update cancelled')
+        # the tabs of the files read so far are updated: so is the merged one
+        self.all_loaded()
+
+    def update_progress(self, done: int, total: int) -> None:
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(done)
+        self.progress_bar.setVisible(done < total)
+
+    @contextmanager
+    def _prompt(self) -> 'Iterator[None]':
+        """Count a message box, while it runs its nested event loop.
+
+        There the other files (and the end of the load) may arrive: the
+        merged tab waits for the last answer.
+        """
+        self.prompts += 1
+        try:
+            yield
+        finally:
+            self.prompts -= 1
+        if self.merge_pending and not self.prompts:
+            self.all_loaded()
+
+    def file_loaded(self, data_path: str, kv: 'KV', rows: Rows) -> None:
+        previous = self.loaded.get(data_path)
+        self.loaded[data_path] = (kv, rows)  # before asking, see _prompt
+        with self._prompt():
+            ok = Validator(self.mainui, self.settings).validate_one(
+                data_path, kv, rows
+            )
+            if ok:
+                self._update_tab(
+                    data_path, data_path, rows, Rows('money', rows)
+                )
             else:
-                self.multi_tabs.remove_double_box(idx)
-                del self.sheets_charts[data_path]
-        for data_path in data_paths:
-            sheet, model = self.new_search_sheet(data_path)
+                if previous is None:
+                    del self.loaded[data_path]
+                else:
+                    self.loaded[data_path] = previous
+                self.cancel_update()
+
+    def file_failed(self, data_path: str, exception: BaseException) -> None:
+        with self._prompt():
+            QMessageBox.warning(
+                self.mainui, f'cannot read {data_path}', str(exception)
+            )
+
+    def all_loaded(self) -> None:
+        self.mainui.actionCancel.setEnabled(False)
+        # wait for the answers, to merge just the files to keep
+        self.merge_pending = bool(self.prompts)
+        if self.merge_pending:
+            return
+
+        data_paths = [
+            data_path
+            for data_path in self.settings.data_paths
+            if data_path in self.loaded
+        ]
+        if not data_paths:
+            self._remove_tab(self._merged_key())
+            return
+        merged = merge(
+            data_paths, (self.loaded[data_path][1] for data_path in data_paths)
+        )
+        self._update_tab(self._merged_key(), data_paths, merged, merged)
+
+    def _update_tab(
+        self, key: str, data_path: str | list[str], rows: Rows, chart_rows: Rows
+    ) -> None:
+        infos = rows_infos(chart_rows) if chart_rows else []
+        if key in self.sheets_charts:
+            _, model, model2, _ = self.sheets_charts[key]
+            model.reload(rows)
+            model2.update(infos)
+        else:
+            sheet, model = self.new_search_sheet(data_path, rows)
             model2 = SortFilterViewModel2()
             plot = PlotAndSliderWidget(model2, None)
-            model2.update(load_infos((data_path, 'money')))
+            model2.update(infos)
             idx = self.multi_tabs.add_double_box(sheet, plot, model.name)
-            self.sheets_charts[data_path] = (sheet, model2, idx)
-        # add merged one
-        sheet, model = self.new_search_sheet(data_paths)
-        model2 = SortFilterViewModel2()
-        plot = PlotAndSliderWidget(model2, None)
-        model2.update(load_infos(data_paths))
-        idx = self.multi_tabs.add_double_box(sheet, plot, model.name)
-        self.sheets_charts['&'.join(data_paths)] = (sheet, model2, idx)
+            page = cast('QWidget', self.multi_tabs.widget(idx))
+            self.sheets_charts[key] = (sheet, model, model2, page)
+
+    def _remove_tab(self, key: str) -> None:
+        if key in self.sheets_charts:
+            *_, page = self.sheets_charts.pop(key)
+            self.multi_tabs.remove_double_box(self.multi_tabs.indexOf(page))
 
     def update_status_bar(
         self, model: SortFilterViewModel, selection_model: QItemSelectionModel
@@ -171,7 +350,7 @@ def main() -> None:
     )
 
     app = QApplication(argv)
-    settings = Settings(argv[1:])
+    settings = Settings(cache_args(argv[1:]))
     settingsui = new_settingsui(settings)
     new_mainui = NewMainui()
     mainui = new_mainui(settings, settingsui)
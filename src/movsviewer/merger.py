@@ -1,16 +1,77 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from heapq import merge as heapq_merge
+from multiprocessing import get_context
 from operator import attrgetter
+from os import cpu_count
 from pathlib import Path
+from typing import TYPE_CHECKING
 
+from movslib.cache import CACHE
 from movslib.model import Rows
 from movslib.reader import read
 
+if TYPE_CHECKING:
+    from collections.abc import Iterable
 
-def read_and_merge(data_paths: list[str]) -> 'Rows':
+    from movslib.model import KV
+    from movslib.model import Row
+
+
+_KEY = attrgetter('date')
+
+
+def read_all(data_paths: list[str]) -> 'dict[str, tuple[KV, Rows]]':
+    """Read each data path exactly once, keeping the settings order."""
+    return {
+        data_path: read(data_path, Path(data_path).stem)
+        for data_path in data_paths
+    }
+
+
+def merge(data_paths: list[str], rowss: 'Iterable[Iterable[Row]]') -> 'Rows':
+    """K-way merge of the (per file) runs, most recent first.
+
+    Same order as a stable sort of the concatenation: on equal dates the
+    rows of the earlier run come first.
+    """
     name = '&'.join(Path(data_path).stem for data_path in data_paths)
 
-    data = Rows(name, [])
-    for data_path in data_paths:
-        data.extend(read(data_path)[1])
-    data.sort(key=attrgetter('date'), reverse=True)
+    # readers are (almost always) already sorted: this is linear
+    runs = [sorted(rows, key=_KEY, reverse=True) for rows in rowss]
+    return Rows(name, heapq_merge(*runs, key=_KEY, reverse=True))
+
+
+def _init_worker(*, cache_enabled: bool) -> None:
+    # spawned workers import movslib.cache again: --no-cache is lost
+    CACHE.enabled = cache_enabled
+
+
+def _read_rows(data_path: str) -> 'list[Row]':
+    return read(data_path)[1]
+
+
+def read_and_merge(
+    data_paths: list[str], max_workers: int | None = None
+) -> 'Rows':
+    """Read `data_paths` in a process pool, then merge them.
+
+    `max_workers=1` (or a single data path) reads in-process; `None` uses
+    one worker per data path, up to the number of CPUs. The result does not
+    depend on completion order.
+
+    The viewer loads through `Loader`: this is just for the reloads of
+    `SortFilterViewModel` without data and `load_infos`.
+    """
+    workers = min(len(data_paths), max_workers or cpu_count() or 1)
+    if workers <= 1:
+        return merge(data_paths, map(_read_rows, data_paths))
 
-    return data
+    # spawn: forking a process that hosts Qt / JVM threads is unsafe; each
+    # worker starts its own JVM, so they are not more than the CPUs
+    with ProcessPoolExecutor(
+        workers,
+        mp_context=get_context('spawn'),
+        initializer=partial(_init_worker, cache_enabled=CACHE.enabled),
+    ) as executor:
+        return merge(data_paths, executor.map(_read_rows, data_paths))
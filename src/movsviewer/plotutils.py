@@ -2,7 +2,6 @@ from collections import defaultdict
 from datetime import date
 from datetime import timedelta
 from decimal import Decimal
-from itertools import accumulate
 from operator import attrgetter
 from typing import TYPE_CHECKING
 
@@ -17,7 +16,8 @@ from guilib.qwtplot.plot import Plot
 from PySide6.QtWidgets import QGridLayout
 from PySide6.QtWidgets import QWidget
 
-from movslib.reader import read
+from movslib.cents import acc
+from movslib.reader import read_columnar
 from movsviewer.merger import read_and_merge
 
 if TYPE_CHECKING:
@@ -25,36 +25,22 @@ if TYPE_CHECKING:
 
     from guilib.chartwidget.viewmodel import SortFilterViewModel
 
-    from movslib.model import Row
+    from movslib.model import ColumnarRows
     from movslib.model import Rows
 
 
-def _acc_reset_by_year(rows: 'Rows') -> 'Iterable[tuple[date, Decimal]]':
-    if not rows:
-        return []
-
-    def func(a: tuple[date, 'Decimal'], b: 'Row') -> tuple[date, 'Decimal']:
-        if b.date.year != a[0].year:
-            return b.date, b.money
-
-        return b.date, a[1] + b.money
-
-    it = iter(sorted(rows, key=attrgetter('date')))
-    head = next(it)
-    return accumulate(it, func, initial=(head.date, head.money))
+def _acc_reset_by_year(
+    rows: 'Rows | ColumnarRows',
+) -> 'Iterable[tuple[date, Decimal]]':
+    return acc(rows, 'Y')
 
 
-def _acc(rows: 'Rows') -> 'Iterable[tuple[date, Decimal]]':
-    def func(a: tuple[date, 'Decimal'], b: 'Row') -> tuple[date, 'Decimal']:
-        return b.date, a[1] + b.money
-
-    it = iter(sorted(rows, key=attrgetter('date')))
-    head = next(it)
-    return accumulate(it, func, initial=(head.date, head.money))
+def _acc(rows: 'Rows | ColumnarRows') -> 'Iterable[tuple[date, Decimal]]':
+    return acc(rows)
 
 
 def _acc_multi_years(
-    rows: 'Rows',
+    rows: 'Rows | ColumnarRows',
 ) -> 'Iterable[tuple[int, Iterable[tuple[date, Decimal]]]]':
     """Yield (year, acc in that year)."""
     if not rows:
@@ -77,20 +63,13 @@ def _acc_multi_years(
         yield previous_year, previous_year_acc
 
 
-def load_infos(
-    *fn_names: tuple[str, str] | list[str],
+def rows_infos(
+    *rowss: 'Rows | ColumnarRows',
     by_year: bool = False,
     multi_years: bool = False,
 ) -> list[InfoProto]:
     tmp = defaultdict[date, list[ColumnProto]](list)
-    for fn_name in fn_names:
-        if isinstance(fn_name, list):
-            data_paths = fn_name
-            rows = read_and_merge(data_paths)
-        else:
-            fn, name = fn_name
-            _, rows = read(fn, name)
-
+    for rows in rowss:
         ch = ColumnHeader(rows.name, '€')
         for d, m in _acc(rows):
             tmp[d].append(Column(ch, m))
@@ -117,6 +96,23 @@ def load_infos(
     return ret
 
 
+def load_infos(
+    *fn_names: tuple[str, str] | list[str],
+    by_year: bool = False,
+    multi_years: bool = False,
+) -> list[InfoProto]:
+    rowss: list[Rows | ColumnarRows] = []
+    for fn_name in fn_names:
+        if isinstance(fn_name, list):
+            data_paths = fn_name
+            rowss.append(read_and_merge(data_paths))
+        else:
+            fn, name = fn_name
+            rowss.append(read_columnar(fn, name)[1])
+
+    return rows_infos(*rowss, by_year=by_year, multi_years=multi_years)
+
+
 class PlotAndSliderWidget(QWidget):
     """Composition of a Plot and a pair of (Chart)Sliders."""
 
@@ -0,0 +1,77 @@
+from collections import defaultdict
+from typing import TYPE_CHECKING
+from typing import Final
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+_N: Final = 3
+_EMPTY: Final[list[int]] = []
+
+
+def _ngrams(text: str) -> set[str]:
+    return {text[i : i + _N] for i in range(len(text) - _N + 1)}
+
+
+class SearchIndex:
+    """Case insensitive substring search, over a growing set of texts.
+
+    Each distinct text is indexed once, by its words and its trigrams: a
+    search intersects the texts of the whole words (the ones between two
+    spaces) and of the trigrams of the pattern, and checks just those.
+    """
+
+    def __init__(self, texts: 'Iterable[str]' = ()) -> None:
+        self._ids: dict[str, int] = {}
+        self._texts: list[str] = []
+        self._folded: list[str] = []
+        self._words: dict[str, list[int]] = defaultdict(list)
+        self._trigrams: dict[str, list[int]] = defaultdict(list)
+        self.update(texts)
+
+    def update(self, texts: 'Iterable[str]') -> None:
+        """Index the texts not seen yet."""
+        for text in texts:
+            if text in self._ids:
+                continue
+            id_ = self._ids[text] = len(self._texts)
+            folded = text.casefold()
+            self._texts.append(text)
+            self._folded.append(folded)
+            for word in set(folded.split(' ')):
+                self._words[word].append(id_)
+            for trigram in _ngrams(folded):
+                self._trigrams[trigram].append(id_)
+
+    def __contains__(self, text: object) -> bool:
+        return text in self._ids
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def search(self, pattern: str) -> set[str]:
+        """Return the texts containing `pattern`, ignoring the case."""
+        folded = pattern.casefold()
+        words = folded.split(' ')[1:-1]  # the first and last may be partial
+        postings = [self._words.get(word, _EMPTY) for word in words if word]
+        postings.extend(
+            self._trigrams.get(trigram, _EMPTY) for trigram in _ngrams(folded)
+        )
+        if not postings:  # too short: check them all
+            return {
+                text
+                for text, f in zip(self._texts, self._folded, strict=True)
+                if folded in f
+            }
+
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            if not candidates:
+                break
+            candidates.intersection_update(posting)
+        return {
+            self._texts[id_]
+            for id_ in candidates
+            if folded in self._folded[id_]
+        }
@@ -2,8 +2,10 @@ from typing import cast
 
 from PySide6.QtCore import QSettings
 
+from movslib.autotag.autotag import RULES_PATH
 from movsviewer.constants import SETTINGS_DATA_PATHS
 from movsviewer.constants import SETTINGS_PASSWORD
+from movsviewer.constants import SETTINGS_RULES_PATH
 from movsviewer.constants import SETTINGS_USERNAME
 
 
@@ -49,3 +51,13 @@ class Settings:
     @data_paths.setter
     def data_paths(self, data_paths: list[str]) -> None:
         self.settings.setValue(SETTINGS_DATA_PATHS, data_paths)
+
+    @property
+    def rules_path(self) -> str:
+        """The autotag rules file: the bundled one, if not set."""
+        value = self.settings.value(SETTINGS_RULES_PATH)
+        return cast('str', value) if value else str(RULES_PATH)
+
+    @rules_path.setter
+    def rules_path(self, rules_path: str) -> None:
+        self.settings.setValue(SETTINGS_RULES_PATH, rules_path)
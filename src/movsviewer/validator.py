@@ -4,8 +4,11 @@ from PySide6.QtWidgets import QMessageBox
 from PySide6.QtWidgets import QWidget
 
 from movsvalidator.movsvalidator import validate
+from movsvalidator.movsvalidator import validate_rows
 
 if TYPE_CHECKING:
+    from movslib.model import KV
+    from movslib.model import Rows
     from movsviewer.settings import Settings
 
 
@@ -18,12 +21,20 @@ class Validator:
         for fn in self.settings.data_paths:
             messages: list[str] = []
             if not validate(fn, messages):
-                button = QMessageBox.warning(
-                    self.parent,
-                    f'{fn} seems has some problems!',
-                    '\n'.join(messages),
-                    QMessageBox.StandardButton.Yes
-                    | QMessageBox.StandardButton.No,
-                )
-                return button is QMessageBox.StandardButton.Yes
+                return self._ask(fn, messages)
         return True
+
+    def validate_one(self, fn: str, kv: 'KV', csv: 'Rows') -> bool:
+        messages: list[str] = []
+        if not validate_rows(kv, csv, messages):
+            return self._ask(fn, messages)
+        return True
+
+    def _ask(self, fn: str, messages: list[str]) -> bool:
+        button = QMessageBox.warning(
+            self.parent,
+            f'{fn} seems has some problems!',
+            '\n'.join(messages),
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+        )
+        return button is QMessageBox.StandardButton.Yes
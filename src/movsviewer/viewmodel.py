@@ -1,9 +1,14 @@
 from dataclasses import fields
+from dataclasses import replace
 from datetime import date
 from decimal import Decimal
+from difflib import SequenceMatcher
+from functools import cache
+from operator import attrgetter
 from operator import iadd
 from operator import isub
 from typing import TYPE_CHECKING
+from typing import Final
 from typing import Self
 from typing import cast
 from typing import override
@@ -15,21 +20,30 @@ from PySide6.QtCore import QModelIndex
 from PySide6.QtCore import QObject
 from PySide6.QtCore import QPersistentModelIndex
 from PySide6.QtCore import Qt
+from PySide6.QtCore import QTimer
 from PySide6.QtGui import QBrush
 from PySide6.QtGui import QColor
 
+from movslib.autotag.autotag import MATCHER
 from movslib.autotag.autotag import autotag
 from movslib.autotag.model import TagRow
 from movslib.autotag.model import TagRows
 from movslib.autotag.model import Tags
 from movslib.model import ZERO
 from movsviewer.merger import read_and_merge
+from movsviewer.searchindex import SearchIndex
 
 if TYPE_CHECKING:
     from collections.abc import Callable
+    from collections.abc import Iterable
+    from collections.abc import Iterator
+    from collections.abc import Sequence
 
     from PySide6.QtWidgets import QStatusBar
 
+    from movslib.autotag.autotag import Matcher
+    from movslib.model import Rows
+
 
 FIELD_NAMES = [field.name for field in fields(TagRow)]
 
@@ -44,6 +58,98 @@ def _abs(row: TagRow) -> Decimal:
     return ZERO
 
 
+def _display(e: T_FIELDS) -> str:
+    if isinstance(e, set):
+        return ', '.join(tag.value for tag in e) if e else '(/)'
+    return str(e)
+
+
+_HUES: Final = 121  # red=0 .. green=120
+
+
+def _hue(val: Decimal, min_: Decimal, max_: Decimal) -> int:
+    perc = (val - min_) / (max_ - min_) if max_ != min_ else Decimal('0.5')
+    return int(perc * (_HUES - 1))
+
+
+@cache
+def _palette() -> tuple[QBrush, ...]:
+    saturation = 223  # 0..255
+    lightness = 159  # 0..255
+    return tuple(
+        QBrush(QColor.fromHsl(hue, saturation, lightness))
+        for hue in range(_HUES)
+    )
+
+
+_FIELDS_KEY: Final = attrgetter(
+    *(field_name for field_name in FIELD_NAMES if field_name != 'tags')
+)
+
+
+def _key(row: TagRow) -> tuple[object, ...]:
+    return (*_FIELDS_KEY(row), frozenset(row.tags))
+
+
+def _common(old: TagRows, new: TagRows) -> tuple[int, int]:
+    """Return the lengths of the common prefix and suffix."""
+    n = min(len(old), len(new))
+    prefix = 0
+    while prefix < n and (
+        old[prefix] is new[prefix] or old[prefix] == new[prefix]
+    ):
+        prefix += 1
+    suffix = 0
+    while suffix < n - prefix and (
+        old[-1 - suffix] is new[-1 - suffix]
+        or old[-1 - suffix] == new[-1 - suffix]
+    ):
+        suffix += 1
+    return prefix, suffix
+
+
+_SortKey = int | Decimal | str
+
+
+def _sort_key(e: T_FIELDS) -> _SortKey:
+    if e is None:
+        return ZERO
+    if isinstance(e, set):
+        return ', '.join(sorted(e))
+    if isinstance(e, date):
+        return e.toordinal()
+    return e
+
+
+def _inverse(order: list[int]) -> list[int]:
+    """Return where each row of `order` is."""
+    ret = [0] * len(order)
+    for row, i in enumerate(order):
+        ret[i] = row
+    return ret
+
+
+def _runs(rows: 'Iterable[int]') -> 'Iterator[tuple[int, int]]':
+    """Group increasing rows in runs of consecutive ones: (first, last)."""
+    first = last = -2
+    for row in rows:
+        if row != last + 1:
+            if first >= 0:
+                yield first, last
+            first = row
+        last = row
+    if first >= 0:
+        yield first, last
+
+
+# wait for the typing to pause, before filtering
+FILTER_DELAY_MS: Final = 200
+# the characters making a filter a wildcard, rather than a plain text
+_WILDCARDS: Final = frozenset('*?[]\\')
+
+# beyond, diffing costs more than a reset
+_DIFF_MAX_ROWS: Final = 2_000
+
 T_INDEX = QModelIndex | QPersistentModelIndex
 
 
@@ -51,19 +157,87 @@ _INDEX = QModelIndex()
 
 
 class ViewModel(QAbstractTableModel):
+    """The rows, as loaded, shown through a permutation (sorted) of them."""
+
     def __init__(self, data: TagRows, parent: QObject | None = None) -> None:
         super().__init__(parent)
+        # the sort columns, the most significant first
+        self._sorting: list[tuple[int, Qt.SortOrder]] = []
         self._set_data(data)
 
     def _set_data(self, data: TagRows) -> None:
         self._data = data
-        abs_data = sorted([_abs(row) for row in data])
-        self._min = abs_data[0] if abs_data else ZERO
-        self._max = abs_data[-1] if abs_data else ZERO
+        abs_data = [_abs(row) for row in data]
+        self._min = min(abs_data, default=ZERO)
+        self._max = max(abs_data, default=ZERO)
+        # what data() returns, computed once: by column and row
+        self._display = [
+            [_display(getattr(row, field_name)) for row in data]
+            for field_name in FIELD_NAMES
+        ]
+        self._hues = bytearray(
+            _hue(val, self._min, self._max) for val in abs_data
+        )
+        # by column, computed at the first sort by it
+        self._keys: dict[int, list[_SortKey]] = {}
+        # the index in _data of each row shown
+        self._order = self._sorted()
+
+    def _sort_keys(self, column: int) -> list[_SortKey]:
+        try:
+            return self._keys[column]
+        except KeyError:
+            field_name = FIELD_NAMES[column]
+            keys = self._keys[column] = [
+                _sort_key(getattr(row, field_name)) for row in self._data
+            ]
+            return keys
+
+    def _sorted(self) -> list[int]:
+        order = list(range(len(self._data)))
+        # stable sorts, from the least significant column
+        for column, sort_order in reversed(self._sorting):
+            order.sort(
+                key=self._sort_keys(column).__getitem__,
+                reverse=sort_order == Qt.SortOrder.DescendingOrder,
+            )
+        return order
+
+    def _set_order(self, order: list[int]) -> None:
+        """Show the rows in a new order, moving the persistent indexes."""
+        self.layoutAboutToBeChanged.emit()
+        try:
+            rows = _inverse(order)
+            old = self.persistentIndexList()
+            self.changePersistentIndexList(
+                old,
+                [
+                    self.index(rows[self._order[index.row()]], index.column())
+                    for index in old
+                ],
+            )
+            self._order = order
+        finally:
+            self.layoutChanged.emit()
+
+    def _set_range(self, min_: Decimal, max_: Decimal) -> None:
+        """Color the rows again, if the range of the values changed."""
+        if (min_, max_) == (self._min, self._max):
+            return
+        self._min, self._max = min_, max_
+        self._hues = bytearray(
+            _hue(_abs(row), min_, max_) for row in self._data
+        )
+        if self._data:
+            self.dataChanged.emit(
+                self.index(0, 0),
+                self.index(len(self._data) - 1, len(FIELD_NAMES) - 1),
+                [Qt.ItemDataRole.BackgroundRole],
+            )
 
     @override
     def rowCount(self, _parent: T_INDEX = _INDEX) -> int:
-        return len(self._data)
+        return len(self._order)
 
     @override
     def columnCount(self, _parent: T_INDEX = _INDEX) -> int:
@@ -91,74 +265,263 @@ class ViewModel(QAbstractTableModel):
         role: int = Qt.ItemDataRole.DisplayRole,
     ) -> T_FIELDS | QBrush | None:
         column = index.column()
-        row = index.row()
-
-        field_name = FIELD_NAMES[column]
+        i = self._order[index.row()]
 
         if role == Qt.ItemDataRole.DisplayRole:
-            if field_name == 'tags':
-                tags = self._data[row].tags
-                if not tags:
-                    return '(/)'
-                return ', '.join(tag.value for tag in tags)
-            return str(getattr(self._data[row], field_name))
+            return self._display[column][i]
 
         if role == Qt.ItemDataRole.BackgroundRole:
-            max_, min_, val = self._max, self._min, _abs(self._data[row])
-            perc = (
-                (val - min_) / (max_ - min_) if max_ != min_ else Decimal('0.5')
-            )
-
-            hue = int(perc * 120)  # 0..359 ; red=0, green=120
-            saturation = 223  # 0..255
-            lightness = 159  # 0..255
-
-            return QBrush(QColor.fromHsl(hue, saturation, lightness))
+            return _palette()[self._hues[i]]
 
         if role == Qt.ItemDataRole.UserRole:
-            return cast('T_FIELDS', getattr(self._data[row], field_name))
+            return cast('T_FIELDS', getattr(self._data[i], FIELD_NAMES[column]))
 
         return None
 
     @override
     def sort(
-        self, index: int, order: Qt.SortOrder = Qt.SortOrder.AscendingOrder
+        self, column: int, order: Qt.SortOrder = Qt.SortOrder.AscendingOrder
     ) -> None:
-        def key(
-            row: TagRow,
-        ) -> date | Decimal | str | set[Tags]:  # T_FIELDS-None
-            e: T_FIELDS = getattr(row, FIELD_NAMES[index])
-            if e is None:
-                return ZERO
-            return e
-
-        self.layoutAboutToBeChanged.emit()
-        try:
-            self._data.sort(
-                key=key, reverse=order == Qt.SortOrder.DescendingOrder
+        """Sort by `column`, then by the columns sorted by before."""
+        if column < 0:
+            self.sort_by([])
+            return
+        self._sorting = [
+            (column, order),
+            *((c, o) for c, o in self._sorting if c != column),
+        ]
+        # already sorted by the others: a stable sort by column is enough
+        self._set_order(
+            sorted(
+                self._order,
+                key=self._sort_keys(column).__getitem__,
+                reverse=order == Qt.SortOrder.DescendingOrder,
             )
-        finally:
-            self.layoutChanged.emit()
+        )
 
-    def load(self, data: TagRows) -> None:
+    def sort_by(self, sorting: 'Sequence[tuple[int, Qt.SortOrder]]') -> None:
+        """Sort by many columns, the most significant first.
+
+        With no columns, the rows are shown as loaded.
+        """
+        self._sorting = list(sorting)
+        self._set_order(self._sorted())
+
+    @property
+    def sorting(self) -> list[tuple[int, Qt.SortOrder]]:
+        return list(self._sorting)
+
+    def reset(self, data: TagRows) -> None:
+        """Switch to `data`, as a whole new model."""
         self.beginResetModel()
         try:
             self._set_data(data)
         finally:
             self.endResetModel()
 
+    def load(self, data: TagRows) -> None:
+        """Switch to `data`, inserting and removing just the changed rows.
+
+        The selection and the scroll position of the views are kept; when
+        (almost) everything changed, the model is just reset.
+        """
+        old = self._data
+        if data is old:  # maybe changed in place: no way to tell how
+            self.reset(data)
+            return
+
+        prefix, suffix = _common(old, data)
+        old_middle = old[prefix : len(old) - suffix]
+        new_middle = data[prefix : len(data) - suffix]
+        if len(old_middle) + len(new_middle) > _DIFF_MAX_ROWS:
+            self.reset(data)
+            return
+
+        old.name = data.name
+        opcodes = SequenceMatcher(
+            None,
+            [_key(row) for row in old_middle],
+            [_key(row) for row in new_middle],
+            autojunk=False,
+        ).get_opcodes()
+        # backwards, so that the old positions stay valid
+        for tag, i1, i2, j1, j2 in reversed(opcodes):
+            if tag in {'replace', 'delete'}:
+                self.remove_rows(prefix + i1, i2 - i1)
+            if tag in {'replace', 'insert'}:
+                self.insert_rows(prefix + i1, new_middle[j1:j2])
+
+    def insert_rows(self, position: int, rows: 'Sequence[TagRow]') -> None:
+        """Insert `rows` before the one at `position`, as loaded.
+
+        They are shown where the sort puts them.
+        """
+        if not rows:
+            return
+        abs_rows = [_abs(row) for row in rows]
+        min_, max_ = min(abs_rows), max(abs_rows)
+        if self._data:
+            min_, max_ = min(min_, self._min), max(max_, self._max)
+
+        end = position + len(rows)
+        self._order = [
+            i + len(rows) if i >= position else i for i in self._order
+        ]
+        self._data[position:position] = rows
+        for display, field_name in zip(self._display, FIELD_NAMES, strict=True):
+            display[position:position] = [
+                _display(getattr(row, field_name)) for row in rows
+            ]
+        self._hues[position:position] = bytes(
+            _hue(val, min_, max_) for val in abs_rows
+        )
+        for column, keys in self._keys.items():
+            field_name = FIELD_NAMES[column]
+            keys[position:position] = [
+                _sort_key(getattr(row, field_name)) for row in rows
+            ]
+
+        # the others keep their relative order: show the new ones in runs
+        if self._sorting:
+            order = self._sorted()
+            runs = list(
+                _runs(row for row, i in enumerate(order) if position <= i < end)
+            )
+        else:
+            order = list(range(len(self._data)))
+            runs = [(position, end - 1)]
+        for first, last in runs:
+            self.beginInsertRows(_INDEX, first, last)
+            try:
+                self._order[first:first] = order[first : last + 1]
+            finally:
+                self.endInsertRows()
+        self._set_range(min_, max_)
+
+    def remove_rows(self, position: int, count: int) -> None:
+        """Remove `count` rows, from the one at `position`, as loaded."""
+        if count <= 0:
+            return
+        end = position + count
+        removed = self._data[position:end]
+
+        for first, last in reversed(
+            list(
+                _runs(
+                    row
+                    for row, i in enumerate(self._order)
+                    if position <= i < end
+                )
+            )
+        ):
+            self.beginRemoveRows(_INDEX, first, last)
+            try:
+                del self._order[first : last + 1]
+            finally:
+                self.endRemoveRows()
+        self._order = [i - count if i >= end else i for i in self._order]
+        del self._data[position:end]
+        for display in self._display:
+            del display[position:end]
+        del self._hues[position:end]
+        for keys in self._keys.values():
+            del keys[position:end]
+
+        # only if an extreme value is gone the range has to be searched
+        extremes = (self._min, self._max)
+        if any(_abs(row) in extremes for row in removed):
+            abs_data = [_abs(row) for row in self._data]
+            self._set_range(
+                min(abs_data, default=ZERO), max(abs_data, default=ZERO)
+            )
+
+    def retag(self, old: 'Matcher', new: 'Matcher') -> int:
+        """Switch the tags from the `old` rules to the `new` ones.
+
+        Only the rows some changed rule applies to are tagged again: return
+        how many of them changed.
+        """
+        changed = old.changed(new)
+        if not changed.rules:
+            return 0
+
+        column = FIELD_NAMES.index('tags')
+        changed_rows: list[int] = []
+        for i, row in enumerate(self._data):
+            accrediti = row.accrediti is not None
+            if not changed.tags(
+                row.descrizione_operazioni, accrediti=accrediti
+            ):
+                continue
+            tags = new.tags(row.descrizione_operazioni, accrediti=accrediti)
+            if tags != row.tags:
+                self._data[i] = replace(row, tags=tags)
+                self._display[column][i] = _display(tags)
+                changed_rows.append(i)
+        if not changed_rows:
+            return 0
+
+        self._keys.pop(column, None)
+        rows = _inverse(self._order)
+        shown = [rows[i] for i in changed_rows]
+        self.dataChanged.emit(
+            self.index(min(shown), column), self.index(max(shown), column)
+        )
+        if any(c == column for c, _ in self._sorting):
+            self._set_order(self._sorted())
+        return len(changed_rows)
+
+    def row(self, row: int) -> TagRow:
+        """Return the row shown at `row`."""
+        return self._data[self._order[row]]
+
+    def texts(self, column: int) -> set[str]:
+        """Return the distinct texts shown in `column`."""
+        return set(self._display[column])
+
+    def display(self, row: int, column: int) -> str:
+        """Return the text shown at `row` and `column`."""
+        return self._display[column][self._order[row]]
+
+    @property
+    def rows(self) -> TagRows:
+        """The rows, as loaded."""
+        return self._data
+
     @property
     def name(self) -> str:
         return self._data.name
 
 
 class SortFilterViewModel(SearchableModel):
-    def __init__(self, data_path: str | list[str]) -> None:
+    def __init__(
+        self,
+        data_path: str | list[str],
+        data: 'Rows | None' = None,
+        matcher: 'Matcher' = MATCHER,
+        filter_delay_ms: int = FILTER_DELAY_MS,
+    ) -> None:
         super().__init__(ViewModel(TagRows('')))
         self.data_paths = (
             data_path if isinstance(data_path, list) else [data_path]
         )
-        self.reload()
+        self.matcher = matcher
+        self._index = SearchIndex()
+        self._filter_text = ''
+        self._filter_stale = True
+        self._accepts: Callable[[int], bool] | None = None
+        # the new rows are filtered as soon as inserted
+        self.sourceModel().rowsAboutToBeInserted.connect(
+            self._invalidate_indexed_filter
+        )
+        self.sourceModel().modelAboutToBeReset.connect(
+            self._invalidate_indexed_filter
+        )
+        self._filter_timer = QTimer(self)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.setInterval(filter_delay_ms)
+        self._filter_timer.timeout.connect(self._apply_filter)
+        self.reload(data)
 
     @override
     def sourceModel(self) -> ViewModel:
@@ -170,6 +533,83 @@ class SortFilterViewModel(SearchableModel):
     ) -> None:
         self.sourceModel().sort(column, order)
 
+    @override
+    def setFilterWildcard(self, pattern: str) -> None:
+        """Filter by `pattern`, once the typing pauses."""
+        self._filter_text = pattern
+        if self._filter_timer.interval() > 0:
+            self._filter_timer.start()
+        else:
+            self._apply_filter()
+
+    def _apply_filter(self) -> None:
+        self._filter_stale = True
+        super().setFilterWildcard(self._filter_text)
+
+    def _invalidate_indexed_filter(self) -> None:
+        self._filter_stale = True
+
+    @override
+    def setFilterKeyColumn(self, column: int) -> None:
+        if column != self.filterKeyColumn():  # else no need to filter again
+            self._filter_stale = True
+            super().setFilterKeyColumn(column)
+
+    @override
+    def filterAcceptsRow(self, source_row: int, source_parent: T_INDEX) -> bool:
+        if self._filter_stale:
+            self._filter_stale = False
+            self._accepts = self._indexed_filter()
+        if self._accepts is None:
+            return super().filterAcceptsRow(source_row, source_parent)
+        return self._accepts(source_row)
+
+    def _indexed_filter(self) -> 'Callable[[int], bool] | None':
+        """Return how to accept a row, or None if the index cannot help.
+
+        Only plain texts (no wildcards) are searched through the index, in
+        every column or in the descriptions only.
+        """
+        column = self.filterKeyColumn()
+        descrizione = FIELD_NAMES.index('descrizione_operazioni')
+        if column < 0:
+            value = self._filter_text
+        elif column == descrizione and ':' in self._filter_text:
+            value = self._filter_text.split(':', 1)[1].strip()
+        else:
+            return None
+        if _WILDCARDS.intersection(value):
+            return None
+        if not value:
+            return lambda _row: True
+
+        model = self.sourceModel()
+        index = self._index
+        folded = value.casefold()
+        matched = index.search(value)
+
+        def matches(row: int) -> bool:
+            text = model.row(row).descrizione_operazioni
+            if text in index:
+                return text in matched
+            return folded in text.casefold()  # being inserted, not indexed
+
+        if column == descrizione:
+            return matches
+        # the other columns have few distinct texts: search them all
+        others = [
+            (c, texts)
+            for c in range(len(FIELD_NAMES))
+            if c != descrizione
+            and (texts := {t for t in model.texts(c) if folded in t.casefold()})
+        ]
+        if not others:
+            return matches
+        return lambda row: (
+            matches(row)
+            or any(model.display(row, c) in texts for c, texts in others)
+        )
+
     def selection_changed(
         self, selection_model: QItemSelectionModel, statusbar: 'QStatusBar'
     ) -> None:
@@ -188,12 +628,23 @@ class SortFilterViewModel(SearchableModel):
 
         statusbar.showMessage(f'⅀ = {bigsum}')
 
-    def reload(self) -> Self:
-        data = read_and_merge(self.data_paths)
-        tagged_data = autotag(data)
+    def reload(self, data: 'Rows | None' = None) -> Self:
+        """Reload from `data`, if given, otherwise from `data_paths`."""
+        if data is None:
+            data = read_and_merge(self.data_paths)
+        tagged_data = autotag(data, self.matcher, self.sourceModel().rows)
         self.sourceModel().load(tagged_data)
+        self._index.update(row.descrizione_operazioni for row in tagged_data)
+        self._filter_stale = True
         return self
 
+    def retag(self, matcher: 'Matcher') -> int:
+        """Apply new tag rules to the loaded rows, without reading them."""
+        self._filter_stale = True  # some tags may be new
+        ret = self.sourceModel().retag(self.matcher, matcher)
+        self.matcher = matcher
+        return ret
+
     @property
     def name(self) -> str:
         return self.sourceModel().name
@@ -0,0 +1,6 @@
+from typing import Any
+
+def isJVMStarted() -> bool: ...
+def addClassPath(path: str) -> None: ...
+def startJVM(*jvmargs: str, convertStrings: bool = False) -> None: ...
+def JClass(jc: str) -> Any: ...  # noqa: ANN401
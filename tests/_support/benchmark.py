@@ -0,0 +1,10 @@
+from os import environ
+from typing import Final
+from unittest import skipUnless
+
+BENCHMARK_ENV: Final = 'MOVS_BENCHMARK'
+
+# wall clock comparisons: slow, and flaky on a busy machine
+benchmark: Final = skipUnless(
+    environ.get(BENCHMARK_ENV), f'set {BENCHMARK_ENV}=1 to run the benchmarks'
+)
@@ -1,6 +1,7 @@
 from contextlib import contextmanager
 from typing import TYPE_CHECKING
 from typing import Final
+from typing import cast
 
 from PySide6.QtCore import QCoreApplication
 from PySide6.QtCore import Qt
@@ -13,8 +14,7 @@ if TYPE_CHECKING:
     from collections.abc import Iterator
 
 
-@contextmanager
-def tmp_app() -> 'Iterator[list[QWidget]]':
+def _setup() -> None:
     QCoreApplication.setAttribute(
         Qt.ApplicationAttribute.AA_ShareOpenGLContexts
     )
@@ -22,6 +22,12 @@ def tmp_app() -> 'Iterator[list[QWidget]]':
         QSGRendererInterface.GraphicsApi.OpenGLRhi  # @UndefinedVariable
     )
 
+
+@contextmanager
+def tmp_app() -> 'Iterator[list[QWidget]]':
+    """Show the widgets, until closed by hand: for the visual tests."""
+    _setup()
+
     app: Final = QApplication([])
     widgets: Final[list[QWidget]] = []
     try:
@@ -31,3 +37,19 @@ def tmp_app() -> 'Iterator[list[QWidget]]':
             widget.show()
         app.exec()
         app.shutdown()
+
+
+@contextmanager
+def headless_app() -> 'Iterator[QApplication]':
+    """Return the QApplication, never executed: for the unattended tests."""
+    app = QApplication.instance()
+    if app is not None:
+        yield cast('QApplication', app)
+        return
+
+    _setup()
+    app = QApplication([])
+    try:
+        yield app
+    finally:
+        app.shutdown()
@@ -1,8 +1,10 @@
 from contextlib import contextmanager
+from pathlib import Path
 from tempfile import NamedTemporaryFile
 from typing import TYPE_CHECKING
 
 from movslib.movs import write_txt
+from movslib.sidecar import sidecar_fn
 
 if TYPE_CHECKING:
     from collections.abc import Iterable
@@ -18,4 +20,7 @@ def tmp_txt(kv: 'KV', csv: 'Iterable[Row]') -> 'Iterator[str]':
         fn = ntf.name
         write_txt(fn, kv, csv)
 
-        yield fn
+        try:
+            yield fn
+        finally:
+            Path(sidecar_fn(fn)).unlink(missing_ok=True)
@@ -0,0 +1,377 @@
+from datetime import date
+from datetime import timedelta
+from decimal import Decimal
+from logging import getLogger
+from os import utime
+from pathlib import Path
+from random import Random
+from tempfile import TemporaryDirectory
+from timeit import repeat
+from typing import Final
+from unittest import TestCase
+
+from _support.benchmark import benchmark
+from movslib.autotag.autotag import MATCHER
+from movslib.autotag.autotag import RULES
+from movslib.autotag.autotag import Matcher
+from movslib.autotag.autotag import Rule
+from movslib.autotag.autotag import RulesError
+from movslib.autotag.autotag import autotag
+from movslib.autotag.autotag import get_matcher
+from movslib.autotag.autotag import load_rules
+from movslib.autotag.model import TagRows
+from movslib.autotag.model import Tags
+from movslib.model import Row
+from movslib.model import Rows
+
+logger = getLogger(__name__)
+
+BENCHMARK_ROWS: Final = 100_000
+
+WORDS: Final = (
+    'PAGAMENTO POS',
+    'BONIFICO',
+    'DEL',
+    '12.03.2024',
+    'CARTA',
+    'MILANO',
+    'VIMERCATE',
+    'SRL',
+    'SPA',
+)
+
+
+def _reference_tags(descrizione: str, *, accrediti: bool) -> set[Tags]:
+    """Evaluate every rule, one by one."""
+    return {
+        tag
+        for rule in RULES
+        if (accrediti or not rule.accrediti)
+        and (
+            descrizione.startswith(rule.patterns[0])
+            if rule.prefix
+            else all(pattern in descrizione for pattern in rule.patterns)
+        )
+        for tag in rule.tags
+    }
+
+
+def _descrizioni(n: int) -> list[str]:
+    """Return random descriptions, about half of them with some pattern."""
+    random = Random(0)  # noqa: S311
+    patterns = sorted({pattern for rule in RULES for pattern in rule.patterns})
+    ret = []
+    for _ in range(n):
+        words = random.choices(WORDS, k=random.randint(3, 12))
+        if random.random() < 0.5:  # noqa: PLR2004
+            words.insert(random.randint(0, len(words)), random.choice(patterns))
+        if random.random() < 0.1:  # noqa: PLR2004
+            words.insert(0, random.choice(patterns))
+        ret.append(' '.join(words))
+    return ret
+
+
+def _recurring(n: int) -> tuple[list[str], Rows]:
+    """Return n rows of a few hundreds descriptions, recurring monthly."""
+    descrizioni = _descrizioni(500) * (n // 500)
+    d = date(2024, 1, 1)
+    return descrizioni, Rows(
+        'rows',
+        [
+            Row(d, d, Decimal(1), None, descrizione)
+            for descrizione in descrizioni
+        ],
+    )
+
+
+def _refresh(n: int) -> tuple[TagRows, Rows]:
+    """Return the tags of n - 100 rows, and the n rows after a new export."""
+    descrizioni = _descrizioni(n)
+    start = date(2000, 1, 1)
+
+    def rows(n: int) -> Rows:
+        return Rows(
+            'rows',
+            [
+                Row(
+                    start + timedelta(days=i // 10),
+                    start + timedelta(days=i // 10),
+                    Decimal(i % 997).scaleb(-2),
+                    None,
+                    descrizioni[i],
+                )
+                for i in range(n)
+            ],
+        )
+
+    return autotag(rows(n - 100)), rows(n)
+
+
+class TestAutotag(TestCase):
+    def test_autotag(self) -> None:
+        d = date(2024, 1, 1)
+        rows = Rows(
+            'rows',
+            [
+                Row(d, d, None, Decimal(1), 'BONIFICO SEPA DA ROSSI'),
+                Row(d, d, Decimal(1), None, 'BONIFICO SEPA PER ROSSI'),
+                Row(d, d, Decimal(1), None, 'CANONE MENSILE'),
+                Row(d, d, Decimal(1), None, 'ADDEBITO CANONE MENSILE'),
+                Row(d, d, Decimal(1), None, 'ADDEBITO FASTWEB SPA'),
+                Row(d, d, Decimal(1), None, 'PAN B SRL VIMERCATE'),
+                Row(d, d, Decimal(1), None, 'PAN B SRL MILANO'),
+                Row(d, d, Decimal(1), None, 'ALTRO'),
+            ],
+        )
+
+        self.assertListEqual(
+            [
+                {Tags.ENTRATE, Tags.BONIFICO},
+                set(),
+                {Tags.COMMISSIONI},
+                set(),
+                {Tags.BOLLETTE, Tags.TELEFONO},
+                {Tags.PRANZO_VIMERCATE},
+                set(),
+                set(),
+            ],
+            [row.tags for row in autotag(rows)],
+        )
+
+    def test_autotag_previous(self) -> None:
+        d = date(2024, 1, 1)
+        old = Row(d, d, Decimal(1), None, 'ESSELUNGA')
+        new = Row(d, d, Decimal(2), None, 'ESSELUNGA')
+        previous = autotag(Rows('previous', [old]))
+
+        actual = autotag(Rows('rows', [new, old]), previous=previous)
+
+        self.assertEqual('rows', actual.name)
+        self.assertListEqual(autotag(Rows('rows', [new, old])), actual)
+        self.assertIsNot(previous[0], actual[0])
+        self.assertIs(previous[0], actual[1])
+
+    def test_matcher(self) -> None:
+        matcher = Matcher(
+            [
+                Rule(('A', 'B'), frozenset({Tags.SPESA})),
+                Rule(('AB',), frozenset({Tags.GAS}), prefix=True),
+                Rule(('C',), frozenset({Tags.LUCE}), accrediti=True),
+            ]
+        )
+
+        self.assertSetEqual({Tags.SPESA}, matcher.tags('B A', accrediti=False))
+        self.assertSetEqual(
+            {Tags.SPESA, Tags.GAS}, matcher.tags('ABC', accrediti=False)
+        )
+        self.assertSetEqual(
+            {Tags.SPESA, Tags.GAS, Tags.LUCE},
+            matcher.tags('ABC', accrediti=True),
+        )
+        self.assertSetEqual({Tags.SPESA}, matcher.tags('CAB', accrediti=False))
+
+    def test_same_as_reference(self) -> None:
+        for descrizione in _descrizioni(10_000):
+            for accrediti in (False, True):
+                self.assertSetEqual(
+                    _reference_tags(descrizione, accrediti=accrediti),
+                    MATCHER.tags(descrizione, accrediti=accrediti),
+                )
+
+    @benchmark
+    def test_benchmark(self) -> None:
+        descrizioni = _descrizioni(BENCHMARK_ROWS)
+
+        def reference() -> None:
+            for descrizione in descrizioni:
+                _reference_tags(descrizione, accrediti=False)
+
+        unmemoized = Matcher(RULES, memo_size=0)
+
+        def matcher() -> None:
+            for descrizione in descrizioni:
+                unmemoized.tags(descrizione, accrediti=False)
+
+        reference_time = min(repeat(reference, number=1, repeat=3))
+        matcher_time = min(repeat(matcher, number=1, repeat=3))
+        logger.info(
+            'autotag of %d rows: reference %.2fus/row, matcher %.2fus/row '
+            '(%.0f rows/s)',
+            BENCHMARK_ROWS,
+            reference_time / BENCHMARK_ROWS * 1e6,
+            matcher_time / BENCHMARK_ROWS * 1e6,
+            BENCHMARK_ROWS / matcher_time,
+        )
+        self.assertLess(matcher_time, reference_time)
+
+    def test_memo(self) -> None:
+        matcher = Matcher(RULES, memo_size=2)
+
+        tags = matcher.tags('BONIFICO SEPA', accrediti=True)
+        tags.clear()  # the memo is not affected
+        self.assertSetEqual(
+            {Tags.ENTRATE, Tags.BONIFICO},
+            matcher.tags('BONIFICO SEPA', accrediti=True),
+        )
+        self.assertSetEqual(
+            set(), matcher.tags('BONIFICO SEPA', accrediti=False)
+        )
+        matcher.tags('ALTRO', accrediti=False)
+        matcher.tags('BONIFICO SEPA', accrediti=True)  # evicted
+
+        info = matcher.cache_info()
+        self.assertEqual(
+            (1, 4, 2, 2), (info.hits, info.misses, info.maxsize, info.currsize)
+        )
+
+    def test_memo_same_as_unmemoized(self) -> None:
+        descrizioni, rows = _recurring(1_000)
+        memoized = Matcher(RULES)
+
+        self.assertListEqual(
+            autotag(rows, Matcher(RULES, memo_size=0)), autotag(rows, memoized)
+        )
+        self.assertEqual(len(set(descrizioni)), memoized.cache_info().misses)
+
+    @benchmark
+    def test_benchmark_memo(self) -> None:
+        descrizioni, rows = _recurring(BENCHMARK_ROWS)
+        unmemoized = Matcher(RULES, memo_size=0)
+        memoized = Matcher(RULES)
+        self.assertListEqual(autotag(rows, unmemoized), autotag(rows, memoized))
+
+        unmemoized_time = min(
+            repeat(lambda: autotag(rows, unmemoized), number=1, repeat=3)
+        )
+        memoized_time = min(
+            repeat(lambda: autotag(rows, memoized), number=1, repeat=3)
+        )
+        info = memoized.cache_info()
+        logger.info(
+            'autotag of %d rows: unmemoized %.4fs, memoized %.4fs (x%.1f), '
+            '%d hits, %d misses',
+            len(rows),
+            unmemoized_time,
+            memoized_time,
+            unmemoized_time / memoized_time,
+            info.hits,
+            info.misses,
+        )
+        self.assertEqual(len(set(descrizioni)), info.misses)
+        self.assertLess(memoized_time, unmemoized_time)
+
+    def test_previous_same_as_full(self) -> None:
+        previous, refreshed = _refresh(1_000)
+
+        self.assertListEqual(
+            autotag(refreshed), autotag(refreshed, previous=previous)
+        )
+
+    @benchmark
+    def test_benchmark_previous(self) -> None:
+        previous, refreshed = _refresh(BENCHMARK_ROWS)
+        self.assertListEqual(
+            autotag(refreshed), autotag(refreshed, previous=previous)
+        )
+
+        full_time = min(repeat(lambda: autotag(refreshed), number=1, repeat=3))
+        incremental_time = min(
+            repeat(
+                lambda: autotag(refreshed, previous=previous),
+                number=1,
+                repeat=3,
+            )
+        )
+        logger.info(
+            'autotag of %d rows: full %.4fs, incremental %.4fs (x%.1f)',
+            BENCHMARK_ROWS,
+            full_time,
+            incremental_time,
+            full_time / incremental_time,
+        )
+        self.assertLess(incremental_time, full_time)
+
+    def test_load_rules(self) -> None:
+        expected = (
+            Rule(('A', 'B'), frozenset({Tags.SPESA})),
+            Rule(('C',), frozenset({Tags.GAS}), prefix=True),
+            Rule(('D',), frozenset({Tags.GAS}), prefix=True),
+            Rule((), frozenset({Tags.ENTRATE}), accrediti=True),
+        )
+        with TemporaryDirectory() as tmp:
+            toml = Path(f'{tmp}/rules.toml')
+            toml.write_text(
+                """
+                [[rule]]
+                patterns = ['A', 'B']
+                tags = ['SPESA']
+
+                [[rule]]
+                any = ['C', 'D']
+                tags = ['GAS']
+                prefix = true
+
+                [[rule]]
+                patterns = []
+                tags = ['ENTRATE']
+                accrediti = true
+                """,
+                encoding='UTF-8',
+            )
+            json = Path(f'{tmp}/rules.json')
+            json.write_text(
+                '{"rule": ['
+                '{"patterns": ["A", "B"], "tags": ["SPESA"]},'
+                '{"any": ["C", "D"], "tags": ["GAS"], "prefix": true},'
+                '{"patterns": [], "tags": ["ENTRATE"], "accrediti": true}'
+                ']}',
+                encoding='UTF-8',
+            )
+
+            self.assertTupleEqual(expected, load_rules(toml))
+            self.assertTupleEqual(expected, load_rules(json))
+
+    def test_load_rules_invalid(self) -> None:
+        with TemporaryDirectory() as tmp:
+            path = Path(f'{tmp}/rules.toml')
+            for document in (
+                'rule = [',
+                'rule = 1',
+                '[[rule]]\ntags = ["SPESA"]',
+                '[[rule]]\npatterns = ["A"]\nany = ["B"]\ntags = ["SPESA"]',
+                '[[rule]]\npatterns = ["A"]\ntags = ["UNKNOWN"]',
+                '[[rule]]\npatterns = [1]\ntags = ["SPESA"]',
+                '[[rule]]\npatterns = ["A"]\ntags = ["SPESA"]\nprefix = 1',
+                '[[rule]]\npatterns = ["A", "B"]\ntags = []\nprefix = true',
+                '[[rule]]\npatterns = ["A"]\ntags = []\nother = 1',
+            ):
+                with self.subTest(document=document):
+                    path.write_text(document, encoding='UTF-8')
+                    with self.assertRaises(RulesError):
+                        load_rules(path)
+
+    def test_get_matcher(self) -> None:
+        with TemporaryDirectory() as tmp:
+            path = Path(f'{tmp}/rules.toml')
+            path.write_text(
+                '[[rule]]\npatterns = ["A"]\ntags = ["SPESA"]', encoding='UTF-8'
+            )
+            matcher = get_matcher(path)
+            self.assertIs(matcher, get_matcher(path))
+
+            path.write_text(
+                '[[rule]]\npatterns = ["B"]\ntags = ["SPESA"]', encoding='UTF-8'
+            )
+            utime(path, ns=(0, 0))
+            changed = get_matcher(path)
+            self.assertIsNot(matcher, changed)
+            self.assertSetEqual(set(), changed.tags('A', accrediti=False))
+
+            self.assertSetEqual(
+                {
+                    Rule(('A',), frozenset({Tags.SPESA})),
+                    Rule(('B',), frozenset({Tags.SPESA})),
+                },
+                set(matcher.changed(changed).rules),
+            )
+            self.assertTupleEqual((), matcher.changed(matcher).rules)
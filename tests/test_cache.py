@@ -0,0 +1,145 @@
+from datetime import date
+from decimal import Decimal
+from functools import partial
+from os import utime
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Final
+from unittest import TestCase
+from unittest.mock import patch
+
+from _support.tmptxt import tmp_txt
+from movslib.cache import CACHE
+from movslib.cache import NO_CACHE_ARG
+from movslib.cache import SUFFIX
+from movslib.cache import Cache
+from movslib.cache import cache_args
+from movslib.model import KV
+from movslib.model import ZERO
+from movslib.model import Row
+from movslib.movs import read_txt
+
+KV_: Final = KV(None, None, 'tipo', 'conto', 'intestato', None, ZERO, ZERO)
+CSV: Final = [
+    Row(date(2024, 1, m), date(2024, 1, m), None, Decimal(m), f'row {m}')
+    for m in range(1, 10)
+]
+
+
+class TestCache(TestCase):
+    def test_read_miss_then_hit(self) -> None:
+        calls: list[str] = []
+
+        def reader(fn: str) -> tuple[KV, list[Row]]:
+            calls.append(fn)
+            return read_txt(fn)
+
+        with TemporaryDirectory() as tmp, tmp_txt(KV_, CSV) as fn:
+            cache = Cache(Path(tmp))
+
+            self.assertEqual((KV_, CSV), cache.read(fn, reader))
+            self.assertEqual((KV_, CSV), cache.read(fn, reader))
+            self.assertListEqual([fn], calls)
+
+    def test_read_invalidated_by_mtime(self) -> None:
+        calls: list[str] = []
+
+        def reader(fn: str) -> tuple[KV, list[Row]]:
+            calls.append(fn)
+            return read_txt(fn)
+
+        with TemporaryDirectory() as tmp, tmp_txt(KV_, CSV) as fn:
+            cache = Cache(Path(tmp))
+
+            cache.read(fn, reader)
+            utime(fn, ns=(0, 0))
+            cache.read(fn, reader)
+            self.assertListEqual([fn, fn], calls)
+
+    def test_key_partial(self) -> None:
+        def reader(fn: str, *, engine: str) -> tuple[KV, list[Row]]:
+            raise NotImplementedError(fn, engine)
+
+        with TemporaryDirectory() as tmp, tmp_txt(KV_, CSV) as fn:
+            cache = Cache(Path(tmp))
+
+            self.assertNotEqual(
+                cache.key(fn, partial(reader, engine='tabula')),
+                cache.key(fn, partial(reader, engine='pypdf')),
+            )
+
+    def test_disabled(self) -> None:
+        with TemporaryDirectory() as tmp, tmp_txt(KV_, CSV) as fn:
+            cache = Cache(Path(tmp))
+            cache.enabled = False
+
+            cache.read(fn, read_txt)
+            self.assertListEqual([], list(Path(tmp).iterdir()))
+
+    def test_evict(self) -> None:
+        with TemporaryDirectory() as tmp, tmp_txt(KV_, CSV) as fn:
+            cache = Cache(Path(tmp), max_size=0)
+
+            self.assertEqual((KV_, CSV), cache.read(fn, read_txt))
+            self.assertListEqual([], list(Path(tmp).iterdir()))
+
+    def test_put_error(self) -> None:
+        with TemporaryDirectory() as tmp, tmp_txt(KV_, CSV) as fn:
+            cache = Cache(Path(tmp))
+            # a (non empty) directory can not be replaced by the entry
+            key = cache.key(fn, read_txt)
+            entry = Path(tmp) / f'{key}{SUFFIX}'
+            (entry / 'dir').mkdir(parents=True)
+
+            with self.assertLogs('movslib.cache', 'WARNING'):
+                cache.put(key, (KV_, CSV))
+            self.assertListEqual([entry], list(Path(tmp).iterdir()))
+
+    def test_get_stale_layout(self) -> None:
+        with TemporaryDirectory() as tmp, tmp_txt(KV_, CSV) as fn:
+            cache = Cache(Path(tmp))
+            key = cache.key(fn, read_txt)
+            for payload in (
+                b'cmovslib.gone\nKV\n.',  # ModuleNotFoundError
+                b'cmovslib.model\nKV\n)R.',  # TypeError
+            ):
+                with self.subTest(payload=payload):
+                    (Path(tmp) / f'{key}{SUFFIX}').write_bytes(payload)
+
+                    with self.assertLogs('movslib.cache', 'WARNING'):
+                        self.assertIsNone(cache.get(key))
+                    self.assertListEqual([], list(Path(tmp).iterdir()))
+
+    def test_evict_vanished(self) -> None:
+        with TemporaryDirectory() as tmp, tmp_txt(KV_, CSV) as fn:
+            cache = Cache(Path(tmp), max_size=0)
+            # removed by another reader, after the listing
+            vanished = Path(tmp) / f'vanished{SUFFIX}'
+            glob = Path.glob
+
+            def glob_and_vanished(path: Path, pattern: str) -> list[Path]:
+                return [vanished, *glob(path, pattern)]
+
+            with patch.object(Path, 'glob', glob_and_vanished):
+                self.assertEqual((KV_, CSV), cache.read(fn, read_txt))
+            self.assertListEqual([], list(Path(tmp).iterdir()))
+
+    def test_clear(self) -> None:
+        with TemporaryDirectory() as tmp, tmp_txt(KV_, CSV) as fn:
+            cache = Cache(Path(tmp))
+
+            cache.read(fn, read_txt)
+            (Path(tmp) / 'sidecar.bin').write_bytes(b'')
+            self.assertEqual(2, len(list(Path(tmp).iterdir())))
+            cache.clear()
+            self.assertListEqual([], list(Path(tmp).iterdir()))
+
+    def test_cache_args(self) -> None:
+        enabled = CACHE.enabled
+        try:
+            self.assertListEqual(
+                ['a', 'b'], cache_args(['a', NO_CACHE_ARG, 'b'])
+            )
+            self.assertFalse(CACHE.enabled)
+        finally:
+            CACHE.enabled = enabled
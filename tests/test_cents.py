@@ -0,0 +1,185 @@
+from dataclasses import replace
+from datetime import date
+from datetime import timedelta
+from decimal import Decimal
+from logging import getLogger
+from operator import attrgetter
+from timeit import repeat
+from typing import TYPE_CHECKING
+from typing import Final
+from unittest import TestCase
+
+from _support.benchmark import benchmark
+from movsinflazione import acc_by_month
+from movslib.cents import cumsum
+from movslib.cents import last_by
+from movslib.cents import money
+from movslib.cents import total
+from movslib.model import KV
+from movslib.model import ZERO
+from movslib.model import ColumnarRows
+from movslib.model import Row
+from movslib.model import Rows
+from movsmerger.movsmerger import merge_kw
+from movsvalidator.movsvalidator import validate_saldo
+from movsviewer.plotutils import _acc
+from movsviewer.plotutils import _acc_reset_by_year
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from collections.abc import Iterable
+
+logger = getLogger(__name__)
+
+BENCHMARK_ROWS: Final = 100_000
+
+D = Decimal
+
+
+def _rows(n: int) -> Rows:
+    start = date(2000, 1, 1)
+    return Rows(
+        'rows',
+        (
+            Row(
+                start + timedelta(days=i // 7),
+                # not sorted, with many ties
+                start + timedelta(days=(i * 7919) % (n // 3 + 1)),
+                Decimal(i % 997).scaleb(-2) if i % 3 else None,
+                Decimal(i % 1009) if i % 3 == 1 else None,
+                f'row {i % 50}',
+            )
+            for i in range(n)
+        ),
+    )
+
+
+def _decimal_acc(
+    rows: 'Iterable[Row]', period: 'Callable[[date], object] | None' = None
+) -> list[tuple[date, Decimal]]:
+    """Return the running totals, summing one `Decimal` at a time."""
+    ret: list[tuple[date, Decimal]] = []
+    for row in sorted(rows, key=attrgetter('date')):
+        if ret and (period is None or period(ret[-1][0]) == period(row.date)):
+            ret.append((row.date, ret[-1][1] + row.money))
+        else:
+            ret.append((row.date, row.money))
+    return ret
+
+
+def _decimal_last_by_month(
+    rows: 'Iterable[Row]',
+) -> list[tuple[Decimal, int, int]]:
+    months = {(day.year, day.month): money for day, money in _decimal_acc(rows)}
+    return [(money, year, month) for (year, month), money in months.items()]
+
+
+class TestCents(TestCase):
+    def test_cumsum(self) -> None:
+        rows = ColumnarRows(
+            'rows',
+            [
+                Row(date(2021, 1, 1), date(2021, 1, 1), None, D(4), ''),
+                Row(date(2020, 2, 1), date(2020, 2, 1), D(3), None, ''),
+                Row(date(2020, 1, 2), date(2020, 1, 2), None, D(2), ''),
+                Row(date(2020, 1, 1), date(2020, 1, 1), None, D(1), ''),
+            ],
+        )
+
+        days, totals, exponent = cumsum(rows)
+        self.assertListEqual(
+            [
+                date(2020, 1, 1),
+                date(2020, 1, 2),
+                date(2020, 2, 1),
+                date(2021, 1, 1),
+            ],
+            [date.fromordinal(day) for day in days.tolist()],
+        )
+        self.assertListEqual([1, 3, 0, 4], totals.tolist())
+        self.assertEqual(0, exponent)
+        self.assertListEqual([1, 3, 0, 4], cumsum(rows, 'Y')[1].tolist())
+        self.assertListEqual([1, 3, -3, 4], cumsum(rows, 'M')[1].tolist())
+        self.assertListEqual(
+            [(date(2020, 2, 1), D(0)), (date(2021, 1, 1), D(4))],
+            last_by(rows, 'Y'),
+        )
+
+    def test_money(self) -> None:
+        rows = _rows(100)
+        columnar = ColumnarRows(rows.name, rows)
+
+        units, exponent = money(columnar)
+        self.assertListEqual(
+            [row.money for row in rows],
+            [Decimal(unit).scaleb(exponent) for unit in units.tolist()],
+        )
+        self.assertEqual(sum(row.money for row in rows), total(columnar))
+
+    def test_sub_cent(self) -> None:
+        rows = [
+            Row(date(2020, 1, 2), date(2020, 1, 2), D('0.001'), None, ''),
+            Row(date(2020, 1, 1), date(2020, 1, 1), None, D('1.5'), ''),
+        ]
+        columnar = ColumnarRows('rows', rows)
+
+        self.assertEqual('1.499', str(total(columnar)))
+        self.assertListEqual(
+            [(date(2020, 1, 1), D('1.5')), (date(2020, 1, 2), D('1.499'))],
+            list(_acc(columnar)),
+        )
+
+    def test_same_as_decimal(self) -> None:
+        rows = _rows(1_000)
+        columnar = ColumnarRows(rows.name, rows)
+        saldo = sum((row.money for row in rows), start=ZERO)
+
+        for actual in (rows, columnar):
+            with self.subTest(columnar=actual is columnar):
+                self.assertListEqual(_decimal_acc(rows), list(_acc(actual)))
+                self.assertListEqual(
+                    _decimal_acc(rows, lambda day: day.year),
+                    list(_acc_reset_by_year(actual)),
+                )
+                self.assertListEqual(
+                    _decimal_last_by_month(rows), list(acc_by_month(actual))
+                )
+
+                kv = KV(None, None, '', '', '', None, saldo, saldo)
+                self.assertTrue(validate_saldo(kv, actual, []))
+
+                for tipo in ('buoni postali', 'libretto postale'):
+                    kv = KV(None, None, tipo, '', '', None, ZERO, ZERO)
+                    self.assertEqual(
+                        replace(
+                            kv, saldo_contabile=saldo, saldo_disponibile=saldo
+                        ),
+                        merge_kw(kv, kv, actual),
+                    )
+
+    @benchmark
+    def test_benchmark(self) -> None:
+        rows = _rows(BENCHMARK_ROWS)
+        columnar = ColumnarRows(rows.name, rows)
+
+        for what, decimal_path, cents_path in (
+            (
+                'sum',
+                lambda: sum(row.money for row in rows),
+                lambda: total(columnar),
+            ),
+            ('_acc', lambda: _decimal_acc(rows), lambda: _acc(columnar)),
+        ):
+            with self.subTest(what=what):
+                self.assertEqual(decimal_path(), cents_path())
+                decimal_time = min(repeat(decimal_path, number=1, repeat=3))
+                cents_time = min(repeat(cents_path, number=1, repeat=3))
+                logger.info(
+                    '%s of %d rows: Decimal %.4fs, cents %.4fs (x%.1f)',
+                    what,
+                    BENCHMARK_ROWS,
+                    decimal_time,
+                    cents_time,
+                    decimal_time / cents_time,
+                )
+                self.assertLess(cents_time, decimal_time)
@@ -7,8 +7,10 @@ from _support.tmpapp import tmp_app
 from _support.tmptxt import tmp_txt
 from movslib.model import KV
 from movslib.model import ZERO
+from movslib.model import ColumnarRows
 from movslib.model import Row
 from movsviewer.chartview import ChartWidgetWrapper
+from movsviewer.chartview import build_series
 
 
 class TestChartView(TestCase):
@@ -36,3 +38,9 @@ class TestChartView(TestCase):
     def test_chart_view(self) -> None:
         with tmp_app() as widgets, tmp_txt(self.kv, self.csv) as data_path:
             widgets.append(ChartWidgetWrapper(data_path))
+
+    def test_build_series_cents(self) -> None:
+        expected = build_series(self.csv)
+        actual = build_series(ColumnarRows('', self.csv))
+
+        self.assertListEqual(expected.points(), actual.points())
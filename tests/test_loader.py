@@ -0,0 +1,95 @@
+from contextlib import contextmanager
+from datetime import date
+from decimal import Decimal
+from typing import TYPE_CHECKING
+from typing import Final
+from unittest import TestCase
+
+from PySide6.QtCore import QCoreApplication
+from PySide6.QtCore import QEventLoop
+from PySide6.QtCore import QTimer
+
+from _support.tmptxt import tmp_txt
+from movslib.model import KV
+from movslib.model import ZERO
+from movslib.model import Row
+from movslib.model import Rows
+from movsviewer.loader import Loader
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+
+@contextmanager
+def core_app() -> 'Iterator[QCoreApplication]':
+    app = QCoreApplication.instance()
+    if app is not None:
+        yield app
+        return
+
+    app = QCoreApplication([])
+    try:
+        yield app
+    finally:
+        app.shutdown()
+
+
+class TestLoader(TestCase):
+    kv: Final = KV(None, None, 'tipo', 'conto', 'intestato', None, ZERO, ZERO)
+    csv: Final = [
+        Row(date(2024, m, 1), date(2024, m, 1), None, Decimal(m), '')
+        for m in range(9, 0, -1)
+    ]
+
+    def _run(self, loader: Loader, data_paths: list[str]) -> None:
+        loop = QEventLoop()
+        loader.finished.connect(loop.quit)
+        QTimer.singleShot(10_000, loop.quit)
+        loader.start(data_paths)
+        if loader.running:
+            loop.exec()
+
+    def test_loader(self) -> None:
+        with core_app():
+            self._test_loader()
+
+    def _test_loader(self) -> None:
+        loader = Loader()
+        loaded: dict[str, Rows] = {}
+        progress: list[tuple[int, int]] = []
+        loader.loaded.connect(
+            lambda data_path, _kv, rows: loaded.__setitem__(data_path, rows)
+        )
+        loader.progress.connect(lambda *args: progress.append(args))
+        try:
+            with (
+                tmp_txt(self.kv, self.csv) as fn1,
+                tmp_txt(self.kv, self.csv) as fn2,
+            ):
+                self._run(loader, [fn1, fn2])
+
+                self.assertEqual({fn1, fn2}, set(loaded))
+                self.assertListEqual(self.csv, loaded[fn1])
+                self.assertListEqual([(0, 2), (1, 2), (2, 2)], progress)
+                self.assertFalse(loader.running)
+        finally:
+            loader.shutdown()
+
+    def test_cancel(self) -> None:
+        with core_app() as app:
+            self._test_cancel(app)
+
+    def _test_cancel(self, app: QCoreApplication) -> None:
+        loader = Loader()
+        loaded: list[str] = []
+        loader.loaded.connect(lambda data_path, *_: loaded.append(data_path))
+        try:
+            with tmp_txt(self.kv, self.csv) as fn:
+                loader.start([fn])
+                loader.cancel()
+                self.assertFalse(loader.running)
+
+                app.processEvents()
+                self.assertListEqual([], loaded)
+        finally:
+            loader.shutdown()
@@ -1,9 +1,31 @@
 from datetime import date
 from datetime import timedelta
+from decimal import Decimal
+from logging import getLogger
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from timeit import repeat
+from typing import Final
 from unittest import TestCase
+from unittest.mock import patch
 
+from _support.benchmark import benchmark
+from movslib.model import KV
+from movslib.model import ZERO
 from movslib.model import Row
+from movslib.movs import read_txt
+from movslib.movs import write_txt
+from movsmerger import movsmerger
+from movsmerger.movsmerger import _merge_rows_difflib
+from movsmerger.movsmerger import copy_all_to_txt
+from movsmerger.movsmerger import merge_files
 from movsmerger.movsmerger import merge_rows
+from movsmerger.movsmerger import merge_txt
+
+logger = getLogger(__name__)
+
+# the difflib engine is quadratic: 100_000 rows take ~50s there
+BENCHMARK_ROWS: Final = 10_000
 
 
 def d(days: int = 0) -> date:
@@ -47,3 +69,183 @@ class MergeRowsTest(TestCase):
         new = [ROW2, ROW1]
 
         self.assertEqual(expected, merge_rows(acc, new))
+
+    def test_same_date_replace(self) -> None:
+        a = Row(d(1), d(1), None, Decimal(1), 'a')
+        b = Row(d(1), d(1), None, Decimal(2), 'b')
+        c = Row(d(1), d(1), None, Decimal(3), 'c')
+
+        self.assertEqual(
+            [ROW2, c, a, b, ROW0], merge_rows([ROW2, a, b, ROW0], [c, a])
+        )
+
+    def test_unsorted(self) -> None:
+        acc = [ROW0, ROW2]
+        new = [ROW0, ROW1, ROW2]
+
+        self.assertEqual(
+            list(_merge_rows_difflib(acc, new)), merge_rows(acc, new)
+        )
+
+    def test_same_as_difflib(self) -> None:
+        acc, new = histories(1_000)
+
+        self.assertEqual(
+            list(_merge_rows_difflib(acc, new)), merge_rows(acc, new)
+        )
+
+    @benchmark
+    def test_benchmark(self) -> None:
+        acc, new = histories(BENCHMARK_ROWS)
+
+        expected = list(_merge_rows_difflib(acc, new))
+        self.assertEqual(expected, merge_rows(acc, new))
+
+        difflib_time = min(
+            repeat(lambda: list(_merge_rows_difflib(acc, new)), number=1)
+        )
+        buckets_time = min(repeat(lambda: merge_rows(acc, new), number=1))
+        logger.info(
+            'merge of %d rows: difflib %.4fs, buckets %.4fs (x%.1f)',
+            BENCHMARK_ROWS,
+            difflib_time,
+            buckets_time,
+            difflib_time / buckets_time,
+        )
+        self.assertLess(buckets_time, difflib_time)
+
+
+def histories(n: int) -> tuple[list[Row], list[Row]]:
+    """Return an accumulator and a newer export, overlapping, of ~n rows."""
+    # data valuta up to 9 days before data contabile, as in the exports
+    acc = [row(i // 5, i, i * 7 % 10) for i in range(n, 0, -1) if i % 11]
+    new = [row(i // 5, i, i * 7 % 10) for i in range(n + 500, 0, -1) if i % 13]
+    return acc, new
+
+
+def row(days: int, amount: int, valuta: int = 0) -> Row:
+    """Return a row, with data valuta `valuta` days before data contabile."""
+    return Row(
+        d(days), d(days - valuta), None, Decimal(amount), f'row {amount}'
+    )
+
+
+class MergeTxtTest(TestCase):
+    maxDiff = None
+
+    def test_same_as_full_merge(self) -> None:
+        kv = KV(None, None, 'Tutte', 'conto', 'intestato', None, ZERO, ZERO)
+        acc = [row(i // 2, i) for i in range(1000, 0, -1)]
+        # overlaps the accumulator head, and adds some new rows
+        new = [row(i // 2, i) for i in range(1010, 980, -1) if i % 7]
+        new_kv = KV(
+            d(490), d(505), 'Tutte', 'conto', 'intestato', None, ZERO, ZERO
+        )
+
+        with TemporaryDirectory() as tmp:
+            acc_fn = f'{tmp}/acc.txt'
+            new_fn = f'{tmp}/new.txt'
+            expected_fn = f'{tmp}/expected.txt'
+            write_txt(acc_fn, kv, acc)
+            write_txt(new_fn, new_kv, new)
+
+            write_txt(expected_fn, *merge_files(acc_fn, new_fn))
+            merge_txt(acc_fn, new_fn)
+
+            self.assertEqual(
+                Path(expected_fn).read_text(encoding='UTF-8'),
+                Path(acc_fn).read_text(encoding='UTF-8'),
+            )
+
+    def test_valuta_before_contabile(self) -> None:
+        kv = KV(None, None, 'Tutte', 'conto', 'intestato', None, ZERO, ZERO)
+        rows = [row(i // 2, i, i * 7 % 10) for i in range(100, 0, -1)]
+
+        for split in range(0, 100, 9):
+            with self.subTest(split=split), TemporaryDirectory() as tmp:
+                acc_fn = f'{tmp}/acc.txt'
+                new_fn = f'{tmp}/new.txt'
+                expected_fn = f'{tmp}/expected.txt'
+                write_txt(acc_fn, kv, rows[split:])
+                write_txt(new_fn, kv, rows[: split + 5])
+
+                write_txt(expected_fn, *merge_files(acc_fn, new_fn))
+                merge_txt(acc_fn, new_fn)
+
+                self.assertEqual(
+                    Path(expected_fn).read_text(encoding='UTF-8'),
+                    Path(acc_fn).read_text(encoding='UTF-8'),
+                )
+                self.assertListEqual(rows, read_txt(acc_fn)[1])
+
+    def test_parsed(self) -> None:
+        kv = KV(None, None, 'Tutte', 'conto', 'intestato', None, ZERO, ZERO)
+        acc = [row(i, i) for i in range(10, 0, -1)]
+        new = [row(i, i) for i in range(12, 8, -1)]
+
+        with TemporaryDirectory() as tmp:
+            acc_fn = f'{tmp}/acc.txt'
+            # never read: only its parsed rows are used
+            new_fn = f'{tmp}/new.xlsx'
+            expected_fn = f'{tmp}/expected.txt'
+            write_txt(acc_fn, kv, acc)
+            write_txt(expected_fn, kv, merge_rows(acc, new))
+
+            merge_txt(acc_fn, new_fn, parsed={new_fn: (kv, new)})
+
+            self.assertEqual(
+                Path(expected_fn).read_text(encoding='UTF-8'),
+                Path(acc_fn).read_text(encoding='UTF-8'),
+            )
+
+    def test_full_history(self) -> None:
+        kv = KV(
+            None, None, 'libretto postale', 'conto', 'conto', None, ZERO, ZERO
+        )
+        acc = [row(i, i) for i in range(10, 0, -1)]
+        new = [row(i, i) for i in range(12, 8, -1)]
+
+        with TemporaryDirectory() as tmp:
+            acc_fn = f'{tmp}/acc.txt'
+            new_fn = f'{tmp}/new.txt'
+            expected_fn = f'{tmp}/expected.txt'
+            write_txt(acc_fn, kv, acc)
+            write_txt(new_fn, kv, new)
+
+            write_txt(expected_fn, *merge_files(acc_fn, new_fn))
+            with patch.object(movsmerger, 'read_txt_head') as read_txt_head:
+                merge_txt(acc_fn, new_fn)
+
+            read_txt_head.assert_not_called()
+            self.assertEqual(
+                Path(expected_fn).read_text(encoding='UTF-8'),
+                Path(acc_fn).read_text(encoding='UTF-8'),
+            )
+
+
+class CopyAllToTxtTest(TestCase):
+    def test_copy_all_to_txt(self) -> None:
+        kv = KV(None, None, 'Tutte', 'conto', 'intestato', None, ZERO, ZERO)
+        csvs = [[row(i, j) for i in range(j, 0, -1)] for j in range(1, 6)]
+
+        with TemporaryDirectory() as tmp:
+            parsed = {
+                f'{tmp}/mov{j}.xlsx': (kv, csv) for j, csv in enumerate(csvs)
+            }
+            parsed[f'{tmp}/acc.txt'] = (kv, [])
+
+            txt_fns = copy_all_to_txt(parsed, max_workers=3)
+
+            self.assertListEqual(
+                [f'{tmp}/mov{j}.txt' for j in range(len(csvs))],
+                list(txt_fns.values()),
+            )
+            for j, csv in enumerate(csvs):
+                expected_fn = f'{tmp}/expected.txt'
+                write_txt(expected_fn, kv, csv)
+                self.assertEqual(
+                    Path(expected_fn).read_text(encoding='UTF-8'),
+                    Path(txt_fns[f'{tmp}/mov{j}.xlsx']).read_text(
+                        encoding='UTF-8'
+                    ),
+                )
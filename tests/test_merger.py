@@ -0,0 +1,106 @@
+from datetime import date
+from decimal import Decimal
+from os import environ
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Final
+from unittest import TestCase
+from unittest.mock import patch
+
+from _support.tmptxt import tmp_txt
+from movslib.cache import CACHE
+from movslib.model import KV
+from movslib.model import ZERO
+from movslib.model import Row
+from movsviewer.merger import merge
+from movsviewer.merger import read_all
+from movsviewer.merger import read_and_merge
+
+
+class TestMerger(TestCase):
+    kv: Final = KV(None, None, 'tipo', 'conto', 'intestato', None, ZERO, ZERO)
+    csv1: Final = [
+        Row(date(2024, m, 1), date(2024, m, 1), None, Decimal(m), '')
+        for m in range(9, 0, -2)
+    ]
+    csv2: Final = [
+        Row(date(2024, m, 1), date(2024, m, 1), Decimal(m), None, '')
+        for m in range(8, 0, -2)
+    ]
+
+    def test_read_all(self) -> None:
+        with (
+            tmp_txt(self.kv, self.csv1) as fn1,
+            tmp_txt(self.kv, self.csv2) as fn2,
+        ):
+            loaded = read_all([fn1, fn2])
+
+            self.assertListEqual([fn1, fn2], list(loaded))
+            kv1, rows1 = loaded[fn1]
+            self.assertEqual(self.kv, kv1)
+            self.assertEqual(Path(fn1).stem, rows1.name)
+            self.assertListEqual(self.csv1, rows1)
+
+    def test_merge(self) -> None:
+        with (
+            tmp_txt(self.kv, self.csv1) as fn1,
+            tmp_txt(self.kv, self.csv2) as fn2,
+        ):
+            expected = read_and_merge([fn1, fn2])
+            actual = merge([fn1, fn2], [self.csv1, self.csv2])
+
+            self.assertEqual(expected.name, actual.name)
+            self.assertListEqual(expected, actual)
+            self.assertListEqual(
+                [date(2024, m, 1) for m in range(9, 0, -1)],
+                [row.date for row in actual],
+            )
+
+    def test_read_and_merge_parallel(self) -> None:
+        with (
+            tmp_txt(self.kv, self.csv1) as fn1,
+            tmp_txt(self.kv, self.csv2) as fn2,
+        ):
+            expected = read_and_merge([fn1, fn2], max_workers=1)
+            actual = read_and_merge([fn1, fn2], max_workers=2)
+
+            self.assertEqual(expected.name, actual.name)
+            self.assertListEqual(expected, actual)
+
+    def test_read_and_merge_parallel_no_cache(self) -> None:
+        enabled = CACHE.enabled
+        CACHE.enabled = False
+        try:
+            with (
+                TemporaryDirectory() as tmp,
+                # the cache directory of the spawned workers
+                patch.dict(environ, {'XDG_CACHE_HOME': tmp}),
+                tmp_txt(self.kv, self.csv1) as fn1,
+                tmp_txt(self.kv, self.csv2) as fn2,
+            ):
+                read_and_merge([fn1, fn2], max_workers=2)
+
+                self.assertListEqual([], list(Path(tmp).iterdir()))
+        finally:
+            CACHE.enabled = enabled
+
+    def test_read_and_merge_one_cpu(self) -> None:
+        with (
+            tmp_txt(self.kv, self.csv1) as fn1,
+            tmp_txt(self.kv, self.csv2) as fn2,
+            patch('movsviewer.merger.cpu_count', return_value=1),
+            patch('movsviewer.merger.ProcessPoolExecutor') as executor,
+        ):
+            actual = read_and_merge([fn1, fn2])
+
+            executor.assert_not_called()
+            self.assertListEqual(
+                read_and_merge([fn1, fn2], max_workers=1), actual
+            )
+
+    def test_merge_is_stable(self) -> None:
+        a = Row(date(2024, 1, 1), date(2024, 1, 1), None, Decimal(1), 'a')
+        b = Row(date(2024, 1, 1), date(2024, 1, 1), None, Decimal(1), 'b')
+        c = Row(date(2024, 1, 1), date(2024, 1, 1), None, Decimal(1), 'c')
+
+        self.assertListEqual([a, c, b], merge(['x', 'y'], [[a, c], [b]]))
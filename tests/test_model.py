@@ -1,10 +1,17 @@
+from dataclasses import replace
 from datetime import date
 from decimal import Decimal
+from pickle import dumps
+from pickle import loads
 from unittest import TestCase
 
+from movslib.model import NO_AMOUNT
 from movslib.model import ZERO
+from movslib.model import ColumnarRows
 from movslib.model import Row
 from movslib.model import Rows
+from movslib.model import from_units
+from movslib.model import to_units
 
 DATA_CONTABILE = date(2022, 11, 5)
 DATA_VALUTA = date(2022, 11, 6)
@@ -54,3 +61,64 @@ NAME = 'name'
 class TestRows(TestCase):
     def test_ctor(self) -> None:
         self.assertEqual(NAME, Rows(NAME).name)
+
+
+ROWS = [
+    Row(date(2024, 1, 3), date(2024, 1, 2), Decimal('1.5'), None, 'a'),
+    Row(date(2024, 1, 2), date(2024, 1, 1), None, Decimal('1234.56'), 'b'),
+    Row(date(2024, 1, 1), date(2024, 1, 1), None, None, 'a'),
+]
+
+
+class TestColumnarRows(TestCase):
+    def test_units(self) -> None:
+        for amount, units in (
+            (None, (NO_AMOUNT, 0)),
+            (ZERO, (0, 0)),
+            (Decimal('-0.01'), (-1, -2)),
+            (Decimal('1234.56'), (123456, -2)),
+            (Decimal(5), (5, 0)),
+            (Decimal('5.00'), (500, -2)),
+            (Decimal('0.001'), (1, -3)),
+            (Decimal('5E+3'), (5, 3)),
+        ):
+            with self.subTest(amount=amount):
+                self.assertEqual(units, to_units(amount))
+                self.assertEqual(str(amount), str(from_units(*units)))
+
+    def test_units_not_finite(self) -> None:
+        with self.assertRaises(ValueError):
+            to_units(Decimal('NaN'))
+
+    def test_str_round_trip(self) -> None:
+        rows = [
+            replace(ROWS[0], addebiti=amount)
+            for amount in (Decimal(5), Decimal('5.00'), Decimal('0.125'))
+        ]
+
+        self.assertListEqual(
+            [str(row.addebiti) for row in rows],
+            [str(row.addebiti) for row in ColumnarRows(NAME, rows)],
+        )
+
+    def test_row_access(self) -> None:
+        columnar = ColumnarRows(NAME, ROWS)
+
+        self.assertEqual(NAME, columnar.name)
+        self.assertEqual(len(ROWS), len(columnar))
+        self.assertEqual(ROWS[1], columnar[1])
+        self.assertEqual(ROWS[-1], columnar[-1])
+        self.assertListEqual(ROWS, list(columnar))
+        self.assertListEqual(ROWS[1:], list(columnar[1:]))
+        self.assertEqual(ROWS[::-1], columnar[::-1])
+        self.assertEqual(Rows(NAME, ROWS), columnar.rows())
+
+    def test_compact(self) -> None:
+        columnar = ColumnarRows(NAME, ROWS)
+
+        self.assertEqual(ROWS[0].money, columnar[0].money)
+        self.assertIs(
+            columnar.descrizione_operazioni[0],
+            columnar.descrizione_operazioni[2],
+        )
+        self.assertEqual(columnar, loads(dumps(columnar)))  # noqa: S301
@@ -1,16 +1,107 @@
+from dataclasses import fields
+from dataclasses import replace
 from datetime import date
+from datetime import timedelta
 from decimal import Decimal
 from io import StringIO
+from itertools import islice
+from logging import getLogger
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from timeit import repeat
+from typing import TYPE_CHECKING
+from typing import Final
 from unittest import TestCase
 
+from _support.benchmark import benchmark
+from _support.tmptxt import tmp_txt
 from movslib.model import KV
+from movslib.model import ZERO
 from movslib.model import Row
+from movslib.movs import TruncatedHeaderError
+from movslib.movs import atomic_open
 from movslib.movs import conv_date
+from movslib.movs import conv_date_fixed
 from movslib.movs import conv_date_inv
+from movslib.movs import csv_field_indexes
 from movslib.movs import fmt_value
+from movslib.movs import open_txt
 from movslib.movs import read_csv
 from movslib.movs import read_kv
+from movslib.movs import read_txt
+from movslib.movs import read_txt_range
+from movslib.movs import write_csv
 from movslib.movs import write_kv
+from movslib.movs import write_txt
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+logger = getLogger(__name__)
+
+BENCHMARK_ROWS: Final = 100_000
+
+
+def _write_csv_reference(f: StringIO, csv: 'Iterable[Row]') -> None:
+    """Write the rows one field at a time, as write_csv originally did."""
+
+    def conv_csv_decimal_inv(d: Decimal) -> str:
+        return f'{d:,}'.replace(',', '_').replace('.', ',').replace('_', '.')
+
+    f.write(
+        ' Data Contabile'
+        '   Data Valuta'
+        '   Addebiti (euro)'
+        '   Accrediti (euro)'
+        '   Descrizione operazioni\n'
+    )
+    for row in csv:
+        f.write(' ')
+        for (a, b), field in zip(csv_field_indexes, fields(Row), strict=True):
+            value = getattr(row, field.name)
+            row_str = fmt_value(value, conv_csv_decimal_inv)
+            if b is not None:
+                f.write(f'{row_str:{b - a}}')
+            else:
+                f.write(row_str)
+        f.write('\n')
+
+
+def _read_csv_reference(csv_file: 'Iterable[str]') -> 'Iterable[Row]':
+    """Parse the rows with strptime, as read_csv originally did."""
+
+    def conv_cvs_decimal(dec: str) -> Decimal | None:
+        if not dec:
+            return None
+        return Decimal(dec.replace('.', '').replace(',', '.'))
+
+    for row in islice(csv_file, 1, None):
+        els = [row[a:b].rstrip() for a, b in csv_field_indexes]
+        data_contabile = conv_date(els[0])
+        data_valuta = conv_date(els[1])
+        if data_contabile is None or data_valuta is None:
+            raise ValueError(row)
+        yield Row(
+            data_contabile,
+            data_valuta,
+            conv_cvs_decimal(els[2]),
+            conv_cvs_decimal(els[3]),
+            els[4],
+        )
+
+
+def _rows(n: int) -> list[Row]:
+    start = date(2000, 1, 1)
+    return [
+        Row(
+            start + timedelta(days=i // 5),
+            start + timedelta(days=i // 4),
+            Decimal(i * 1_234).scaleb(-2) if i % 2 else None,
+            None if i % 2 else Decimal(i % 1_000_003),
+            f'riga {i} è',
+        )
+        for i in range(n, 0, -1)
+    ]
 
 
 class TestMovs(TestCase):
@@ -140,3 +231,255 @@ class TestMovs(TestCase):
 
         with self.assertRaises(ValueError):
             list(read_csv(('', ' 11/05/1982')))
+
+    def test_conv_date_fixed(self) -> None:
+        for dt in (
+            '11/05/1982',
+            '01/01/0001',
+            '31/12/9999',
+            '00/01/2000',
+            '29/02/2023',
+            '29/02/2024',
+            '32/01/2020',
+            '1/5/1982',
+            '11-05-1982',
+            '11/05/82',
+            '+1/05/1982',
+            '1_/05/1982',
+            '\u0661\u0661/05/1982',  # arabic-indic digits
+            '',
+            'invalid',
+        ):
+            with self.subTest(dt=dt):
+                self.assertEqual(conv_date(dt), conv_date_fixed(dt))
+
+    def test_read_csv_same_as_reference(self) -> None:
+        f = StringIO()
+        write_csv(f, _rows(1_000))
+        lines = f.getvalue().splitlines()
+
+        self.assertListEqual(
+            list(_read_csv_reference(lines)), list(read_csv(lines))
+        )
+
+    @benchmark
+    def test_read_csv_benchmark(self) -> None:
+        f = StringIO()
+        write_csv(f, _rows(BENCHMARK_ROWS))
+        lines = f.getvalue().splitlines()
+
+        reference_time = min(
+            repeat(lambda: list(_read_csv_reference(lines)), number=1, repeat=3)
+        )
+        read_csv_time = min(
+            repeat(lambda: list(read_csv(lines)), number=1, repeat=3)
+        )
+        logger.info(
+            'read_csv: reference %.2fus/row, fixed width %.2fus/row (x%.1f)',
+            reference_time / BENCHMARK_ROWS * 1e6,
+            read_csv_time / BENCHMARK_ROWS * 1e6,
+            reference_time / read_csv_time,
+        )
+        self.assertLess(read_csv_time, reference_time)
+
+    def test_read_csv_range(self) -> None:
+        csv = (
+            '',
+            ' 01/01/2022       03/01/2022    1',
+            ' 01/01/2022       02/01/2022    2',
+            ' 01/01/2022       01/01/2022    3',
+        )
+
+        self.assertListEqual(
+            [Decimal(2)],
+            [
+                row.addebiti
+                for row in read_csv(
+                    csv, since=date(2022, 1, 2), until=date(2022, 1, 2)
+                )
+            ],
+        )
+        self.assertListEqual(
+            [Decimal(1), Decimal(2)],
+            [row.addebiti for row in read_csv(csv, since=date(2022, 1, 2))],
+        )
+
+    def test_open_txt(self) -> None:
+        kv = KV(None, None, 'tipo', 'conto', 'intestato', None, ZERO, ZERO)
+        csv = [
+            Row(date(2022, 1, d), date(2022, 1, d), None, Decimal(d), f'{d}')
+            for d in range(31, 0, -1)
+        ]
+        with tmp_txt(kv, csv) as fn:
+            with open_txt(fn) as (actual_kv, rows):
+                self.assertEqual(kv, actual_kv)
+                self.assertListEqual(read_txt(fn)[1], list(rows))
+
+            with open_txt(fn, since=date(2022, 1, 30)) as (_, rows):
+                self.assertListEqual(csv[:2], list(rows))
+
+            # early termination
+            with open_txt(fn) as (_, rows):
+                self.assertEqual(csv[0], next(rows))
+            with self.assertRaises(ValueError):  # I/O on closed file
+                next(rows)
+
+    def test_read_txt_range(self) -> None:
+        kv = KV(None, None, 'tipo', 'conto', 'intestato', None, ZERO, ZERO)
+        start = date(2020, 1, 1)
+        # descending by data contabile, with ties and holes; data valuta
+        # some days before, so not sorted
+        csv = [
+            Row(
+                start + timedelta(days=i // 3 * 2),
+                start + timedelta(days=i // 3 * 2 - i * 7 % 10),
+                Decimal(i),
+                None,
+                f'riga {i} è',
+            )
+            for i in range(300, -1, -1)
+        ]
+        with tmp_txt(kv, csv) as fn:
+            for since, until in (
+                (None, None),
+                (date(2020, 2, 1), None),
+                (None, date(2020, 2, 1)),
+                (date(2020, 2, 1), date(2020, 2, 29)),
+                (date(2020, 2, 2), date(2020, 2, 2)),  # hole
+                (date(2019, 1, 1), date(2019, 12, 31)),  # before
+                (date(2021, 1, 1), None),  # after
+                (min(row.date for row in csv), csv[0].date),
+            ):
+                with self.subTest(since=since, until=until):
+                    expected = [
+                        row
+                        for row in csv
+                        if (since is None or since <= row.date)
+                        and (until is None or row.date <= until)
+                    ]
+                    actual_kv, actual = read_txt_range(fn, since, until)
+
+                    self.assertEqual(kv, actual_kv)
+                    self.assertListEqual(expected, actual)
+
+    def test_read_txt_range_beyond_margin(self) -> None:
+        kv = KV(None, None, 'tipo', 'conto', 'intestato', None, ZERO, ZERO)
+        start = date(2020, 1, 1)
+        csv = [
+            Row(
+                start + timedelta(days=i),
+                start + timedelta(days=i),
+                Decimal(i),
+                None,
+                f'riga {i}',
+            )
+            for i in range(181, -1, -1)
+        ]
+        # data valuta 46 and 51 days before the data contabile
+        csv[90] = replace(csv[90], data_valuta=date(2020, 2, 15))  # 1/4
+        csv[51] = replace(csv[51], data_valuta=date(2020, 3, 20))  # 10/5
+        with tmp_txt(kv, csv) as fn:
+            for since, until in (
+                # 1/4 is the first row out of the window
+                (date(2020, 2, 1), date(2020, 2, 29)),
+                # 1/4 is in the window (so 10/5, out of it, is not missed)
+                (date(2020, 3, 1), date(2020, 3, 31)),
+            ):
+                with self.subTest(since=since, until=until):
+                    expected = [
+                        row for row in csv if since <= row.date <= until
+                    ]
+
+                    self.assertListEqual(
+                        expected, read_txt_range(fn, since, until)[1]
+                    )
+
+    def test_read_txt_range_truncated(self) -> None:
+        with TemporaryDirectory() as tmp:
+            fn = f'{tmp}/acc.txt'
+            Path(fn).write_text(' da: (gg/mm/aaaa): \n', encoding='UTF-8')
+
+            with self.assertRaises(TruncatedHeaderError):
+                read_txt_range(fn, date(2020, 1, 1))
+
+    def test_write_csv_same_as_reference(self) -> None:
+        csv = [
+            *_rows(10_000),
+            Row(date(1, 1, 1), date(9999, 12, 31), ZERO, Decimal('-0.5'), ''),
+            Row(
+                date(2022, 1, 1),
+                date(2022, 1, 1),
+                Decimal('1234567890123456789.01'),  # wider than its column
+                Decimal('1E+3'),
+                'a very long description, with spaces at the end   ',
+            ),
+        ]
+        expected = StringIO()
+        _write_csv_reference(expected, csv)
+        actual = StringIO()
+        write_csv(actual, csv)
+
+        self.assertEqual(expected.getvalue(), actual.getvalue())
+
+    def test_write_txt_atomic(self) -> None:
+        kv = KV(None, None, 'tipo', 'conto', 'intestato', None, ZERO, ZERO)
+        csv = _rows(10)
+
+        def failing() -> 'Iterable[Row]':
+            yield from csv
+            raise RuntimeError
+
+        with TemporaryDirectory() as tmp:
+            fn = f'{tmp}/acc.txt'
+            write_txt(fn, kv, csv)
+            Path(fn).chmod(0o600)
+            before = Path(fn).read_bytes()
+
+            with self.assertRaises(RuntimeError):
+                write_txt(fn, kv, failing())
+
+            self.assertEqual(before, Path(fn).read_bytes())
+            self.assertListEqual(
+                ['acc.txt'], [p.name for p in Path(tmp).iterdir()]
+            )
+
+            with atomic_open(fn) as f:
+                f.write('new')
+            self.assertEqual('new', Path(fn).read_text(encoding='UTF-8'))
+            self.assertEqual(0o600, Path(fn).stat().st_mode & 0o777)
+
+    def test_atomic_open_concurrent(self) -> None:
+        with TemporaryDirectory() as tmp:
+            fn = f'{tmp}/acc.txt'
+
+            with atomic_open(fn) as first, atomic_open(fn) as second:
+                first.write('first')
+                second.write('second')
+
+            self.assertEqual('first', Path(fn).read_text(encoding='UTF-8'))
+            self.assertListEqual(
+                ['acc.txt'], [p.name for p in Path(tmp).iterdir()]
+            )
+
+    @benchmark
+    def test_write_csv_benchmark(self) -> None:
+        csv = _rows(BENCHMARK_ROWS)
+
+        reference_time = min(
+            repeat(
+                lambda: _write_csv_reference(StringIO(), csv),
+                number=1,
+                repeat=3,
+            )
+        )
+        write_csv_time = min(
+            repeat(lambda: write_csv(StringIO(), csv), number=1, repeat=3)
+        )
+        logger.info(
+            'write_csv of %d rows: reference %.4fs, batched %.4fs (x%.1f)',
+            BENCHMARK_ROWS,
+            reference_time,
+            write_csv_time,
+            reference_time / write_csv_time,
+        )
+        self.assertLess(write_csv_time, reference_time)
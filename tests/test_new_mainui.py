@@ -1,16 +1,28 @@
+from contextlib import contextmanager
 from datetime import date
 from decimal import Decimal
+from typing import TYPE_CHECKING
 from typing import Final
 from unittest.case import TestCase
+from unittest.mock import patch
 
+from PySide6.QtWidgets import QMessageBox
+
+from _support.tmpapp import headless_app
 from _support.tmpapp import tmp_app
 from _support.tmptxt import tmp_txt
 from movslib.model import KV
 from movslib.model import ZERO
 from movslib.model import Row
+from movslib.model import Rows
+from movsviewer.loader import Loader
 from movsviewer.mainui import NewMainui
 from movsviewer.mainui import Settingsui
 from movsviewer.settings import Settings
+from movsviewer.validator import Validator
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
 
 
 class TestNewMainui(TestCase):
@@ -45,3 +57,91 @@ class TestNewMainui(TestCase):
             new_mainui = NewMainui()
             mainui = new_mainui(settings, settingsui)
             widgets.append(mainui)
+
+    @contextmanager
+    def headless_mainui(self, *data_paths: str) -> 'Iterator[NewMainui]':
+        """Return a NewMainui, not loading: files are delivered by hand."""
+        with headless_app(), patch.object(Loader, 'start'):
+            new_mainui = NewMainui()
+            # shared by all the instances
+            self.addCleanup(new_mainui.sheets_charts.clear)
+            mainui = new_mainui(Settings(list(data_paths)), Settingsui())
+            try:
+                yield new_mainui
+            finally:
+                mainui.close()
+                new_mainui.loader.shutdown()
+
+    def rows(self, new_mainui: NewMainui, key: str) -> int:
+        _, model, _, _ = new_mainui.sheets_charts[key]
+        return model.rowCount()
+
+    def test_loaded_while_asking(self) -> None:
+        with self.headless_mainui('a', 'b') as new_mainui:
+
+            def validate_one(
+                _validator: Validator, data_path: str, kv: KV, rows: Rows
+            ) -> bool:
+                if data_path == 'a':
+                    # as delivered by the nested event loop of the prompt
+                    new_mainui.file_loaded('b', kv, rows)
+                    new_mainui.all_loaded()
+                    self.assertNotIn('&a&b', new_mainui.sheets_charts)
+                return True
+
+            with patch.object(Validator, 'validate_one', new=validate_one):
+                new_mainui.file_loaded('a', self.kv, Rows('a', self.csv))
+
+            self.assertEqual(2 * len(self.csv), self.rows(new_mainui, '&a&b'))
+
+    def test_failed_while_asking(self) -> None:
+        with self.headless_mainui('a', 'b') as new_mainui:
+
+            def warning(*_args: object) -> None:
+                # as delivered by the nested event loop of the message box
+                new_mainui.file_loaded('b', self.kv, Rows('b', self.csv))
+                new_mainui.all_loaded()
+                self.assertNotIn('&a&b', new_mainui.sheets_charts)
+
+            with patch.object(QMessageBox, 'warning', new=warning):
+                new_mainui.file_failed('a', OSError('a'))
+
+            self.assertEqual(len(self.csv), self.rows(new_mainui, '&a&b'))
+
+    def test_empty(self) -> None:
+        with (
+            # the saldo does not match: accept anyway
+            patch.object(Validator, 'validate_one', return_value=True),
+            self.headless_mainui('a') as new_mainui,
+        ):
+            new_mainui.file_loaded('a', self.kv, Rows('a'))
+            new_mainui.all_loaded()
+            self.assertEqual(0, self.rows(new_mainui, 'a'))
+            self.assertEqual(0, self.rows(new_mainui, '&a'))
+
+            new_mainui.file_loaded('a', self.kv, Rows('a', self.csv))
+            new_mainui.all_loaded()
+            self.assertEqual(len(self.csv), self.rows(new_mainui, '&a'))
+
+            # emptied
+            new_mainui.file_loaded('a', self.kv, Rows('a'))
+            new_mainui.all_loaded()
+            self.assertEqual(0, self.rows(new_mainui, 'a'))
+            self.assertEqual(0, self.rows(new_mainui, '&a'))
+
+    def test_cancel(self) -> None:
+        with (
+            # the saldo does not match: accept anyway
+            patch.object(Validator, 'validate_one', return_value=True),
+            self.headless_mainui('a', 'b') as new_mainui,
+        ):
+            new_mainui.file_loaded('a', self.kv, Rows('a', self.csv))
+            new_mainui.file_loaded('b', self.kv, Rows('b', self.csv))
+            new_mainui.all_loaded()
+
+            # a refresh, cancelled after the first file
+            new_mainui.update_helper()
+            new_mainui.file_loaded('a', self.kv, Rows('a', self.csv[:1]))
+            new_mainui.cancel_update()
+
+            self.assertEqual(1 + len(self.csv), self.rows(new_mainui, '&a&b'))
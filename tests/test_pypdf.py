@@ -0,0 +1,69 @@
+from pathlib import Path
+from unittest import TestCase
+
+from movslib import estrattoconto
+from movslib import postepay
+from movslib._pypdf import Chunk
+from movslib._pypdf import lines
+from movslib._pypdf import read_chunks
+
+PATHS_POSTEPAY = [
+    f'{Path(__file__).parent}/test_postepay.pdf',
+    f'{Path(__file__).parent}/test_postepay_2.pdf',
+]
+PATHS_ESTRATTOCONTO = [
+    f'{Path(__file__).parent}/test_estrattoconto_1.pdf',
+    f'{Path(__file__).parent}/test_estrattoconto_2.pdf',
+    f'{Path(__file__).parent}/test_estrattoconto_3.pdf',
+]
+
+
+class TestPypdf(TestCase):
+    maxDiff = None
+
+    def test_read_chunks(self) -> None:
+        pages = read_chunks(PATHS_POSTEPAY[0])
+
+        self.assertEqual(4, len(pages))
+        # the two lines of a description cell are reported separately
+        self.assertIn(
+            Chunk(
+                252.5,
+                150.37,
+                'ACCREDITO TRAMITE CARTA 17/08/2023 12.31 '
+                'PAYPAL *WIBROS GMBH HAUPSTSTR.',
+            ),
+            pages[0],
+        )
+        self.assertIn(Chunk(259.5, 150.37, '17 DEU N. 661776'), pages[0])
+
+    def test_lines(self) -> None:
+        a = Chunk(1, 2, 'a')
+        b = Chunk(1, 5, 'b')
+        c = Chunk(3, 1, 'c')
+
+        self.assertListEqual([[a, b], [c]], lines([a, b, c]))
+
+    def test_postepay_csv_parity(self) -> None:
+        for path in PATHS_POSTEPAY:
+            with self.subTest(path=path):
+                self.assertListEqual(
+                    postepay.read_csv(path),
+                    postepay.read_csv_chunks(read_chunks(path)),
+                )
+
+    def test_postepay_parity(self) -> None:
+        for path in PATHS_POSTEPAY:
+            with self.subTest(path=path):
+                self.assertEqual(
+                    postepay.read_postepay(path),
+                    postepay.read_postepay(path, engine='pypdf'),
+                )
+
+    def test_estrattoconto_parity(self) -> None:
+        for path in PATHS_ESTRATTOCONTO:
+            with self.subTest(path=path):
+                self.assertEqual(
+                    estrattoconto.read_estrattoconto(path),
+                    estrattoconto.read_estrattoconto(path, engine='pypdf'),
+                )
@@ -1,7 +1,11 @@
+from pathlib import Path
 from unittest import TestCase
+from unittest.mock import patch
 
+from movslib.cache import CACHE
 from movslib.libretto import read_libretto
 from movslib.reader import _get_reader
+from movslib.reader import read
 
 
 class TestReader(TestCase):
@@ -12,3 +16,9 @@ class TestReader(TestCase):
             with self.subTest(fn=fn, expected=expected):
                 actual = _get_reader(fn)
                 self.assertIs(expected, actual)
+
+    def test_read_engine(self) -> None:
+        fn = f'{Path(__file__).parent}/test_estrattoconto_1.pdf'
+
+        with patch.object(CACHE, 'enabled', new=False):
+            self.assertEqual(read(fn), read(fn, engine='pypdf'))
@@ -0,0 +1,64 @@
+from random import Random
+from typing import Final
+from unittest import TestCase
+
+from movsviewer.searchindex import SearchIndex
+
+TEXTS: Final = (
+    'PAGAMENTO POS ESSELUNGA MILANO',
+    'PAGAMENTO POS ESSELUNGA VIMERCATE',
+    'BONIFICO SEPA DA ROSSI',
+    'Bonifico sepa per Rossi',
+    'ADDEBITO DIRETTO ENEL ENERGIA',
+    'ADDEBITO  DOPPIO SPAZIO',
+    'STRASSE',
+    '',
+)
+
+
+class TestSearchIndex(TestCase):
+    def test_search(self) -> None:
+        index = SearchIndex(TEXTS)
+
+        self.assertSetEqual(set(TEXTS[:2]), index.search('esselunga'))
+        self.assertSetEqual(set(TEXTS[2:4]), index.search('BONIFICO SEPA'))
+        self.assertSetEqual(set(TEXTS[2:4]), index.search('fico sepa '))
+        self.assertSetEqual({TEXTS[2]}, index.search('fico sepa da ro'))
+        self.assertSetEqual({TEXTS[0]}, index.search('s esselunga m'))
+        self.assertSetEqual({TEXTS[5]}, index.search('o  d'))
+        self.assertSetEqual({TEXTS[6]}, index.search('straße'))
+        self.assertSetEqual(set(), index.search('esselunga bonifico'))
+        self.assertSetEqual(set(TEXTS), index.search(''))
+        self.assertSetEqual(
+            {text for text in TEXTS if 'n' in text.casefold()},
+            index.search('N'),
+        )
+
+    def test_update(self) -> None:
+        index = SearchIndex(TEXTS[:2])
+        self.assertEqual(2, len(index))
+        self.assertNotIn(TEXTS[2], index)
+
+        index.update(TEXTS)
+
+        self.assertEqual(len(TEXTS), len(index))
+        self.assertIn(TEXTS[2], index)
+        self.assertSetEqual(set(TEXTS[2:4]), index.search('rossi'))
+
+    def test_same_as_scan(self) -> None:
+        random = Random(0)  # noqa: S311
+        words = [word for text in TEXTS for word in text.split(' ') if word]
+        texts = [
+            ' '.join(random.choices(words, k=random.randint(1, 6)))
+            for _ in range(1_000)
+        ]
+        index = SearchIndex(texts)
+        for _ in range(1_000):
+            text = random.choice(texts)
+            start = random.randint(0, len(text))
+            pattern = text[start : start + random.randint(0, 15)]
+            with self.subTest(pattern=pattern):
+                self.assertSetEqual(
+                    {t for t in texts if pattern.casefold() in t.casefold()},
+                    index.search(pattern),
+                )
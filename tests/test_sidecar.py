@@ -0,0 +1,153 @@
+from datetime import date
+from datetime import timedelta
+from decimal import Decimal
+from logging import getLogger
+from os import utime
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from timeit import repeat
+from typing import Final
+from unittest import TestCase
+from unittest.mock import patch
+
+from _support.benchmark import benchmark
+from movslib.cache import CACHE
+from movslib.model import KV
+from movslib.model import ZERO
+from movslib.model import Row
+from movslib.movs import read_txt
+from movslib.movs import write_txt
+from movslib.reader import read
+from movslib.sidecar import dumps
+from movslib.sidecar import loads
+from movslib.sidecar import read_sidecar
+from movslib.sidecar import read_txt_sidecar
+from movslib.sidecar import sidecar_fn
+
+logger = getLogger(__name__)
+
+BENCHMARK_ROWS: Final = 100_000
+
+KV_: Final = KV(
+    date(2020, 1, 1),
+    date(2020, 12, 31),
+    'tipo',
+    'conto',
+    'intestato',
+    date(2020, 12, 31),
+    Decimal('1234.5'),
+    ZERO,
+)
+
+
+def _rows(n: int) -> list[Row]:
+    start = date(2000, 1, 1)
+    return [
+        Row(
+            start + timedelta(days=i // 5),
+            start + timedelta(days=i // 4),
+            Decimal(i * 1_234).scaleb(-2) if i % 2 else None,
+            None if i % 2 else Decimal(i % 1_000_003),
+            f'riga {i % 1_000} è',
+        )
+        for i in range(n, 0, -1)
+    ]
+
+
+class TestSidecar(TestCase):
+    def test_dumps_loads(self) -> None:
+        csv = [
+            *_rows(100),
+            # same value, different representations
+            Row(date(1, 1, 1), date(9999, 12, 31), Decimal(12), None, ''),
+            Row(date(1, 1, 1), date(1, 1, 1), Decimal('12.00'), None, ''),
+            Row(date(1, 1, 1), date(1, 1, 1), None, Decimal('-0'), 'x'),
+            Row(date(1, 1, 1), date(1, 1, 1), None, Decimal('1E+3'), 'x'),
+        ]
+
+        kv, actual = loads(dumps(KV_, csv, 1, 2), 1, 2) or (None, [])
+
+        self.assertEqual(KV_, kv)
+        self.assertListEqual(csv, actual)
+        self.assertListEqual(
+            [str(row.addebiti) for row in csv],
+            [str(row.addebiti) for row in actual],
+        )
+        self.assertListEqual(
+            [str(row.accrediti) for row in csv],
+            [str(row.accrediti) for row in actual],
+        )
+
+        self.assertEqual((KV_, []), loads(dumps(KV_, [], 1, 2), 1, 2))
+
+    def test_loads_stale_or_corrupted(self) -> None:
+        data = dumps(KV_, _rows(10), 1, 2)
+
+        self.assertIsNone(loads(data, 1, 3))
+        self.assertIsNone(loads(data, 2, 2))
+        self.assertIsNone(loads(data[:10], 1, 2))
+        self.assertIsNone(loads(data[:-1], 1, 2))
+        corrupted = bytearray(data)
+        corrupted[-1] ^= 1
+        with self.assertLogs('movslib.sidecar', 'WARNING'):
+            self.assertIsNone(loads(bytes(corrupted), 1, 2))
+
+    def test_read_txt_sidecar(self) -> None:
+        csv = _rows(10)
+        with (
+            TemporaryDirectory() as tmp,
+            patch.object(CACHE, 'directory', Path(tmp) / 'cache'),
+        ):
+            fn = f'{tmp}/acc.txt'
+            write_txt(fn, KV_, csv)
+            self.assertIsNone(read_sidecar(fn))
+
+            # generated on first read
+            self.assertEqual((KV_, csv), read_txt_sidecar(fn))
+            self.assertEqual((KV_, csv), read_sidecar(fn))
+            self.assertEqual((KV_, csv), read(fn))
+
+            # regenerated when the .txt changes
+            write_txt(fn, KV_, csv[1:])
+            utime(fn, ns=(0, 0))
+            self.assertIsNone(read_sidecar(fn))
+            self.assertEqual((KV_, csv[1:]), read(fn))
+            self.assertEqual((KV_, csv[1:]), read_sidecar(fn))
+
+            # regenerated when corrupted
+            Path(sidecar_fn(fn)).write_bytes(b'garbage')
+            self.assertEqual((KV_, csv[1:]), read_txt_sidecar(fn))
+            self.assertEqual((KV_, csv[1:]), read_sidecar(fn))
+
+            # in the cache, not next to the .txt
+            self.assertListEqual(
+                ['acc.txt', 'cache'],
+                sorted(p.name for p in Path(tmp).iterdir()),
+            )
+            self.assertListEqual(
+                [Path(sidecar_fn(fn))], list((Path(tmp) / 'cache').iterdir())
+            )
+
+    @benchmark
+    def test_benchmark(self) -> None:
+        csv = _rows(BENCHMARK_ROWS)
+        with (
+            TemporaryDirectory() as tmp,
+            patch.object(CACHE, 'directory', Path(tmp) / 'cache'),
+        ):
+            fn = f'{tmp}/acc.txt'
+            write_txt(fn, KV_, csv)
+            self.assertEqual((KV_, csv), read_txt_sidecar(fn))
+
+            txt_time = min(repeat(lambda: read_txt(fn), number=1, repeat=3))
+            sidecar_time = min(
+                repeat(lambda: read_txt_sidecar(fn), number=1, repeat=3)
+            )
+        logger.info(
+            'read of %d rows: .txt %.4fs, sidecar %.4fs (x%.1f)',
+            BENCHMARK_ROWS,
+            txt_time,
+            sidecar_time,
+            txt_time / sidecar_time,
+        )
+        self.assertLess(sidecar_time, txt_time)
@@ -1,5 +1,8 @@
 from datetime import date
+from datetime import timedelta
 from decimal import Decimal
+from logging import getLogger
+from timeit import repeat
 from typing import Final
 from unittest.case import TestCase
 
@@ -7,14 +10,42 @@ from guilib.chartwidget.model import Column
 from guilib.chartwidget.model import ColumnHeader
 from guilib.chartwidget.model import Info
 from guilib.chartwidget.viewmodel import SortFilterViewModel as SFVMguilib
+from guilib.searchsheet.model import SearchableModel
+from PySide6.QtCore import QSortFilterProxyModel
+from PySide6.QtCore import Qt
+from PySide6.QtTest import QTest
 from PySide6.QtWidgets import QTableView
 
+from _support.benchmark import benchmark
+from _support.tmpapp import headless_app
 from _support.tmpapp import tmp_app
 from _support.tmptxt import tmp_txt
+from movslib.autotag.autotag import Matcher
+from movslib.autotag.autotag import Rule
+from movslib.autotag.autotag import autotag
+from movslib.autotag.model import Tags
 from movslib.model import KV
 from movslib.model import ZERO
 from movslib.model import Row
+from movslib.model import Rows
+from movsviewer.viewmodel import FIELD_NAMES
+from movsviewer.viewmodel import FILTER_DELAY_MS
 from movsviewer.viewmodel import SortFilterViewModel as SFVMmovsviewer
+from movsviewer.viewmodel import ViewModel
+
+logger = getLogger(__name__)
+
+BENCHMARK_ROWS: Final = 20_000
+
+SHOPS: Final = ('ESSELUNGA', 'EUROSPIN', 'ALDI', 'IPERCOOP', 'BAR SPORT')
+
+
+def _filtered(model: QSortFilterProxyModel) -> list[str]:
+    return [
+        str(model.index(row, 0).data(Qt.ItemDataRole.UserRole))
+        + str(model.index(row, FIELD_NAMES.index('addebiti')).data())
+        for row in range(model.rowCount())
+    ]
 
 
 class TestSortFilterViewModel(TestCase):
@@ -70,3 +101,163 @@ class TestSortFilterViewModel(TestCase):
             v_guilib.setWindowTitle('guilib')
             v_guilib.setModel(m_guilib)
             widgets.append(v_guilib)
+
+    def test_reload(self) -> None:
+        d = date(2024, 1, 1)
+        old = Row(d, d, Decimal(1), None, 'ESSELUNGA')
+        new = Row(d, d, Decimal(2), None, 'ESSELUNGA')
+        model = SFVMmovsviewer('rows', Rows('rows', [old]))
+        previous = model.sourceModel().rows[0]
+
+        model.reload(Rows('rows', [new, old]))
+
+        rows = model.sourceModel().rows
+        self.assertListEqual(
+            [{Tags.SPESA}, {Tags.SPESA}], [r.tags for r in rows]
+        )
+        self.assertIs(previous, rows[1])
+
+    def test_retag(self) -> None:
+        d = date(2024, 1, 1)
+        rows = Rows(
+            'rows',
+            [
+                Row(d, d, Decimal(1), None, 'ESSELUNGA'),
+                Row(d, d, Decimal(2), None, 'ENEL'),
+                Row(d, d, Decimal(3), None, 'ALTRO'),
+            ],
+        )
+        spesa = Rule(('ESSELUNGA',), frozenset({Tags.SPESA}))
+        luce = Rule(('ENEL',), frozenset({Tags.LUCE}))
+        model = SFVMmovsviewer('rows', rows, Matcher([spesa]))
+        changes: list[tuple[int, int]] = []
+        model.sourceModel().dataChanged.connect(
+            lambda top, bottom: changes.append((top.row(), bottom.row()))
+        )
+
+        self.assertEqual(1, model.retag(Matcher([spesa, luce])))
+        self.assertEqual(0, model.retag(Matcher([spesa, luce])))
+        self.assertEqual(1, model.retag(Matcher([luce])))
+
+        column = FIELD_NAMES.index('tags')
+        self.assertListEqual(
+            [None, {Tags.LUCE}, None],
+            [
+                model.sourceModel()
+                .index(row, column)
+                .data(Qt.ItemDataRole.UserRole)
+                or None
+                for row in range(3)
+            ],
+        )
+        self.assertListEqual([(1, 1), (0, 0)], changes)
+
+    def test_filter(self) -> None:
+        rows = Rows(
+            'rows',
+            [
+                Row(
+                    date(2024, 1, 1 + i % 28),
+                    date(2024, 1, 1 + i % 28),
+                    Decimal(i),
+                    None,
+                    f'PAGAMENTO POS {shop} {i % 7}',
+                )
+                for i, shop in enumerate(SHOPS * 10)
+            ],
+        )
+        model = SFVMmovsviewer('rows', rows, filter_delay_ms=0)
+        reference = SearchableModel(ViewModel(autotag(rows)))
+
+        for pattern in (
+            'esselunga',
+            'ESSELUNGA',
+            'pos esse',
+            'a 1',
+            '2024-01-02',
+            '12',
+            'spesa',
+            'ESSE*GA 3',
+            'descrizione_operazioni: eurospin',
+            'descrizione_operazioni: aldi*',
+            'addebiti: 1',
+            'nothing',
+            '',
+        ):
+            with self.subTest(pattern=pattern):
+                model.setFilterWildcard(pattern)
+                reference.setFilterWildcard(pattern)
+                self.assertListEqual(_filtered(reference), _filtered(model))
+
+        # new rows are filtered too
+        model.setFilterWildcard('esselunga')
+        model.reload(
+            Rows(
+                'rows',
+                [
+                    *rows,
+                    Row(
+                        date(2024, 2, 1),
+                        date(2024, 2, 1),
+                        Decimal(1),
+                        None,
+                        'NEW ESSELUNGA',
+                    ),
+                ],
+            )
+        )
+        self.assertEqual(11, model.rowCount())
+
+    def test_filter_delay(self) -> None:
+        rows = Rows(
+            'rows', [Row(date(2024, 1, 1), date(2024, 1, 1), None, None, 'A')]
+        )
+        with headless_app():
+            model = SFVMmovsviewer('rows', rows)
+
+            model.setFilterWildcard('B')
+            self.assertEqual(1, model.rowCount())  # not yet
+            model.setFilterWildcard('BC')
+            QTest.qWait(FILTER_DELAY_MS * 2)
+            self.assertEqual(0, model.rowCount())
+
+    @benchmark
+    def test_benchmark_filter(self) -> None:
+        start = date(2000, 1, 1)
+        rows = Rows(
+            'rows',
+            [
+                Row(
+                    start + timedelta(days=i // 10),
+                    start + timedelta(days=i // 10),
+                    Decimal(i % 997).scaleb(-2),
+                    None,
+                    f'PAGAMENTO POS {SHOPS[i % len(SHOPS)]} {i % 1_000}',
+                )
+                for i in range(BENCHMARK_ROWS)
+            ],
+        )
+        model = SFVMmovsviewer('rows', rows, filter_delay_ms=0)
+        reference = SearchableModel(ViewModel(autotag(rows)))
+        # typing, a keystroke at a time
+        patterns = ['ESSELUNGA'[:i] for i in range(6, 10)]
+
+        def type_in(model: QSortFilterProxyModel) -> None:
+            for pattern in patterns:
+                model.setFilterWildcard(pattern)
+            model.setFilterWildcard('')
+
+        reference_time = min(
+            repeat(lambda: type_in(reference), number=1, repeat=3)
+        )
+        indexed_time = min(repeat(lambda: type_in(model), number=1, repeat=3))
+        logger.info(
+            'filter of %d rows, %d keystrokes: reference %.4fs, '
+            'indexed %.4fs (x%.1f)',
+            BENCHMARK_ROWS,
+            len(patterns),
+            reference_time,
+            indexed_time,
+            reference_time / indexed_time,
+        )
+        self.assertLess(indexed_time, reference_time)
@@ -0,0 +1,64 @@
+from pathlib import Path
+from typing import TYPE_CHECKING
+from typing import cast
+from unittest import TestCase
+
+from pandas.testing import assert_frame_equal
+from tabula.io import read_pdf
+from tabula.io import read_pdf_with_template
+
+from movslib._java import java
+from movslib._tabula import open_pdf
+from movslib.estrattoconto import TEMPLATE_2
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+PATH_POSTEPAY = f'{Path(__file__).parent}/test_postepay.pdf'
+PATH_ESTRATTOCONTO = f'{Path(__file__).parent}/test_estrattoconto_1.pdf'
+
+
+class TestTabula(TestCase):
+    def assert_frames_equal(
+        self, expected: 'list[DataFrame]', actual: 'list[DataFrame]'
+    ) -> None:
+        self.assertEqual(len(expected), len(actual))
+        for e, a in zip(expected, actual, strict=True):
+            assert_frame_equal(e, a)
+
+    def test_read_pdf(self) -> None:
+        area = [[0, 400, 100, 600], [140, 120, 170, 210], [170, 0, 200, 600]]
+        with java():
+            expected_kv = read_pdf(
+                PATH_POSTEPAY,
+                pandas_options={'header': None},
+                pages=1,
+                area=area,
+                silent=True,
+            )
+            expected_csv = read_pdf(
+                PATH_POSTEPAY, pages='all', lattice=True, silent=True
+            )
+
+        with open_pdf(PATH_POSTEPAY) as pdf:
+            actual_kv = pdf.read_pdf(pages=1, area=area, header=False)
+            actual_csv = pdf.read_pdf(pages='all', lattice=True)
+
+        self.assert_frames_equal(
+            cast('list[DataFrame]', expected_kv), actual_kv
+        )
+        self.assert_frames_equal(
+            cast('list[DataFrame]', expected_csv), actual_csv
+        )
+
+    def test_read_pdf_with_template(self) -> None:
+        with java():
+            expected = read_pdf_with_template(
+                PATH_ESTRATTOCONTO, TEMPLATE_2, pandas_options={'header': None}
+            )
+
+        with open_pdf(PATH_ESTRATTOCONTO) as pdf:
+            self.assertEqual(2, pdf.number_of_pages)
+            actual = pdf.read_pdf_with_template(TEMPLATE_2, header=False)
+
+        self.assert_frames_equal(expected, actual)
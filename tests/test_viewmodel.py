@@ -0,0 +1,363 @@
+from dataclasses import replace
+from datetime import date
+from datetime import timedelta
+from decimal import Decimal
+from logging import getLogger
+from timeit import repeat
+from typing import Final
+from unittest import TestCase
+
+from PySide6.QtCore import QPersistentModelIndex
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QBrush
+from PySide6.QtGui import QColor
+
+from _support.benchmark import benchmark
+from movslib.autotag.autotag import autotag
+from movslib.autotag.model import TagRow
+from movslib.autotag.model import TagRows
+from movslib.model import ZERO
+from movslib.model import Row
+from movslib.model import Rows
+from movsviewer.viewmodel import FIELD_NAMES
+from movsviewer.viewmodel import T_FIELDS
+from movsviewer.viewmodel import ViewModel
+from movsviewer.viewmodel import _abs
+
+logger = getLogger(__name__)
+
+BENCHMARK_ROWS: Final = 50_000
+
+ROLES: Final = (
+    Qt.ItemDataRole.DisplayRole,
+    Qt.ItemDataRole.BackgroundRole,
+    Qt.ItemDataRole.UserRole,
+)
+
+
+def _rows(n: int) -> TagRows:
+    start = date(2000, 1, 1)
+    return autotag(
+        Rows(
+            'rows',
+            [
+                Row(
+                    start + timedelta(days=i // 5),
+                    start + timedelta(days=i // 4),
+                    Decimal(i * 1_234 % 99_991).scaleb(-2) if i % 3 else None,
+                    None if i % 3 else Decimal(i % 1_009),
+                    ('ESSELUNGA', 'ENEL ENERGIA', 'ALTRO')[i % 3],
+                )
+                for i in range(n)
+            ],
+        )
+    )
+
+
+def _data_reference(
+    model: ViewModel, row: int, column: int, role: int
+) -> T_FIELDS | QBrush | None:
+    """Compute what to show, on every call."""
+    data = model.rows
+    shown = model.row(row)
+    field_name = FIELD_NAMES[column]
+    if role == Qt.ItemDataRole.DisplayRole:
+        if field_name == 'tags':
+            tags = shown.tags
+            if not tags:
+                return '(/)'
+            return ', '.join(tag.value for tag in tags)
+        return str(getattr(shown, field_name))
+    if role == Qt.ItemDataRole.BackgroundRole:
+        abs_data = sorted([_abs(r) for r in data])
+        max_, min_, val = abs_data[-1], abs_data[0], _abs(shown)
+        perc = (val - min_) / (max_ - min_) if max_ != min_ else Decimal('0.5')
+        return QBrush(QColor.fromHsl(int(perc * 120), 223, 159))
+    if role == Qt.ItemDataRole.UserRole:
+        return getattr(shown, field_name)  # type: ignore[no-any-return]
+    return None
+
+
+class TestViewModel(TestCase):
+    def assert_same_as_reference(self, model: ViewModel) -> None:
+        for row in range(model.rowCount()):
+            for column in range(model.columnCount()):
+                index = model.index(row, column)
+                for role in ROLES:
+                    self.assertEqual(
+                        _data_reference(model, row, column, role),
+                        model.data(index, role),
+                    )
+
+    def test_data(self) -> None:
+        model = ViewModel(_rows(30))
+        self.assert_same_as_reference(model)
+
+        model.sort(FIELD_NAMES.index('addebiti'))
+        self.assert_same_as_reference(model)
+
+        model.sort(
+            FIELD_NAMES.index('data_valuta'), Qt.SortOrder.DescendingOrder
+        )
+        self.assert_same_as_reference(model)
+
+        model.load(TagRows('empty'))
+        self.assertEqual(0, model.rowCount())
+
+    def test_insert_remove_rows(self) -> None:
+        rows = _rows(30)
+        model = ViewModel(TagRows('rows'))
+        inserted: list[tuple[int, int]] = []
+        removed: list[tuple[int, int]] = []
+        recolored: list[int] = []
+        model.rowsInserted.connect(
+            lambda _parent, first, last: inserted.append((first, last))
+        )
+        model.rowsRemoved.connect(
+            lambda _parent, first, last: removed.append((first, last))
+        )
+        model.dataChanged.connect(
+            lambda _top, bottom, _roles: recolored.append(bottom.row())
+        )
+
+        model.insert_rows(0, rows[10:20])
+        self.assert_same_as_reference(model)
+        model.insert_rows(0, rows[:10])
+        model.insert_rows(20, rows[20:])
+        self.assert_same_as_reference(model)
+        self.assertListEqual(rows, model.rows)
+
+        model.remove_rows(5, 10)
+        self.assert_same_as_reference(model)
+        model.remove_rows(0, 20)
+        self.assertEqual(0, model.rowCount())
+        model.insert_rows(0, [])
+        model.remove_rows(0, 0)
+
+        self.assertListEqual([(0, 9), (0, 9), (20, 29)], inserted)
+        self.assertListEqual([(5, 14), (0, 19)], removed)
+        # whenever the range of the values changed
+        self.assertListEqual([9, 29], recolored)
+
+    def test_sort(self) -> None:
+        rows = _rows(30)
+        model = ViewModel(TagRows('rows', rows))
+        addebiti = FIELD_NAMES.index('addebiti')
+        descrizione = FIELD_NAMES.index('descrizione_operazioni')
+        tags = FIELD_NAMES.index('tags')
+        persistent = QPersistentModelIndex(model.index(7, 0))
+
+        model.sort(addebiti, Qt.SortOrder.DescendingOrder)
+        model.sort(descrizione)
+
+        expected = sorted(
+            sorted(rows, key=lambda row: row.addebiti or ZERO, reverse=True),
+            key=lambda row: row.descrizione_operazioni,
+        )
+        self.assertListEqual(
+            expected, [model.row(row) for row in range(model.rowCount())]
+        )
+        self.assertListEqual(
+            [
+                (descrizione, Qt.SortOrder.AscendingOrder),
+                (addebiti, Qt.SortOrder.DescendingOrder),
+            ],
+            model.sorting,
+        )
+        self.assertListEqual(rows, model.rows)
+        self.assertIs(rows[7], model.row(persistent.row()))
+        self.assert_same_as_reference(model)
+
+        # by the text of the tags
+        model.sort_by([(tags, Qt.SortOrder.AscendingOrder)])
+        self.assertListEqual(
+            sorted(rows, key=lambda row: sorted(row.tags)),
+            [model.row(row) for row in range(model.rowCount())],
+        )
+
+        # as loaded
+        model.sort(-1)
+        self.assertListEqual(
+            rows, [model.row(row) for row in range(model.rowCount())]
+        )
+        self.assertIs(rows[7], model.row(persistent.row()))
+
+    def test_sorted_load(self) -> None:
+        rows = _rows(30)
+        model = ViewModel(TagRows('rows', rows[10:]))
+        model.sort(FIELD_NAMES.index('addebiti'))
+        events: list[tuple[str, int, int]] = []
+        model.rowsInserted.connect(
+            lambda _parent, first, last: events.append(('+', first, last))
+        )
+        model.rowsRemoved.connect(
+            lambda _parent, first, last: events.append(('-', first, last))
+        )
+        model.modelReset.connect(lambda: events.append(('reset', 0, 0)))
+
+        model.load(TagRows('rows', rows[:20]))
+
+        self.assertListEqual(rows[:20], model.rows)
+        self.assertListEqual(
+            sorted(rows[:20], key=lambda row: row.addebiti or ZERO),
+            [model.row(row) for row in range(model.rowCount())],
+        )
+        self.assert_same_as_reference(model)
+        self.assertNotIn(('reset', 0, 0), events)
+        self.assertEqual(
+            10,
+            sum(
+                last - first + 1 for what, first, last in events if what == '+'
+            ),
+        )
+        self.assertEqual(
+            10,
+            sum(
+                last - first + 1 for what, first, last in events if what == '-'
+            ),
+        )
+
+    @benchmark
+    def test_benchmark_sort(self) -> None:
+        rows = _rows(BENCHMARK_ROWS)
+        model = ViewModel(TagRows('rows', rows))
+        columns = [
+            FIELD_NAMES.index(field_name)
+            for field_name in ('descrizione_operazioni', 'addebiti', 'tags')
+        ]
+
+        def reference() -> None:
+            # a key closure, on every click
+            data = list(rows)
+            for column in columns:
+
+                def key(row: TagRow, column: int = column) -> T_FIELDS:
+                    e: T_FIELDS = getattr(row, FIELD_NAMES[column])
+                    if e is None:
+                        return ZERO
+                    return e
+
+                data.sort(key=key)  # type: ignore[arg-type]
+
+        def clicks() -> None:
+            for column in columns:
+                model.sort(column)
+
+        reference_time = min(repeat(reference, number=1, repeat=3))
+        clicks_time = min(repeat(clicks, number=1, repeat=3))
+        logger.info(
+            'sort of %d rows by %d columns: reference %.4fs, '
+            'cached keys %.4fs (x%.1f)',
+            BENCHMARK_ROWS,
+            len(columns),
+            reference_time,
+            clicks_time,
+            reference_time / clicks_time,
+        )
+        self.assertLess(clicks_time, reference_time)
+
+    @benchmark
+    def test_benchmark(self) -> None:
+        model = ViewModel(_rows(BENCHMARK_ROWS))
+        # the cells of a screenful of rows, as when scrolling
+        cells = [
+            (model.index(row, column), role)
+            for row in range(0, BENCHMARK_ROWS, BENCHMARK_ROWS // 50)
+            for column in range(model.columnCount())
+            for role in ROLES[:2]
+        ]
+        abs_data = sorted([_abs(r) for r in model.rows])
+        min_, max_ = abs_data[0], abs_data[-1]
+
+        def reference() -> None:
+            for index, role in cells:
+                if role == Qt.ItemDataRole.BackgroundRole:
+                    val = _abs(model.rows[index.row()])
+                    perc = (val - min_) / (max_ - min_)
+                    QBrush(QColor.fromHsl(int(perc * 120), 223, 159))
+                else:
+                    _data_reference(model, index.row(), index.column(), role)
+
+        def cached() -> None:
+            for index, role in cells:
+                model.data(index, role)
+
+        reference_time = min(repeat(reference, number=10, repeat=3)) / 10
+        cached_time = min(repeat(cached, number=10, repeat=3)) / 10
+        logger.info(
+            'data() of %d cells: reference %.2fus/cell, cached %.2fus/cell',
+            len(cells),
+            reference_time / len(cells) * 1e6,
+            cached_time / len(cells) * 1e6,
+        )
+        self.assertLess(cached_time, reference_time)
+
+    @benchmark
+    def test_benchmark_refresh(self) -> None:
+        rows = _rows(BENCHMARK_ROWS)
+        model = ViewModel(TagRows('rows'))
+
+        def setup() -> None:
+            model.reset(TagRows('rows', rows[100:]))
+
+        def reset() -> None:
+            model.reset(TagRows('rows', rows))
+
+        def insert_rows() -> None:
+            # a refresh, with a new export of 100 rows
+            model.insert_rows(0, rows[:100])
+
+        def load() -> None:
+            model.load(TagRows('rows', rows))
+
+        reset_time = min(repeat(reset, setup, number=1, repeat=3))
+        for what, refresh in (('insert_rows', insert_rows), ('load', load)):
+            with self.subTest(what=what):
+                refresh_time = min(repeat(refresh, setup, number=1, repeat=3))
+                self.assertListEqual(rows, model.rows)
+                logger.info(
+                    'refresh of %d rows: reset %.4fs, %s %.4fs (x%.1f)',
+                    BENCHMARK_ROWS,
+                    reset_time,
+                    what,
+                    refresh_time,
+                    reset_time / refresh_time,
+                )
+                self.assertLess(refresh_time, reset_time)
+
+    def test_load(self) -> None:
+        rows = _rows(30)
+        model = ViewModel(TagRows('old', rows[5:25]))
+        events: list[tuple[str, int, int]] = []
+        model.rowsInserted.connect(
+            lambda _parent, first, last: events.append(('+', first, last))
+        )
+        model.rowsRemoved.connect(
+            lambda _parent, first, last: events.append(('-', first, last))
+        )
+        model.modelReset.connect(lambda: events.append(('reset', 0, 0)))
+        persistent = QPersistentModelIndex(model.index(10, 0))
+
+        # new rows on top, some gone from the middle, others changed
+        changed = replace(rows[20], descrizione_operazioni='CHANGED')
+        model.load(
+            TagRows('new', [*rows[:5], *rows[5:12], *rows[15:20], changed])
+        )
+
+        self.assertEqual('new', model.name)
+        self.assertListEqual(
+            [*rows[:5], *rows[5:12], *rows[15:20], changed], model.rows
+        )
+        self.assert_same_as_reference(model)
+        self.assertListEqual(
+            [('-', 15, 19), ('+', 15, 15), ('-', 7, 9), ('+', 0, 4)], events
+        )
+        self.assertEqual(rows[15], model.rows[persistent.row()])
+
+        events.clear()
+        model.load(TagRows('new', list(model.rows)))
+        self.assertListEqual([], events)
+
+        model.load(TagRows('all', rows * 100))
+        self.assertListEqual([('reset', 0, 0)], events)
+        self.assertListEqual(rows * 100, model.rows)